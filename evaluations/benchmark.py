@@ -0,0 +1,246 @@
+import argparse
+import csv
+import gc
+import importlib
+import json
+import os
+import platform
+import subprocess
+import time
+import tracemalloc
+from typing import Callable, Dict, List, Tuple
+
+from strategies.dynamic_mapping import dynamic_mapping
+from strategies.pipeline import parse_pipeline
+
+
+# Strategies to benchmark: name -> (module, extra keyword arguments).
+# hamming_code is measured both with the single-codeword Hamming code the
+# evaluations use and with the (72,64) block code.
+STRATEGIES = {
+    'basic_approach': ('strategies.basic_approach', {}),
+    'dynamic_mapping': ('strategies.dynamic_mapping', {}),
+    'huffman_encoding': ('strategies.huffman_encoding', {}),
+    'adaptive_coding': ('strategies.adaptive_coding', {}),
+    'hamming_code': ('strategies.hamming_code', {}),
+    'hamming_code_72_64': ('strategies.hamming_code', {'block_code': (72, 64)}),
+}
+
+# Options of pipelines given as a spec, e.g. 'huffman+hamming+dynamic'
+PIPELINE_OPTIONS = {'seed': 11, 'block_code': (72, 64), 'allow_overflow': True}
+
+# Columns of the CSV file, in order
+FIELDS = ['commit', 'strategy', 'cover_text', 'message', 'message_bits',
+          'stego_chars', 'encode_seconds', 'decode_seconds',
+          'encode_bits_per_second', 'decode_bits_per_second',
+          'encode_peak_bytes', 'decode_peak_bytes', 'correct']
+
+
+def message_files(message_dir: str) -> List[str]:
+    """List the hidden message files from small to large.
+
+    Args:
+        message_dir (str): Directory with the hidden messages.
+
+    Returns:
+        List[str]: The paths of the files, sorted by size.
+    """
+    files = [os.path.join(message_dir, f) for f in os.listdir(message_dir)
+             if os.path.isfile(os.path.join(message_dir, f))]
+    return sorted(files, key=os.path.getsize)
+
+
+def git_commit() -> str:
+    """Return the short hash of the checked out commit, if there is one."""
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'],
+                              capture_output=True, text=True,
+                              check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return 'unknown'
+
+
+def best_time(function: Callable, repeat: int) -> Tuple[float, object]:
+    """Time a call, keeping the fastest of several runs.
+
+    Args:
+        function (Callable): The call to time, without arguments.
+        repeat (int): The number of runs.
+
+    Returns:
+        Tuple[float, object]: The fastest time in seconds and the result.
+    """
+    best = float('inf')
+    result = None
+    for _ in range(repeat):
+        gc.collect()
+        start = time.perf_counter()
+        result = function()
+        best = min(best, time.perf_counter() - start)
+
+    return best, result
+
+
+def peak_memory(function: Callable) -> int:
+    """Measure the peak memory allocated by a call with tracemalloc.
+
+    This runs separately from the timing, because tracing slows Python
+    allocations down considerably.
+
+    Args:
+        function (Callable): The call to measure, without arguments.
+
+    Returns:
+        int: The peak traced memory in bytes.
+    """
+    gc.collect()
+    tracemalloc.start()
+    try:
+        function()
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+
+    return peak
+
+
+def benchmark(strategy: str, cover_file: str, message_file: str,
+              repeat: int = 3, memory: bool = True) -> Dict[str, object]:
+    """Benchmark encoding and decoding one hidden message with one strategy.
+
+    Args:
+        strategy (str): A key of STRATEGIES or a pipeline spec for
+            strategies.pipeline.parse_pipeline, e.g. 'huffman+hamming'.
+        cover_file (str): Path to the cover text.
+        message_file (str): Path to the hidden message.
+        repeat (int, optional): Runs per measurement. Defaults to 3.
+        memory (bool, optional): Also measure the peak memory. Defaults to
+            True.
+
+    Returns:
+        Dict[str, object]: The measurements, keyed by the names in FIELDS.
+    """
+    with open(cover_file, "r", encoding="utf-8") as file:
+        cover_text = file.read()
+    with open(message_file, "r", encoding="utf-8") as file:
+        hidden_message = file.read()
+
+    if strategy in STRATEGIES:
+        module_name, kwargs = STRATEGIES[strategy]
+        module = importlib.import_module(module_name)
+        inv_chars = dynamic_mapping(11)
+
+        def encode():
+            return module.encode_message(cover_text, hidden_message,
+                                         inv_chars, allow_overflow=True,
+                                         **kwargs)
+
+        def decode():
+            return module.decode_message(stego_object, inv_chars, **kwargs)
+    else:
+        pipeline = parse_pipeline(strategy, **PIPELINE_OPTIONS)
+
+        def encode():
+            return pipeline.encode_message(cover_text, hidden_message)
+
+        def decode():
+            return pipeline.decode_message(stego_object)
+
+    encode_seconds, stego_object = best_time(encode, repeat)
+    decode_seconds, decoded_message = best_time(decode, repeat)
+
+    message_bits = len(hidden_message) * 8
+    return {
+        'strategy': strategy,
+        'cover_text': os.path.basename(cover_file),
+        'message': os.path.basename(message_file),
+        'message_bits': message_bits,
+        'stego_chars': len(stego_object),
+        'encode_seconds': encode_seconds,
+        'decode_seconds': decode_seconds,
+        'encode_bits_per_second': message_bits / encode_seconds,
+        'decode_bits_per_second': message_bits / decode_seconds,
+        'encode_peak_bytes': peak_memory(encode) if memory else None,
+        'decode_peak_bytes': peak_memory(decode) if memory else None,
+        'correct': decoded_message == hidden_message,
+    }
+
+
+def write_results(records: List[Dict[str, object]], metadata: Dict[str, str],
+                  output_prefix: str) -> Tuple[str, str]:
+    """Write benchmark records to a JSON and a CSV file.
+
+    Args:
+        records (List[Dict[str, object]]): The measurements.
+        metadata (Dict[str, str]): Information about the run, e.g. the commit.
+        output_prefix (str): Path of the output files without extension.
+
+    Returns:
+        Tuple[str, str]: The paths of the JSON and the CSV file.
+    """
+    os.makedirs(os.path.dirname(output_prefix) or '.', exist_ok=True)
+    json_path = output_prefix + '.json'
+    csv_path = output_prefix + '.csv'
+
+    with open(json_path, "w", encoding="utf-8") as file:
+        json.dump({'metadata': metadata, 'results': records}, file, indent=2)
+
+    with open(csv_path, "w", encoding="utf-8", newline='') as file:
+        writer = csv.DictWriter(file, fieldnames=FIELDS)
+        writer.writeheader()
+        for record in records:
+            writer.writerow({'commit': metadata['commit'], **record})
+
+    return json_path, csv_path
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Benchmark encoding and decoding of every strategy.")
+    parser.add_argument('strategies', nargs='*', default=list(STRATEGIES),
+                        help=f"strategies to benchmark ({', '.join(STRATEGIES)}) "
+                             "or pipeline specs such as huffman+hamming+static")
+    parser.add_argument('--cover', default="cover_texts/long_covertext.txt",
+                        help="cover text file")
+    parser.add_argument('--messages', default="hidden_messages",
+                        help="directory with the hidden messages")
+    parser.add_argument('--max-bits', type=int, default=None,
+                        help="skip hidden messages larger than this")
+    parser.add_argument('--repeat', type=int, default=3,
+                        help="runs per timing, the fastest is kept")
+    parser.add_argument('--no-memory', action='store_true',
+                        help="skip the tracemalloc measurements")
+    parser.add_argument('--output', default=None,
+                        help="output path without extension "
+                             "(default: results/benchmark_<commit>)")
+    args = parser.parse_args()
+
+    commit = git_commit()
+    metadata = {
+        'commit': commit,
+        'timestamp': time.strftime("%Y-%m-%d %H:%M:%S"),
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'repeat': str(args.repeat),
+    }
+
+    records = []
+    for message_file in message_files(args.messages):
+        if args.max_bits and os.path.getsize(message_file) * 8 > args.max_bits:
+            continue
+        for strategy in args.strategies:
+            record = benchmark(strategy, args.cover, message_file,
+                               args.repeat, not args.no_memory)
+            records.append(record)
+            print(f"{strategy:20} {record['message']:28} "
+                  f"encode {record['encode_seconds']:8.4f} s "
+                  f"decode {record['decode_seconds']:8.4f} s "
+                  f"correct {record['correct']}")
+
+    json_path, csv_path = write_results(
+        records, metadata, args.output or f"results/benchmark_{commit}")
+    print(f"Results saved to {json_path} and {csv_path}")
+
+
+if __name__ == "__main__":
+    main()
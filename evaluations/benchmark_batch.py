@@ -0,0 +1,149 @@
+import argparse
+import importlib
+import json
+import os
+import random
+import time
+from typing import Dict, List, Tuple
+
+from evaluations.benchmark import STRATEGIES, git_commit
+from strategies.dynamic_mapping import dynamic_mapping
+
+
+def build_pairs(cover_file: str, message_file: str, count: int,
+                seed: int = 11) -> List[Tuple[str, str]]:
+    """Cut many short (cover text, hidden message) pairs from two files.
+
+    Args:
+        cover_file (str): Text to cut the cover texts from.
+        message_file (str): Text to cut the hidden messages from.
+        count (int): The number of pairs.
+        seed (int, optional): Seed for the cut positions. Defaults to 11.
+
+    Returns:
+        List[Tuple[str, str]]: Covers of 100 to 300 words with messages of
+        10 to 100 characters.
+    """
+    with open(cover_file, "r", encoding="utf-8") as file:
+        words = file.read().split()
+    with open(message_file, "r", encoding="utf-8") as file:
+        text = file.read()
+
+    rng = random.Random(seed)
+    pairs = []
+    for _ in range(count):
+        size = rng.randint(100, 300)
+        start = rng.randrange(max(1, len(words) - size))
+        length = rng.randint(10, 100)
+        offset = rng.randrange(max(1, len(text) - length))
+        pairs.append((' '.join(words[start:start + size]),
+                      text[offset:offset + length]))
+
+    return pairs
+
+
+def time_call(function) -> Tuple[float, object]:
+    """Time one call.
+
+    Args:
+        function (Callable): The call to time, without arguments.
+
+    Returns:
+        Tuple[float, object]: The time in seconds and the result.
+    """
+    start = time.perf_counter()
+    result = function()
+    return time.perf_counter() - start, result
+
+
+def benchmark(strategy: str, pairs: List[Tuple[str, str]],
+              workers: int) -> List[Dict[str, object]]:
+    """Compare calling encode_message/decode_message per message with
+    encode_batch/decode_batch, serially and on a process pool.
+
+    The single-call path generates the mapping for every message, as
+    callers without a batch API do.
+
+    Args:
+        strategy (str): A key of benchmark.STRATEGIES.
+        pairs (List[Tuple[str, str]]): The (cover text, hidden message) pairs.
+        workers (int): Worker processes of the pool run; 1 skips it.
+
+    Returns:
+        List[Dict[str, object]]: One record per path.
+    """
+    module_name, kwargs = STRATEGIES[strategy]
+    module = importlib.import_module(module_name)
+    messages = [message for _, message in pairs]
+
+    def single():
+        stego_objects = [module.encode_message(cover, message,
+                                               dynamic_mapping(11),
+                                               allow_overflow=True, **kwargs)
+                         for cover, message in pairs]
+        decoded = [module.decode_message(stego_object, dynamic_mapping(11),
+                                         **kwargs)
+                   for stego_object in stego_objects]
+        return stego_objects, decoded
+
+    def batch(pool_workers):
+        inv_chars = dynamic_mapping(11)
+        stego_objects = list(module.encode_batch(pairs, inv_chars,
+                                                 workers=pool_workers,
+                                                 allow_overflow=True,
+                                                 **kwargs))
+        decoded = list(module.decode_batch(stego_objects, inv_chars,
+                                           workers=pool_workers, **kwargs))
+        return stego_objects, decoded
+
+    paths = [('single', single), ('batch', lambda: batch(1))]
+    if workers > 1:
+        paths.append((f'batch_{workers}_workers', lambda: batch(workers)))
+
+    records = []
+    for path, function in paths:
+        seconds, (_, decoded) = time_call(function)
+        records.append({'strategy': strategy, 'path': path,
+                        'messages': len(pairs), 'seconds': seconds,
+                        'microseconds_per_message': seconds / len(pairs) * 1e6,
+                        'correct': decoded == messages})
+    return records
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Per-message cost of the batch API against single calls.")
+    parser.add_argument('strategies', nargs='*', default=list(STRATEGIES),
+                        help=f"strategies to benchmark ({', '.join(STRATEGIES)})")
+    parser.add_argument('--count', type=int, default=2000,
+                        help="number of (cover text, message) pairs")
+    parser.add_argument('--workers', type=int, default=os.cpu_count() or 1,
+                        help="worker processes for the pool run")
+    parser.add_argument('--cover', default="cover_texts/long_covertext.txt",
+                        help="text the cover texts are cut from")
+    parser.add_argument('--messages', default="hidden_messages/8000000bits_message.txt",
+                        help="text the hidden messages are cut from")
+    parser.add_argument('--output', default=None,
+                        help="JSON output file "
+                             "(default: results/benchmark_batch_<commit>.json)")
+    args = parser.parse_args()
+
+    pairs = build_pairs(args.cover, args.messages, args.count)
+    records = []
+    for strategy in args.strategies:
+        for record in benchmark(strategy, pairs, args.workers):
+            records.append(record)
+            print(f"{strategy:20} {record['path']:18} "
+                  f"{record['microseconds_per_message']:10.1f} us/message "
+                  f"correct {record['correct']}")
+
+    commit = git_commit()
+    output = args.output or f"results/benchmark_batch_{commit}.json"
+    os.makedirs(os.path.dirname(output) or '.', exist_ok=True)
+    with open(output, "w", encoding="utf-8") as file:
+        json.dump({'commit': commit, 'results': records}, file, indent=2)
+    print(f"Results saved to {output}")
+
+
+if __name__ == "__main__":
+    main()
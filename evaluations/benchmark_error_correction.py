@@ -0,0 +1,122 @@
+import argparse
+import json
+import os
+import random
+from typing import Dict
+
+from evaluations.benchmark import best_time, git_commit, message_files
+from evaluations.fault_simulation import (DEFAULT_RATES, ERROR_MODELS,
+                                          FaultSimulator, sweep)
+from strategies.pipeline import parse_pipeline
+
+
+# Error correction codes to compare: name -> (pipeline spec, options).
+# All of them protect the Huffman-compressed message
+CODES = {
+    'hamming': ('huffman+hamming', {'block_code': None}),
+    'hamming_7_4': ('huffman+hamming', {'block_code': (7, 4)}),
+    'hamming_72_64': ('huffman+hamming', {'block_code': (72, 64)}),
+    'reed_solomon_8': ('huffman+reed_solomon', {'parity': 8}),
+    'reed_solomon_16': ('huffman+reed_solomon', {'parity': 16}),
+    'reed_solomon_32': ('huffman+reed_solomon', {'parity': 32}),
+}
+
+# Error models of the correction sweep
+SWEEP_MODELS = ['ber', 'burst']
+
+
+def benchmark(code: str, hidden_message: str, repeat: int = 3
+              ) -> Dict[str, object]:
+    """Time the error correction stage of a code on one message.
+
+    Args:
+        code (str): A key of CODES.
+        hidden_message (str): The message.
+        repeat (int, optional): Runs per measurement; the fastest counts.
+
+    Returns:
+        Dict[str, object]: Sizes, times and throughput of the code.
+    """
+    spec, options = CODES[code]
+    pipeline = parse_pipeline(spec, seed=42, **options)
+    stage = pipeline.error_correction
+    data, nbits, _ = pipeline.compression.compress(hidden_message)
+
+    encode_seconds, (encoded, encoded_bits) = best_time(
+        lambda: stage.encode(data, nbits), repeat)
+    decode_seconds, decoded = best_time(
+        lambda: stage.decode(encoded, encoded_bits), repeat)
+
+    return {'code': code, 'payload_bits': nbits,
+            'encoded_bits': encoded_bits,
+            'overhead': encoded_bits / nbits if nbits else None,
+            'encode_seconds': encode_seconds,
+            'decode_seconds': decode_seconds,
+            'encode_bits_per_second': nbits / encode_seconds,
+            'decode_bits_per_second': nbits / decode_seconds,
+            'correct': decoded == (data, nbits)}
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Throughput and correction capability of the Hamming "
+                    "and Reed-Solomon codes.")
+    parser.add_argument('codes', nargs='*', default=list(CODES),
+                        help=f"codes to compare ({', '.join(CODES)})")
+    parser.add_argument('--message-dir', default="hidden_messages",
+                        help="directory with the hidden messages")
+    parser.add_argument('--repeat', type=int, default=3,
+                        help="runs per timing, the fastest is kept")
+    parser.add_argument('--trials', type=int, default=200,
+                        help="error patterns per rate in the sweep")
+    parser.add_argument('--sweep-max-bits', type=int, default=80000,
+                        help="largest message (in bits) to sweep errors on")
+    parser.add_argument('--output', default=None,
+                        help="JSON output file (default: "
+                             "results/benchmark_error_correction_<commit>.json)")
+    args = parser.parse_args()
+
+    throughput = []
+    correction = []
+    rng = random.Random(42)
+    for message_file in message_files(args.message_dir):
+        with open(message_file, "r", encoding="utf-8") as file:
+            hidden_message = file.read()
+        message = os.path.basename(message_file)
+
+        for code in args.codes:
+            record = benchmark(code, hidden_message, args.repeat)
+            record['message'] = message
+            throughput.append(record)
+            print(f"{code:16} {message:24} overhead {record['overhead']:.3f} "
+                  f"encode {record['encode_bits_per_second'] / 1e6:8.2f} "
+                  f"Mbit/s decode "
+                  f"{record['decode_bits_per_second'] / 1e6:8.2f} Mbit/s")
+
+            if len(hidden_message) * 8 > args.sweep_max_bits:
+                continue
+            spec, options = CODES[code]
+            simulator = FaultSimulator(parse_pipeline(spec, seed=42,
+                                                      **options),
+                                       hidden_message)
+            models = {name: ERROR_MODELS[name] for name in SWEEP_MODELS}
+            for result in sweep(simulator, models, DEFAULT_RATES,
+                                args.trials, rng):
+                result.update(code=code, message=message)
+                correction.append(result)
+                print(f"{'':16} {'':24} {result['model']:6} "
+                      f"{result['rate']:<8g} success "
+                      f"{result['success_rate']:6.1%}")
+
+    commit = git_commit()
+    output = args.output or \
+        f"results/benchmark_error_correction_{commit}.json"
+    os.makedirs(os.path.dirname(output) or '.', exist_ok=True)
+    with open(output, "w", encoding="utf-8") as file:
+        json.dump({'commit': commit, 'throughput': throughput,
+                   'correction': correction}, file, indent=2)
+    print(f"Results saved to {output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,113 @@
+import argparse
+import json
+import os
+import random
+import time
+from collections import Counter
+from typing import Dict, List
+
+from evaluations.benchmark import git_commit
+from strategies.canonical_huffman import (build_huffman_tree,
+                                          generate_huffman_codes)
+
+
+# Numbers of distinct symbols to build trees for
+ALPHABET_SIZES = [2, 16, 256, 4096, 65536]
+
+
+def alphabet(size: int) -> List[str]:
+    """Return size distinct characters, skipping the surrogate range.
+
+    Args:
+        size (int): The number of characters.
+
+    Returns:
+        List[str]: The characters.
+    """
+    chars = []
+    code_point = 0x20
+    while len(chars) < size:
+        if not 0xD800 <= code_point <= 0xDFFF:
+            chars.append(chr(code_point))
+        code_point += 1
+
+    return chars
+
+
+def frequencies(size: int, distribution: str, seed: int = 11) -> Counter:
+    """Build a frequency profile over an alphabet.
+
+    Args:
+        size (int): The number of distinct symbols.
+        distribution (str): 'uniform', 'zipf' (count proportional to
+            1/rank) or 'skewed' (Fibonacci-like counts, giving the deepest
+            possible tree for the first 80 symbols).
+        seed (int, optional): Seed for the random counts. Defaults to 11.
+
+    Returns:
+        Counter: The count of every symbol.
+    """
+    rng = random.Random(seed)
+    chars = alphabet(size)
+    if distribution == 'uniform':
+        counts = [rng.randint(1000, 1100) for _ in chars]
+    elif distribution == 'zipf':
+        counts = [1_000_000 // rank + 1 for rank in range(1, size + 1)]
+    else:
+        counts = [1, 1]
+        while len(counts) < size:
+            counts.append(counts[-1] + counts[-2] if len(counts) < 80
+                          else rng.randint(1, 1000))
+        counts = counts[:size]
+
+    return Counter(dict(zip(chars, counts)))
+
+
+def time_build(freq: Counter, repeat: int) -> float:
+    """Time building a tree and its codebook, keeping the fastest run.
+
+    Args:
+        freq (Counter): The frequency profile.
+        repeat (int): The number of runs.
+
+    Returns:
+        float: The fastest time in seconds.
+    """
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        generate_huffman_codes(build_huffman_tree(freq))
+        best = min(best, time.perf_counter() - start)
+
+    return best
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Microbenchmark of the Huffman tree construction.")
+    parser.add_argument('--repeat', type=int, default=5,
+                        help="runs per measurement, the fastest is kept")
+    parser.add_argument('--output', default=None,
+                        help="JSON output file "
+                             "(default: results/benchmark_huffman_<commit>.json)")
+    args = parser.parse_args()
+
+    records: List[Dict[str, object]] = []
+    for distribution in ('uniform', 'zipf', 'skewed'):
+        for size in ALPHABET_SIZES:
+            seconds = time_build(frequencies(size, distribution), args.repeat)
+            records.append({'distribution': distribution, 'symbols': size,
+                            'seconds': seconds,
+                            'symbols_per_second': size / seconds})
+            print(f"{distribution:8} {size:6} symbols {seconds * 1000:10.3f} ms")
+
+    commit = git_commit()
+    output = args.output or f"results/benchmark_huffman_{commit}.json"
+    os.makedirs(os.path.dirname(output) or '.', exist_ok=True)
+    with open(output, "w", encoding="utf-8") as file:
+        json.dump({'commit': commit, 'results': records}, file, indent=2)
+    print(f"Results saved to {output}")
+
+
+if __name__ == "__main__":
+    main()
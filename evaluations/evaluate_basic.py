@@ -18,7 +18,8 @@ def readability(cover_text, stego_text):
 
 def test_payload_capacity(cover_text, hidden_message, inv_chars):
     # Encode the message into the cover text
-    stego_text = encode_message(cover_text, hidden_message, inv_chars)
+    stego_text = encode_message(cover_text, hidden_message, inv_chars,
+                                allow_overflow=True)
 
     # Calculate payload capacity
     cover_size = len(cover_text) * 8  # Convert characters to bits
@@ -27,6 +28,35 @@ def test_payload_capacity(cover_text, hidden_message, inv_chars):
 
     return payload_capacity, stego_text
 
+def evaluate_pair(cover_file, message_file, inv_chars, results_dir):
+    """Embed one hidden message file in one cover text file and save it.
+
+    Used by main() and by the parallel runner in run_evaluations.py.
+
+    Returns:
+        str: A line describing the outcome.
+    """
+    with open(cover_file, "r", encoding="utf-8") as cover_file_obj:
+        cover_text = cover_file_obj.read()
+
+    with open(message_file, "r", encoding="utf-8") as message_file_obj:
+        hidden_message = message_file_obj.read()
+
+    # Calculate payload capacity and stego text
+    _, stego_text = test_payload_capacity(cover_text, hidden_message, inv_chars)
+
+    # Check readability
+    if not readability(cover_text, stego_text):
+        return f"Stego text generated for {cover_file} and {message_file} has lost readability."
+
+    output_filename = f"{os.path.basename(cover_file).split('.')[0]}_{os.path.basename(message_file).split('.')[0]}.txt"
+    output_file_path = os.path.join(results_dir, output_filename)
+
+    # Save payload capacity to a file
+    with open(output_file_path, "w", encoding="utf-8") as output_file:
+        output_file.write(stego_text)
+    return f"Stego text for {cover_file} and {message_file} saved to {output_file_path}"
+
 def main():
     # Directories containing cover texts and hidden messages
     cover_dir = "cover_texts"
@@ -46,27 +76,8 @@ def main():
 
     # Iterate through all combinations of cover text and hidden message files
     for cover_file in cover_files:
-        with open(cover_file, "r", encoding="utf-8") as cover_file_obj:
-            cover_text = cover_file_obj.read()
-
         for message_file in message_files:
-            with open(message_file, "r", encoding="utf-8") as message_file_obj:
-                hidden_message = message_file_obj.read()
-
-            # Calculate payload capacity and stego text
-            _, stego_text = test_payload_capacity(cover_text, hidden_message, invisible_chars)
-
-            # Check readability
-            if readability(cover_text, stego_text):
-                output_filename = f"{os.path.basename(cover_file).split('.')[0]}_{os.path.basename(message_file).split('.')[0]}.txt"
-                output_file_path = os.path.join(results_dir, output_filename)
-
-                # Save payload capacity to a file
-                with open(output_file_path, "w", encoding="utf-8") as output_file:
-                    output_file.write(stego_text)
-                print(f"Stego text for {cover_file} and {message_file} saved to {output_file_path}")
-            else:
-                print(f"Stego text generated for {cover_file} and {message_file} has lost readability.")
+            print(evaluate_pair(cover_file, message_file, invisible_chars, results_dir))
 
 if __name__ == "__main__":
     main()
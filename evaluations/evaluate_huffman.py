@@ -1,8 +1,13 @@
 from strategies.huffman_encoding import *
+from strategies import adaptive_coding
+from strategies.bit_buffer import bytes_to_bits
 import os
 
+# First line of the results file
+RESULTS_HEADER = "Cover Text, Hidden Message, Payload Capacity (No Huffman), Payload Capacity (Huffman), Compression Ratio, Readable (No Huffman), Readable (Huffman), Compression Ratio (Huffman with Codebook), Payload Capacity (Adaptive), Compression Ratio (Adaptive), Readable (Adaptive)\n"
+
 def readability(cover_text, stego_text):
-    chars = {'\u200C', '\u200B'}
+    chars = {'\u200C', '\u200B', '\u200D'}
     cover_text_content = ''.join(char for char in cover_text if char not in chars)
     stego_text_content = ''.join(char for char in stego_text if char not in chars)
 
@@ -12,15 +17,15 @@ def test_payload_capacity(cover_text, hidden_message, inv_chars, use_huffman=Fal
     """Calculate payload capacity and optionally compress the hidden message with Huffman encoding."""
     if use_huffman:
         # Huffman encode the message
-        huffman_encoded_binary_message, _ = huffman_encode(hidden_message)
-        compressed_message = huffman_encoded_binary_message
-        compressed_size = len(compressed_message)  # Bits
+        packed, compressed_size, _ = huffman_encode(hidden_message)  # Bits
+        compressed_message = bytes_to_bits(packed, compressed_size)
     else:
         compressed_message = hidden_message
         compressed_size = len(hidden_message) * 8  # Bits
 
     # Encode the (compressed) message into the cover text
-    stego_text = encode_message(cover_text, compressed_message, inv_chars)
+    stego_text = encode_message(cover_text, compressed_message, inv_chars,
+                                allow_overflow=True)
 
     # Calculate payload capacity
     cover_size = len(cover_text) * 8  # Bits
@@ -35,14 +40,75 @@ def test_payload_capacity(cover_text, hidden_message, inv_chars, use_huffman=Fal
 
     return payload_capacity, compression_ratio, stego_text
 
+def test_adaptive_capacity(cover_text, hidden_message, inv_chars):
+    """Calculate payload capacity and compression ratio of adaptive coding, which embeds no codebook."""
+    compressed_size = len(adaptive_coding.adaptive_encode(hidden_message)) * 8  # Bits
+
+    # Encode the compressed message into the cover text
+    stego_text = adaptive_coding.encode_message(cover_text, hidden_message, inv_chars,
+                                                allow_overflow=True)
+
+    cover_size = len(cover_text) * 8  # Bits
+    payload_capacity = compressed_size / cover_size
+    compression_ratio = compressed_size / (len(hidden_message) * 8)
+
+    return payload_capacity, compression_ratio, stego_text
+
+def codebook_compression_ratio(hidden_message):
+    """Calculate the Huffman compression ratio including the embedded JSON codebook."""
+    _, huffman_bits, codebook = huffman_encode(hidden_message)
+    compressed_size = huffman_bits + len(dump_codebook(codebook)) * 8  # Bits
+
+    return compressed_size / (len(hidden_message) * 8)
+
+def evaluate_pair(cover_file, message_file, inv_chars):
+    """Evaluate one cover text file and hidden message file with and without Huffman.
+
+    Used by main() and by the parallel runner in run_evaluations.py.
+
+    Returns:
+        str: The result line for the output file.
+    """
+    with open(cover_file, "r", encoding="utf-8") as cover_file_obj:
+        cover_text = cover_file_obj.read()
+
+    with open(message_file, "r", encoding="utf-8") as message_file_obj:
+        hidden_message = message_file_obj.read()
+
+    # Without Huffman Encoding
+    payload_capacity_no_huffman, _, stego_text_no_huffman = test_payload_capacity(
+        cover_text, hidden_message, inv_chars, use_huffman=False
+    )
+
+    # With Huffman Encoding
+    payload_capacity_huffman, compression_ratio, stego_text_huffman = test_payload_capacity(
+        cover_text, hidden_message, inv_chars, use_huffman=True
+    )
+
+    # With adaptive coding, no codebook
+    payload_capacity_adaptive, compression_ratio_adaptive, stego_text_adaptive = test_adaptive_capacity(
+        cover_text, hidden_message, inv_chars
+    )
+
+    # Check readability
+    readable_no_huffman = readability(cover_text, stego_text_no_huffman)
+    readable_huffman = readability(cover_text, stego_text_huffman)
+    readable_adaptive = readability(cover_text, stego_text_adaptive)
+
+    return (f"{os.path.basename(cover_file)}, {os.path.basename(message_file)}, "
+            f"{payload_capacity_no_huffman:.6f}, {payload_capacity_huffman:.6f}, "
+            f"{compression_ratio:.6f}, {readable_no_huffman}, {readable_huffman}, "
+            f"{codebook_compression_ratio(hidden_message):.6f}, {payload_capacity_adaptive:.6f}, "
+            f"{compression_ratio_adaptive:.6f}, {readable_adaptive}\n")
+
 def main():
     # Directories containing cover texts and hidden messages
     cover_dir = "cover_texts"
     message_dir = "hidden_messages"
 
     # Get all cover text files and hidden message files
-    cover_files = [os.path.join(cover_dir, f) for f in os.listdir(cover_dir) if os.path.isfile(os.path.join(cover_dir, f))]
-    message_files = [os.path.join(message_dir, f) for f in os.listdir(message_dir) if os.path.isfile(os.path.join(message_dir, f))]
+    cover_files = [os.path.join(cover_dir, f) for f in sorted(os.listdir(cover_dir)) if os.path.isfile(os.path.join(cover_dir, f))]
+    message_files = [os.path.join(message_dir, f) for f in sorted(os.listdir(message_dir)) if os.path.isfile(os.path.join(message_dir, f))]
 
     # Seed for dynamic mapping
     seed = 11
@@ -53,35 +119,12 @@ def main():
     os.makedirs(os.path.dirname(output_file_path), exist_ok=True)  # Create directory if it doesn't exist
 
     with open(output_file_path, "w", encoding="utf-8") as output_file:
-        output_file.write("Cover Text, Hidden Message, Payload Capacity (No Huffman), Payload Capacity (Huffman), Compression Ratio, Readable (No Huffman), Readable (Huffman)\n")
+        output_file.write(RESULTS_HEADER)
 
         # Iterate through all combinations of cover text and hidden message files
         for cover_file in cover_files:
-            with open(cover_file, "r", encoding="utf-8") as cover_file_obj:
-                cover_text = cover_file_obj.read()
-
             for message_file in message_files:
-                with open(message_file, "r", encoding="utf-8") as message_file_obj:
-                    hidden_message = message_file_obj.read()
-
-                # Without Huffman Encoding
-                payload_capacity_no_huffman, _, stego_text_no_huffman = test_payload_capacity(
-                    cover_text, hidden_message, invisible_chars, use_huffman=False
-                )
-
-                # With Huffman Encoding
-                payload_capacity_huffman, compression_ratio, stego_text_huffman = test_payload_capacity(
-                    cover_text, hidden_message, invisible_chars, use_huffman=True
-                )
-
-                # Check readability
-                readable_no_huffman = readability(cover_text, stego_text_no_huffman)
-                readable_huffman = readability(cover_text, stego_text_huffman)
-
-                # Write results to the output file
-                output_file.write(f"{os.path.basename(cover_file)}, {os.path.basename(message_file)}, "
-                                  f"{payload_capacity_no_huffman:.6f}, {payload_capacity_huffman:.6f}, "
-                                  f"{compression_ratio:.6f}, {readable_no_huffman}, {readable_huffman}\n")
+                output_file.write(evaluate_pair(cover_file, message_file, invisible_chars))
 
     print(f"All results saved to {output_file_path}")
 
@@ -0,0 +1,338 @@
+import argparse
+import json
+import math
+import os
+import random
+import time
+from functools import partial
+from typing import Callable, Dict, Iterable, List, Sequence, Tuple
+
+from evaluations.benchmark import git_commit
+from strategies.pipeline import Mapping, Pipeline, parse_pipeline
+
+
+# Bit errors work on the packed bit buffer of the embedded message: flips
+# XOR the hit bits into one copy of the buffer. Deleted and inserted
+# characters change the invisible character stream itself, so they are
+# applied after the mapping (and its rotation) and the characters are mapped
+# back to bits, shifting every later symbol like on a real stego object.
+
+# Number of consecutive bits flipped by one burst
+BURST_LENGTH = 16
+
+# Error rates swept per model when none are given. For 'flips' the rate is
+# the number of flipped bits, for the others a probability per bit
+# (or per character for 'deletion' and 'insertion')
+DEFAULT_RATES = {
+    'flips': [1, 2, 3],
+    'ber': [1e-5, 1e-4, 1e-3, 1e-2],
+    'burst': [1e-5, 1e-4, 1e-3],
+    'deletion': [1e-5, 1e-4, 1e-3],
+    'insertion': [1e-5, 1e-4, 1e-3],
+}
+
+
+def random_positions(count: int, rate: float,
+                     rng: random.Random) -> List[int]:
+    """Draw the positions hit by independent errors of probability rate.
+
+    The gaps between errors are drawn from the geometric distribution, so
+    the cost grows with the number of errors, not with count.
+
+    Args:
+        count (int): The number of positions.
+        rate (float): The probability of an error at every position.
+        rng (random.Random): The random generator.
+
+    Returns:
+        List[int]: The positions in increasing order.
+    """
+    if rate <= 0:
+        return []
+    if rate >= 1:
+        return list(range(count))
+
+    log_keep = math.log1p(-rate)
+    positions = []
+    position = -1
+    while True:
+        position += 1 + int(math.log(1.0 - rng.random()) / log_keep)
+        if position >= count:
+            return positions
+        positions.append(position)
+
+
+def flip_bits(data: bytes, positions: Iterable[int]) -> bytes:
+    """Flip the given bit positions of a packed buffer.
+
+    Args:
+        data (bytes): The packed bits.
+        positions (Iterable[int]): Bit positions, 0 being the first bit.
+
+    Returns:
+        bytes: A copy of data with the bits flipped.
+    """
+    flipped = bytearray(data)
+    for position in positions:
+        flipped[position >> 3] ^= 0x80 >> (position & 7)
+    return bytes(flipped)
+
+
+def flip_count(data: bytes, nbits: int, rate: float, rng: random.Random,
+               mapping: Mapping = None) -> Tuple[bytes, int]:
+    """Flip exactly int(rate) distinct bits, like the original evaluation."""
+    positions = rng.sample(range(nbits), min(int(rate), nbits))
+    return flip_bits(data, positions), nbits
+
+
+def flip_random(data: bytes, nbits: int, rate: float, rng: random.Random,
+                mapping: Mapping = None) -> Tuple[bytes, int]:
+    """Flip every bit independently with probability rate (a binary
+    symmetric channel with bit error rate rate)."""
+    return flip_bits(data, random_positions(nbits, rate, rng)), nbits
+
+
+def flip_bursts(data: bytes, nbits: int, rate: float, rng: random.Random,
+                mapping: Mapping = None,
+                burst_length: int = BURST_LENGTH) -> Tuple[bytes, int]:
+    """Start a burst of burst_length flipped bits at every bit with
+    probability rate."""
+    positions = set()
+    for start in random_positions(nbits, rate, rng):
+        positions.update(range(start, min(start + burst_length, nbits)))
+    return flip_bits(data, positions), nbits
+
+
+def delete_symbols(data: bytes, nbits: int, rate: float, rng: random.Random,
+                   mapping: Mapping) -> Tuple[bytes, int]:
+    """Delete every invisible character independently with probability
+    rate.
+
+    Args:
+        data (bytes): The packed bits.
+        nbits (int): The number of valid bits.
+        rate (float): The probability of deleting a character.
+        rng (random.Random): The random generator.
+        mapping (Mapping): The mapping stage that embeds the bits.
+
+    Returns:
+        Tuple[bytes, int]: The bits read back from the remaining characters.
+    """
+    invisible = mapping.to_invisible(data, nbits)
+    positions = random_positions(len(invisible), rate, rng)
+    if not positions:
+        return data, nbits
+
+    starts = [0] + [position + 1 for position in positions]
+    ends = positions + [len(invisible)]
+    return mapping.from_invisible(''.join(
+        invisible[start:end] for start, end in zip(starts, ends)))
+
+
+def insert_symbols(data: bytes, nbits: int, rate: float, rng: random.Random,
+                   mapping: Mapping) -> Tuple[bytes, int]:
+    """Insert a random invisible character of the mapping in front of every
+    character independently with probability rate.
+
+    Args:
+        data (bytes): The packed bits.
+        nbits (int): The number of valid bits.
+        rate (float): The probability of an insertion per character.
+        rng (random.Random): The random generator.
+        mapping (Mapping): The mapping stage that embeds the bits.
+
+    Returns:
+        Tuple[bytes, int]: The bits read back from the characters.
+    """
+    invisible = mapping.to_invisible(data, nbits)
+    positions = random_positions(len(invisible), rate, rng)
+    if not positions:
+        return data, nbits
+
+    chars = list(mapping.inv_chars.values())
+    pieces = []
+    start = 0
+    for position in positions:
+        pieces.append(invisible[start:position])
+        pieces.append(rng.choice(chars))
+        start = position
+    pieces.append(invisible[start:])
+    return mapping.from_invisible(''.join(pieces))
+
+
+# Error models: name -> function(data, nbits, rate, rng, mapping)
+ERROR_MODELS = {
+    'flips': flip_count,
+    'ber': flip_random,
+    'burst': flip_bursts,
+    'deletion': delete_symbols,
+    'insertion': insert_symbols,
+}
+
+
+class FaultSimulator:
+    """Encode a hidden message once and decode it under many error patterns.
+
+    The cover text only decides where the invisible characters go; they
+    are extracted again in order, so the errors are applied to the embedded
+    message directly: bit errors to its bits, deletions and insertions to
+    its invisible characters. The header (e.g. the Huffman codebook) is
+    kept intact.
+    """
+
+    def __init__(self, pipeline: Pipeline, hidden_message: str):
+        self.pipeline = pipeline
+        self.hidden_message = hidden_message
+
+        data, nbits, self.header = pipeline.compression.compress(
+            hidden_message)
+        self.data, self.nbits = pipeline.error_correction.encode(data,
+                                                                  nbits)
+
+    def flipped(self, positions: Iterable[int]) -> Tuple[bytes, int]:
+        """Return the encoded bits with the given positions flipped."""
+        return flip_bits(self.data, positions), self.nbits
+
+    def corrupted(self, model: Callable, rate: float,
+                  rng: random.Random) -> Tuple[bytes, int]:
+        """Return the encoded bits after one error pattern of a model.
+
+        Args:
+            model (Callable): A function of ERROR_MODELS.
+            rate (float): The error rate of the model.
+            rng (random.Random): The random generator.
+
+        Returns:
+            Tuple[bytes, int]: The corrupted bit buffer.
+        """
+        return model(self.data, self.nbits, rate, rng,
+                     self.pipeline.mapping)
+
+    def decoded(self, data: bytes, nbits: int) -> str:
+        """Decode corrupted bits into a message.
+
+        Raises:
+            ValueError, KeyError, UnicodeDecodeError: If decoding fails.
+        """
+        data, nbits = self.pipeline.error_correction.decode(data, nbits)
+        return self.pipeline.compression.decompress(data, nbits, self.header)
+
+    def outcome(self, data: bytes, nbits: int) -> str:
+        """Decode corrupted bits.
+
+        Returns:
+            str: 'success', 'wrong' (decoded to another message) or
+            'error' (decoding failed).
+        """
+        try:
+            decoded = self.decoded(data, nbits)
+        except (ValueError, KeyError, UnicodeDecodeError):
+            return 'error'
+        return 'success' if decoded == self.hidden_message else 'wrong'
+
+    def trials(self, model: Callable, rate: float, count: int,
+               rng: random.Random) -> Dict[str, int]:
+        """Decode count error patterns of one model and rate.
+
+        Returns:
+            Dict[str, int]: The number of trials per outcome.
+        """
+        outcomes = {'success': 0, 'wrong': 0, 'error': 0}
+        for _ in range(count):
+            outcomes[self.outcome(*self.corrupted(model, rate, rng))] += 1
+        return outcomes
+
+
+def sweep(simulator: FaultSimulator, models: Dict[str, Callable],
+          rates: Dict[str, Sequence[float]], trials: int,
+          rng: random.Random) -> List[Dict[str, object]]:
+    """Measure the decode success curve of every error model.
+
+    Args:
+        simulator (FaultSimulator): The encoded message.
+        models (Dict[str, Callable]): Error models by name.
+        rates (Dict[str, Sequence[float]]): The rates of every model.
+        trials (int): The number of error patterns per rate.
+        rng (random.Random): The random generator.
+
+    Returns:
+        List[Dict[str, object]]: One record per model and rate.
+    """
+    records = []
+    for name, model in models.items():
+        for rate in rates[name]:
+            start = time.perf_counter()
+            outcomes = simulator.trials(model, rate, trials, rng)
+            seconds = time.perf_counter() - start
+            records.append({'model': name, 'rate': rate, 'trials': trials,
+                            **outcomes,
+                            'success_rate': outcomes['success'] / trials,
+                            'seconds': seconds})
+    return records
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Decode success per error rate under simulated faults.")
+    parser.add_argument('strategies', nargs='*', default=['hamming_code'],
+                        help="strategies or pipeline specs, e.g. "
+                             "hamming_code or huffman+hamming+dynamic")
+    parser.add_argument('--messages', nargs='+',
+                        default=["hidden_messages/8000bits_message.txt"],
+                        help="hidden message files")
+    parser.add_argument('--models', nargs='+', default=list(ERROR_MODELS),
+                        choices=list(ERROR_MODELS), help="error models")
+    parser.add_argument('--rates', type=float, nargs='+', default=None,
+                        help="error rates for every model "
+                             "(default: DEFAULT_RATES)")
+    parser.add_argument('--trials', type=int, default=1000,
+                        help="error patterns per rate")
+    parser.add_argument('--burst-length', type=int, default=BURST_LENGTH,
+                        help="bits flipped per burst")
+    parser.add_argument('--block-code', type=int, nargs=2, default=None,
+                        metavar=('N', 'K'), help="Hamming block code")
+    parser.add_argument('--bits-per-symbol', type=int, default=1,
+                        help="bits per invisible character (1 to 4)")
+    parser.add_argument('--seed', type=int, default=42,
+                        help="seed of the mapping and the error patterns")
+    parser.add_argument('--output', default=None,
+                        help="JSON output file "
+                             "(default: results/fault_simulation_<commit>.json)")
+    args = parser.parse_args()
+
+    models = {name: ERROR_MODELS[name] for name in args.models}
+    if 'burst' in models:
+        models['burst'] = partial(flip_bursts,
+                                  burst_length=args.burst_length)
+    rates = {name: args.rates or DEFAULT_RATES[name] for name in models}
+    block_code = tuple(args.block_code) if args.block_code else None
+
+    rng = random.Random(args.seed)
+    records = []
+    for strategy in args.strategies:
+        pipeline = parse_pipeline(strategy, seed=args.seed,
+                                  bits_per_symbol=args.bits_per_symbol,
+                                  block_code=block_code)
+        for message_file in args.messages:
+            with open(message_file, "r", encoding="utf-8") as file:
+                simulator = FaultSimulator(pipeline, file.read())
+            for record in sweep(simulator, models, rates, args.trials, rng):
+                record.update(strategy=strategy,
+                              message=os.path.basename(message_file),
+                              encoded_bits=simulator.nbits)
+                records.append(record)
+                print(f"{strategy:18} {record['message']:24} "
+                      f"{record['model']:10} {record['rate']:<8g} "
+                      f"success {record['success_rate']:6.1%} "
+                      f"({record['seconds']:.2f} s)")
+
+    commit = git_commit()
+    output = args.output or f"results/fault_simulation_{commit}.json"
+    os.makedirs(os.path.dirname(output) or '.', exist_ok=True)
+    with open(output, "w", encoding="utf-8") as file:
+        json.dump({'commit': commit, 'results': records}, file, indent=2)
+    print(f"Results saved to {output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,215 @@
+import argparse
+import os
+import random
+import time
+import zlib
+from concurrent.futures import ProcessPoolExecutor
+from typing import List, NamedTuple, Sequence
+
+from evaluations import (evaluate_basic, evaluate_dynamic_mapping,
+                         evaluate_hamming, evaluate_huffman)
+from strategies.dynamic_mapping import dynamic_mapping
+
+
+# Strategies that can be evaluated, in the order they are run
+STRATEGIES = ('basic', 'dynamic_mapping', 'huffman', 'hamming')
+
+# Strategies whose runs depend on a seed; the others give the same result
+# for a cover text and hidden message every time
+SEEDED_STRATEGIES = ('hamming',)
+
+# Seed of the invisible character mapping used by the evaluation scripts
+MAPPING_SEED = 11
+
+
+class Job(NamedTuple):
+    """One unit of work for the process pool."""
+    strategy: str
+    cover_file: str
+    message_file: str
+    trial: int
+    seed: int
+
+
+def job_seed(base_seed: int, *key) -> int:
+    """Derive a deterministic seed for a job.
+
+    The seed only depends on the base seed and the job key, not on the
+    order in which the workers pick up the jobs.
+
+    Args:
+        base_seed (int): The seed of the whole evaluation.
+        *key: The values identifying the job.
+
+    Returns:
+        int: A 32-bit seed.
+    """
+    return zlib.crc32(repr((base_seed,) + key).encode('utf-8'))
+
+
+def list_files(directory: str) -> List[str]:
+    """List the files of a directory in sorted order.
+
+    Args:
+        directory (str): Path to the directory.
+
+    Returns:
+        List[str]: The paths of the files.
+    """
+    return sorted(os.path.join(directory, f) for f in os.listdir(directory)
+                  if os.path.isfile(os.path.join(directory, f)))
+
+
+def build_jobs(strategies: Sequence[str], cover_dir: str = "cover_texts",
+               message_dir: str = "hidden_messages", trials: int = 100,
+               base_seed: int = 0) -> List[Job]:
+    """Build the jobs of an evaluation.
+
+    The basic, dynamic_mapping and huffman strategies are deterministic
+    and get one job per cover text and hidden message. The seeded hamming
+    strategy gets trials jobs, each with a cover text, hidden message and
+    error position picked with its own seed, like
+    evaluate_hamming.evaluate_runs.
+
+    Args:
+        strategies (Sequence[str]): The strategies to evaluate.
+        cover_dir (str, optional): Directory with the cover texts.
+        message_dir (str, optional): Directory with the hidden messages.
+        trials (int, optional): Number of runs of the seeded strategies.
+            Defaults to 100.
+        base_seed (int, optional): The seed of the whole evaluation.
+
+    Returns:
+        List[Job]: The jobs in the order their results are merged.
+    """
+    cover_files = list_files(cover_dir)
+    message_files = list_files(message_dir)
+
+    jobs = []
+    for strategy in strategies:
+        if strategy not in STRATEGIES:
+            raise ValueError(f"Unknown strategy: {strategy}")
+        if strategy in SEEDED_STRATEGIES:
+            for run in range(1, trials + 1):
+                seed = job_seed(base_seed, strategy, run)
+                rng = random.Random(seed)
+                jobs.append(Job(strategy,
+                                evaluate_hamming.pick_random_file(cover_dir, rng),
+                                evaluate_hamming.pick_random_file(message_dir, rng),
+                                run, seed))
+            continue
+        for cover_file in cover_files:
+            for message_file in message_files:
+                seed = job_seed(base_seed, strategy,
+                                os.path.basename(cover_file),
+                                os.path.basename(message_file))
+                jobs.append(Job(strategy, cover_file, message_file, 0, seed))
+
+    return jobs
+
+
+def run_job(job: Job) -> str:
+    """Run one job in a worker process.
+
+    Args:
+        job (Job): The job to run.
+
+    Returns:
+        str: The output of the job: a status line, a result line or a log
+        entry, depending on the strategy.
+    """
+    if job.strategy == 'basic':
+        return evaluate_basic.evaluate_pair(
+            job.cover_file, job.message_file, {'0': '\u200C', '1': '\u200B'},
+            "evaluations/basic_approach")
+    if job.strategy == 'dynamic_mapping':
+        return evaluate_dynamic_mapping.evaluate_pair(
+            job.cover_file, job.message_file, dynamic_mapping(MAPPING_SEED),
+            "evaluations/dynamic_mapping")
+    if job.strategy == 'huffman':
+        return evaluate_huffman.evaluate_pair(
+            job.cover_file, job.message_file, dynamic_mapping(MAPPING_SEED))
+
+    entry, _ = evaluate_hamming.evaluate_run(
+        job.trial, job.cover_file, job.message_file, random.Random(job.seed))
+    return entry
+
+
+def run_jobs(jobs: Sequence[Job], workers: int = None) -> List[str]:
+    """Run jobs on a process pool and collect their outputs in job order.
+
+    Args:
+        jobs (Sequence[Job]): The jobs to run.
+        workers (int, optional): Number of worker processes. Defaults to
+            None, one per CPU. With 1 the jobs run in this process.
+
+    Returns:
+        List[str]: The output of every job, in the order of jobs.
+    """
+    if workers == 1:
+        return [run_job(job) for job in jobs]
+
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        return list(executor.map(run_job, jobs))
+
+
+def write_results(jobs: Sequence[Job], outputs: Sequence[str]):
+    """Write the merged outputs like the serial evaluation scripts do.
+
+    Args:
+        jobs (Sequence[Job]): The jobs that were run.
+        outputs (Sequence[str]): Their outputs, in the same order.
+    """
+    huffman_rows = [output for job, output in zip(jobs, outputs)
+                    if job.strategy == 'huffman']
+    if huffman_rows:
+        output_file_path = "results/huffman_encoding.txt"
+        with open(output_file_path, "w", encoding="utf-8") as output_file:
+            output_file.write(evaluate_huffman.RESULTS_HEADER)
+            output_file.writelines(huffman_rows)
+        print(f"All results saved to {output_file_path}")
+
+    hamming_entries = [output for job, output in zip(jobs, outputs)
+                       if job.strategy == 'hamming']
+    if hamming_entries:
+        results_file = "results/results_hamming.txt"
+        with open(results_file, "a", encoding="utf-8") as results:
+            results.writelines(hamming_entries)
+        print(f"{len(hamming_entries)} hamming runs added to {results_file}")
+
+    for job, output in zip(jobs, outputs):
+        if job.strategy in ('basic', 'dynamic_mapping'):
+            print(output)
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Run the evaluations on a process pool.")
+    parser.add_argument('strategies', nargs='*', default=list(STRATEGIES),
+                        help=f"strategies to evaluate ({', '.join(STRATEGIES)})")
+    parser.add_argument('--workers', type=int, default=None,
+                        help="number of worker processes (default: one per CPU)")
+    parser.add_argument('--trials', '--hamming-runs', type=int, default=100,
+                        help="runs of the seeded strategies (hamming); the "
+                             "others run once per cover text and message")
+    parser.add_argument('--seed', type=int, default=0,
+                        help="base seed for the per-job seeds")
+    args = parser.parse_args()
+
+    # Output directories, created once before the workers start
+    os.makedirs("evaluations/basic_approach", exist_ok=True)
+    os.makedirs("evaluations/dynamic_mapping", exist_ok=True)
+    os.makedirs("results", exist_ok=True)
+
+    jobs = build_jobs(args.strategies, trials=args.trials,
+                      base_seed=args.seed)
+    start = time.perf_counter()
+    outputs = run_jobs(jobs, args.workers)
+    elapsed = time.perf_counter() - start
+
+    write_results(jobs, outputs)
+    print(f"{len(jobs)} jobs finished in {elapsed:.2f} seconds")
+
+
+if __name__ == "__main__":
+    main()
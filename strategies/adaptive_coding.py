@@ -0,0 +1,601 @@
+import codecs
+from functools import partial
+from typing import Dict, Iterable, Iterator, TextIO, Tuple, Union
+
+from strategies.batch import map_batch
+from strategies.bit_buffer import (bytes_to_bits, bytes_to_invisible,
+                                   extract_bytes, symbol_count, symbol_size)
+from strategies.dynamic_mapping import dynamic_mapping
+from strategies.placement import check_fit, splice
+from strategies.streaming import (CHUNK_SIZE, iter_bit_buffers, iter_chunks,
+                                  iter_invisible, iter_runs, iter_symbols,
+                                  splice_runs, write_pieces)
+
+
+# Adaptive arithmetic coding: a range coder with an order-0 model of the
+# UTF-8 bytes of the message. The model starts out uniform and learns the
+# byte frequencies while coding, so nothing but the coded bytes has to be
+# embedded and the message is coded in a single pass.
+
+# Symbols of the model: the 256 byte values and an end-of-message symbol
+END_OF_MESSAGE = 256
+NUM_SYMBOLS = 257
+
+# Amount added to the frequency of a symbol every time it is coded
+FREQUENCY_INCREMENT = 24
+
+# The frequencies are halved when their total exceeds this; it must stay
+# below RANGE_BOTTOM so the range coder keeps enough precision
+MAX_TOTAL = 1 << 16
+
+# Range coder constants (carry-less range coder of D. Subbotin)
+RANGE_TOP = 1 << 24
+RANGE_BOTTOM = 1 << 16
+RANGE_MASK = 0xFFFFFFFF
+
+
+class AdaptiveModel:
+    """Adaptive symbol frequencies kept in a Fenwick tree.
+
+    The cumulative frequency of a symbol, the symbol of a cumulative
+    frequency and an update all take O(log NUM_SYMBOLS) steps.
+    """
+    __slots__ = ('frequencies', 'tree', 'total')
+
+    def __init__(self):
+        self.frequencies = [1] * NUM_SYMBOLS
+        self._rebuild()
+
+    def _rebuild(self):
+        # Build the Fenwick tree (1-based) from the frequencies
+        tree = [0] + self.frequencies
+        for index in range(1, NUM_SYMBOLS + 1):
+            parent = index + (index & -index)
+            if parent <= NUM_SYMBOLS:
+                tree[parent] += tree[index]
+        self.tree = tree
+        self.total = sum(self.frequencies)
+
+    def interval(self, symbol: int) -> Tuple[int, int]:
+        """Return the cumulative frequency below a symbol and its frequency.
+
+        Args:
+            symbol (int): The symbol.
+
+        Returns:
+            Tuple[int, int]: The cumulative frequency and the frequency.
+        """
+        tree = self.tree
+        low = 0
+        index = symbol
+        while index:
+            low += tree[index]
+            index &= index - 1
+        return low, self.frequencies[symbol]
+
+    def find(self, target: int) -> Tuple[int, int, int]:
+        """Return the symbol whose interval contains a cumulative frequency.
+
+        Args:
+            target (int): A cumulative frequency below the total.
+
+        Returns:
+            Tuple[int, int, int]: The symbol, its cumulative frequency and
+            its frequency.
+        """
+        tree = self.tree
+        index = 0
+        low = 0
+        step = 256
+        while step:
+            upper = index + step
+            if upper <= NUM_SYMBOLS and low + tree[upper] <= target:
+                index = upper
+                low += tree[upper]
+            step >>= 1
+        return index, low, self.frequencies[index]
+
+    def update(self, symbol: int):
+        """Count one more occurrence of a symbol.
+
+        Args:
+            symbol (int): The symbol.
+        """
+        self.frequencies[symbol] += FREQUENCY_INCREMENT
+        self.total += FREQUENCY_INCREMENT
+        if self.total > MAX_TOTAL:
+            self.frequencies = [(frequency + 1) >> 1
+                                for frequency in self.frequencies]
+            self._rebuild()
+            return
+
+        tree = self.tree
+        index = symbol + 1
+        while index <= NUM_SYMBOLS:
+            tree[index] += FREQUENCY_INCREMENT
+            index += index & -index
+
+
+class RangeEncoder:
+    """Carry-less range encoder writing to an internal byte buffer."""
+    __slots__ = ('low', 'range', 'output')
+
+    def __init__(self):
+        self.low = 0
+        self.range = RANGE_MASK
+        self.output = bytearray()
+
+    def encode(self, low: int, frequency: int, total: int):
+        """Narrow the range to the interval of a symbol.
+
+        Args:
+            low (int): The cumulative frequency below the symbol.
+            frequency (int): The frequency of the symbol.
+            total (int): The total of all frequencies.
+        """
+        step = self.range // total
+        self.low += step * low
+        self.range = step * frequency
+
+        # Shift out the top byte while it is settled
+        while True:
+            if (self.low ^ (self.low + self.range)) >= RANGE_TOP:
+                if self.range >= RANGE_BOTTOM:
+                    break
+                self.range = -self.low & (RANGE_BOTTOM - 1)
+            self.output.append(self.low >> 24)
+            self.low = (self.low << 8) & RANGE_MASK
+            self.range = (self.range << 8) & RANGE_MASK
+
+    def take(self) -> bytes:
+        """Return and clear the bytes written so far."""
+        data = bytes(self.output)
+        self.output.clear()
+        return data
+
+    def finish(self) -> bytes:
+        """Flush the final state and return the remaining bytes.
+
+        Any value in [low, low + range) identifies the last symbol. The one
+        with the most trailing zero bytes is written without those bytes,
+        since the decoder reads zeros past the end of its input.
+        """
+        for shift in (24, 16, 8, 0):
+            value = -(-self.low >> shift) << shift
+            if value < self.low + self.range:
+                break
+        self.output += value.to_bytes(4, 'big').rstrip(b'\0')
+        return self.take()
+
+
+class RangeDecoder:
+    """Carry-less range decoder reading from an iterator of byte chunks."""
+    __slots__ = ('low', 'range', 'code', 'step', 'data', 'position',
+                 'chunks', 'overrun')
+
+    def __init__(self, chunks: Iterable[bytes]):
+        self.chunks = iter(chunks)
+        self.data = b''
+        self.position = 0
+        self.overrun = 0
+        self.low = 0
+        self.range = RANGE_MASK
+        self.step = 1
+        self.code = 0
+        for _ in range(4):
+            self.code = (self.code << 8) | self._next_byte()
+
+    def _next_byte(self) -> int:
+        # Past the end of the input the coder reads zeros, but no more than
+        # the four bytes the encoder may have left out
+        while self.position >= len(self.data):
+            self.data = next(self.chunks, None)
+            self.position = 0
+            if self.data is None:
+                self.data = b''
+                self.overrun += 1
+                if self.overrun > 4:
+                    raise ValueError("Coded message has no end-of-message "
+                                     "symbol")
+                return 0
+        byte = self.data[self.position]
+        self.position += 1
+        return byte
+
+    def target(self, total: int) -> int:
+        """Return the cumulative frequency of the next symbol.
+
+        Args:
+            total (int): The total of all frequencies.
+
+        Returns:
+            int: A cumulative frequency below total.
+        """
+        self.step = self.range // total
+        return min((self.code - self.low) // self.step, total - 1)
+
+    def decode(self, low: int, frequency: int):
+        """Narrow the range to the interval of the decoded symbol.
+
+        Args:
+            low (int): The cumulative frequency below the symbol.
+            frequency (int): The frequency of the symbol.
+        """
+        self.low += self.step * low
+        self.range = self.step * frequency
+
+        while True:
+            if (self.low ^ (self.low + self.range)) >= RANGE_TOP:
+                if self.range >= RANGE_BOTTOM:
+                    break
+                self.range = -self.low & (RANGE_BOTTOM - 1)
+            self.code = ((self.code << 8) | self._next_byte()) & RANGE_MASK
+            self.low = (self.low << 8) & RANGE_MASK
+            self.range = (self.range << 8) & RANGE_MASK
+
+
+def adaptive_encode_bytes_stream(chunks: Iterable[Union[bytes, memoryview]]
+                                 ) -> Iterator[bytes]:
+    """Compress bytes in chunks with adaptive arithmetic coding.
+
+    Args:
+        chunks (Iterable[Union[bytes, memoryview]]): The bytes in chunks.
+
+    Yields:
+        bytes: The next coded bytes.
+    """
+    model = AdaptiveModel()
+    encoder = RangeEncoder()
+    for chunk in chunks:
+        # bytes() leaves bytes as they are and turns other buffers (e.g.
+        # an mmap, which iterates as 1-byte strings) into byte values
+        for byte in bytes(chunk):
+            low, frequency = model.interval(byte)
+            encoder.encode(low, frequency, model.total)
+            model.update(byte)
+        yield encoder.take()
+
+    low, frequency = model.interval(END_OF_MESSAGE)
+    encoder.encode(low, frequency, model.total)
+    yield encoder.finish()
+
+
+def adaptive_decode_bytes_stream(chunks: Iterable[bytes]) -> Iterator[bytes]:
+    """Decompress coded bytes written by adaptive_encode_bytes_stream.
+
+    Args:
+        chunks (Iterable[bytes]): The coded bytes in chunks.
+
+    Yields:
+        bytes: The next part of the decoded bytes.
+    """
+    model = AdaptiveModel()
+    decoder = RangeDecoder(chunks)
+    decoded = bytearray()
+    while True:
+        symbol, low, frequency = model.find(decoder.target(model.total))
+        decoder.decode(low, frequency)
+        if symbol == END_OF_MESSAGE:
+            break
+        model.update(symbol)
+        decoded.append(symbol)
+        if len(decoded) >= CHUNK_SIZE:
+            yield bytes(decoded)
+            decoded.clear()
+
+    yield bytes(decoded)
+
+
+def adaptive_encode_stream(chunks: Iterable[str]) -> Iterator[bytes]:
+    """Compress a message in chunks with adaptive arithmetic coding.
+
+    Args:
+        chunks (Iterable[str]): The message in chunks.
+
+    Returns:
+        Iterator[bytes]: The coded bytes of its UTF-8 encoding.
+    """
+    return adaptive_encode_bytes_stream(chunk.encode('utf-8')
+                                        for chunk in chunks)
+
+
+def adaptive_decode_stream(chunks: Iterable[bytes]) -> Iterator[str]:
+    """Decompress coded bytes written by adaptive_encode_stream.
+
+    Args:
+        chunks (Iterable[bytes]): The coded bytes in chunks.
+
+    Yields:
+        str: The next part of the message.
+    """
+    text_decoder = codecs.getincrementaldecoder('utf-8')()
+    for decoded in adaptive_decode_bytes_stream(chunks):
+        yield text_decoder.decode(decoded)
+    yield text_decoder.decode(b'', final=True)
+
+
+def adaptive_encode(hidden_message: str) -> bytes:
+    """Compress a message with adaptive arithmetic coding.
+
+    Args:
+        hidden_message (str): The message.
+
+    Returns:
+        bytes: The coded message, ending with an end-of-message symbol.
+    """
+    return adaptive_encode_bytes(hidden_message.encode('utf-8'))
+
+
+def adaptive_decode(data: bytes) -> str:
+    """Decompress a message compressed with adaptive_encode.
+
+    Args:
+        data (bytes): The coded message; bytes after the end-of-message
+            symbol are ignored.
+
+    Returns:
+        str: The message.
+    """
+    return adaptive_decode_bytes(data).decode('utf-8')
+
+
+def adaptive_encode_bytes(payload: Union[bytes, memoryview]) -> bytes:
+    """Compress bytes with adaptive arithmetic coding.
+
+    Args:
+        payload (Union[bytes, memoryview]): The bytes.
+
+    Returns:
+        bytes: The coded bytes, ending with an end-of-message symbol.
+    """
+    return b''.join(adaptive_encode_bytes_stream([payload]))
+
+
+def adaptive_decode_bytes(data: bytes) -> bytes:
+    """Decompress bytes compressed with adaptive_encode_bytes.
+
+    Args:
+        data (bytes): The coded bytes; bytes after the end-of-message
+            symbol are ignored.
+
+    Returns:
+        bytes: The decoded bytes.
+    """
+    return b''.join(adaptive_decode_bytes_stream([data]))
+
+
+def encode_message(cover_text: str, hidden_message: str,
+                   inv_chars: Dict[str, str],
+                   backend: str = 'python',
+                   allow_overflow: bool = False) -> str:
+    """Compress a hidden message adaptively and embed it into cover text
+    using invisible characters. No codebook is embedded.
+
+    Args:
+        cover_text (str): The cover text to embed the hidden message into.
+        hidden_message (str): The message to be hidden.
+        inv_chars (dict): A dictionary mapping bits ('0', '1') to
+            invisible characters.
+        backend (str, optional): The bit conversion backend, 'python',
+            'numpy' or 'auto'. Defaults to 'python'.
+        allow_overflow (bool, optional): Put the invisible characters that
+            do not fit after the last word instead of raising. Defaults to
+            False.
+
+    Returns:
+        str: The resulting stego object containing the hidden message.
+
+    Raises:
+        ValueError: If the message needs more invisible characters than
+            the cover text has words, unless allow_overflow is set.
+    """
+    # Compress the hidden message and convert to invisible characters
+    compressed = adaptive_encode(hidden_message)
+    if not allow_overflow:
+        check_fit(cover_text, symbol_count(len(compressed) * 8,
+                                           symbol_size(inv_chars)))
+    invisible_message = bytes_to_invisible(compressed, inv_chars,
+                                           backend=backend)
+
+    # Splice one invisible character in after every word of the cover text
+    return splice(cover_text, invisible_message)
+
+
+def decode_message(stego_object: str, inv_chars: Dict[str, str],
+                   backend: str = 'python') -> str:
+    """Extract the compressed message from the invisible characters in the
+    stego object and decompress it.
+
+    Args:
+        stego_object (str): The stego object containing the hidden message.
+        inv_chars (dict): A dictionary mapping bits ('0', '1') to invisible
+            characters.
+        backend (str, optional): The bit conversion backend, 'python',
+            'numpy' or 'auto'. Defaults to 'python'.
+
+    Returns:
+        str: The decoded hidden message.
+    """
+    packed, _ = extract_bytes(stego_object, inv_chars, backend)
+    return adaptive_decode(packed)
+
+
+def encode_bytes(cover_text: str, payload: Union[bytes, memoryview],
+                 inv_chars: Dict[str, str],
+                 backend: str = 'python',
+                 allow_overflow: bool = False) -> str:
+    """Compress a binary payload adaptively and embed it into cover text
+    using invisible characters.
+
+    The model codes bytes, so the payload is coded as it is; encode_message
+    codes the UTF-8 bytes of its message the same way.
+
+    Args:
+        cover_text (str): The cover text to embed the payload into.
+        payload (Union[bytes, memoryview]): The bytes to hide.
+        inv_chars (dict): A dictionary mapping bits ('0', '1') to
+            invisible characters.
+        backend (str, optional): The bit conversion backend, 'python',
+            'numpy' or 'auto'. Defaults to 'python'.
+        allow_overflow (bool, optional): See encode_message. Defaults to
+            False.
+
+    Returns:
+        str: The resulting stego object containing the payload.
+
+    Raises:
+        ValueError: If the payload needs more invisible characters than
+            the cover text has words, unless allow_overflow is set.
+    """
+    compressed = adaptive_encode_bytes(payload)
+    if not allow_overflow:
+        check_fit(cover_text, symbol_count(len(compressed) * 8,
+                                           symbol_size(inv_chars)))
+    invisible_payload = bytes_to_invisible(compressed, inv_chars,
+                                           backend=backend)
+    return splice(cover_text, invisible_payload)
+
+
+def decode_bytes(stego_object: str, inv_chars: Dict[str, str],
+                 backend: str = 'python') -> bytes:
+    """Extract and decompress a payload embedded with encode_bytes.
+
+    Args:
+        stego_object (str): The stego object containing the payload.
+        inv_chars (dict): A dictionary mapping bits ('0', '1') to invisible
+            characters.
+        backend (str, optional): The bit conversion backend, 'python',
+            'numpy' or 'auto'. Defaults to 'python'.
+
+    Returns:
+        bytes: The payload.
+    """
+    packed, _ = extract_bytes(stego_object, inv_chars, backend)
+    return adaptive_decode_bytes(packed)
+
+
+def encode_batch(pairs: Iterable[Tuple[str, str]],
+                 inv_chars: Dict[str, str],
+                 backend: str = 'python',
+                 workers: int = 1,
+                 allow_overflow: bool = False) -> Iterator[str]:
+    """Compress and embed many hidden messages into many cover texts.
+
+    Args:
+        pairs (Iterable[Tuple[str, str]]): (cover text, hidden message)
+            pairs.
+        inv_chars (dict): A dictionary mapping bits ('0', '1') to
+            invisible characters.
+        backend (str, optional): The bit conversion backend, 'python',
+            'numpy' or 'auto'. Defaults to 'python'.
+        workers (int, optional): Number of worker processes, see
+            batch.map_batch. Defaults to 1.
+        allow_overflow (bool, optional): See encode_message. Defaults to
+            False.
+
+    Returns:
+        Iterator[str]: The stego objects, in the order of the pairs.
+    """
+    encode = partial(encode_message, inv_chars=inv_chars, backend=backend,
+                     allow_overflow=allow_overflow)
+    return map_batch(encode, pairs, workers)
+
+
+def decode_batch(stego_objects: Iterable[str], inv_chars: Dict[str, str],
+                 backend: str = 'python',
+                 workers: int = 1) -> Iterator[str]:
+    """Extract and decompress the messages of many stego objects.
+
+    Args:
+        stego_objects (Iterable[str]): The stego objects.
+        inv_chars (dict): A dictionary mapping bits ('0', '1') to
+            invisible characters.
+        backend (str, optional): The bit conversion backend, 'python',
+            'numpy' or 'auto'. Defaults to 'python'.
+        workers (int, optional): Number of worker processes, see
+            batch.map_batch. Defaults to 1.
+
+    Returns:
+        Iterator[str]: The decoded messages, in the order of the stego
+        objects.
+    """
+    decode = partial(decode_message, inv_chars=inv_chars, backend=backend)
+    return map_batch(decode, ((stego_object,) for stego_object in
+                              stego_objects), workers)
+
+
+def encode_stream(cover_file: TextIO, message_file: TextIO,
+                  output_file: TextIO, inv_chars: Dict[str, str],
+                  chunk_size: int = CHUNK_SIZE):
+    """Compress and embed a hidden message, reading and writing files in
+    chunks. Unlike the static Huffman strategy the message is read once,
+    so message_file does not have to be seekable.
+
+    The compressed size is only known at the end and the cover text is
+    read as the stego object is written, so there is no capacity check:
+    what does not fit follows the last word, as with allow_overflow.
+
+    Args:
+        cover_file (TextIO): The cover text to embed the hidden message into.
+        message_file (TextIO): The message to be hidden.
+        output_file (TextIO): The file the stego object is written to.
+        inv_chars (dict): A dictionary mapping bits ('0', '1') to
+            invisible characters.
+        chunk_size (int, optional): The number of characters read at once.
+    """
+    coded_chunks = adaptive_encode_stream(iter_chunks(message_file,
+                                                      chunk_size))
+    invisible_chunks = iter_symbols(map(bytes_to_bits, coded_chunks),
+                                    inv_chars)
+    runs = iter_runs(iter_chunks(cover_file, chunk_size))
+    write_pieces(splice_runs(runs, invisible_chunks), output_file)
+
+
+def decode_stream(stego_file: TextIO, output_file: TextIO,
+                  inv_chars: Dict[str, str], chunk_size: int = CHUNK_SIZE):
+    """Extract and decompress a hidden message from a stego object file in
+    chunks.
+
+    Args:
+        stego_file (TextIO): The stego object containing the hidden message.
+        output_file (TextIO): The file the decoded message is written to.
+        inv_chars (dict): A dictionary mapping bits ('0', '1') to invisible
+            characters.
+        chunk_size (int, optional): The number of characters read at once.
+    """
+    invisible_chunks = iter_invisible(iter_chunks(stego_file, chunk_size),
+                                      tuple(inv_chars.values()))
+    buffers = iter_bit_buffers(invisible_chunks, inv_chars)
+    write_pieces(adaptive_decode_stream(data for data, _ in buffers),
+                 output_file)
+
+
+def main():
+    file_path = "./cover_texts/small_covertext.txt"
+    with open(file_path, "r", encoding="utf-8") as file:
+        cover_text = file.read()
+
+    file_path = "./hidden_messages/800bits_message.txt"
+    with open(file_path, "r", encoding="utf-8") as file:
+        hidden_message = file.read()
+
+    seed = 11
+    invisible_chars = dynamic_mapping(seed)
+    stego_object = encode_message(cover_text, hidden_message, invisible_chars,
+                                  allow_overflow=True)
+    decoded_message = decode_message(stego_object, invisible_chars)
+
+    # For debugging purposes
+    print("Hidden message:", hidden_message)
+    print("Cover text:", cover_text)
+    print("Stego object:", stego_object)
+    print("Gedecodeerd bericht:", decoded_message)
+
+    if hidden_message == decoded_message:
+        print("Message successfully hidden and retrieved!")
+    else:
+        print("Error: Message not successfully hidden and retrieved.")
+
+
+if __name__ == "__main__":
+    main()
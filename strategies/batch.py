@@ -0,0 +1,39 @@
+from concurrent.futures import ProcessPoolExecutor
+from itertools import starmap
+from typing import Callable, Iterable, Iterator, Tuple
+
+
+# Number of calls sent to a worker process at a time
+BATCH_CHUNK_SIZE = 64
+
+
+def map_batch(function: Callable, arguments: Iterable[Tuple],
+              workers: int = 1,
+              chunksize: int = BATCH_CHUNK_SIZE) -> Iterator:
+    """Call a function for every tuple of arguments, yielding the results
+    in order.
+
+    Shared by the encode_batch and decode_batch functions of the strategies.
+
+    Args:
+        function (Callable): The function, e.g. encode_message with its
+            mapping bound by functools.partial. With workers it must be
+            picklable.
+        arguments (Iterable[Tuple]): The positional arguments of every call.
+        workers (int, optional): Number of worker processes. Defaults to 1,
+            which runs the calls lazily in this process. None uses one per
+            CPU.
+        chunksize (int, optional): Calls sent to a worker at a time.
+
+    Yields:
+        The result of every call, in the order of arguments.
+    """
+    if workers == 1:
+        yield from starmap(function, arguments)
+        return
+
+    columns = list(zip(*arguments))
+    if not columns:
+        return
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        yield from executor.map(function, *columns, chunksize=chunksize)
@@ -0,0 +1,391 @@
+import re
+from functools import lru_cache
+from typing import Dict, Iterable, List, Tuple
+
+from strategies import numpy_backend
+
+
+# Conversion backends; 'auto' uses NumPy when it is installed
+BACKENDS = ('python', 'numpy', 'auto')
+
+
+def use_numpy(backend: str) -> bool:
+    """Tell whether a backend name resolves to the NumPy backend.
+
+    'numpy' falls back to the pure-Python code when NumPy is missing.
+
+    Args:
+        backend (str): One of BACKENDS.
+
+    Returns:
+        bool: True if the NumPy backend should be used.
+    """
+    if backend not in BACKENDS:
+        raise ValueError(f"Unknown backend: {backend}")
+    return backend != 'python' and numpy_backend.HAVE_NUMPY
+
+
+# Packed bit buffers shared by all strategies. A bit buffer is a bytes
+# object together with the number of valid bits, most significant bit
+# first; the unused bits of the last byte are zero.
+def text_to_bytes(text: str) -> bytes:
+    """Convert a message to one byte per character.
+
+    This matches the 8 bits per character of format(ord(char), '08b').
+
+    Args:
+        text (str): The message, only characters up to U+00FF.
+
+    Returns:
+        bytes: The packed message.
+    """
+    return text.encode('latin-1')
+
+
+def bytes_to_text(data: bytes) -> str:
+    """Convert one byte per character back to a message.
+
+    Args:
+        data (bytes): The packed message.
+
+    Returns:
+        str: The message.
+    """
+    return bytes(data).decode('latin-1')
+
+
+def bits_to_bytes(bits: str) -> Tuple[bytes, int]:
+    """Pack a binary string into a bit buffer.
+
+    Args:
+        bits (str): A string of '0' and '1' characters.
+
+    Returns:
+        Tuple[bytes, int]: The packed bits and the number of bits.
+    """
+    nbits = len(bits)
+    if nbits == 0:
+        return b'', 0
+    padding = -nbits % 8
+    packed = int(bits, 2) << padding
+
+    return packed.to_bytes((nbits + padding) // 8, 'big'), nbits
+
+
+def bytes_to_bits(data: bytes, nbits: int = None) -> str:
+    """Unpack a bit buffer into a binary string.
+
+    Args:
+        data (bytes): The packed bits.
+        nbits (int, optional): The number of valid bits. Defaults to None,
+            in which case all bits of data are used.
+
+    Returns:
+        str: A string of '0' and '1' characters.
+    """
+    if nbits is None:
+        nbits = len(data) * 8
+    if nbits == 0:
+        return ''
+    bits = format(int.from_bytes(data, 'big'), f'0{len(data) * 8}b')
+
+    return bits[:nbits]
+
+
+# Invisible characters available for the mappings. The first two are the
+# classic binary alphabet; U+200D is left out because it separates the
+# message from the Huffman codebook.
+INVISIBLE_CHARACTERS = [
+    '\u200C', '\u200B', '\u200E', '\u200F', '\u2060', '\u2061', '\u2062',
+    '\u2063', '\u2064', '\uFEFF', '\uFE00', '\uFE01', '\uFE02', '\uFE03',
+    '\uFE04', '\uFE05',
+]
+
+# Supported numbers of bits per invisible character
+SYMBOL_SIZES = (1, 2, 3, 4)
+
+
+def symbol_size(inv_chars: Dict[str, str]) -> int:
+    """Return the number of bits carried by each invisible character.
+
+    A mapping has 2**b keys of b bits each, e.g. '0' and '1' for the
+    binary alphabet or '00' up to '11' for two bits per character.
+
+    Args:
+        inv_chars (Dict[str, str]): A dictionary mapping bit groups to
+            invisible characters.
+
+    Returns:
+        int: The number of bits per invisible character.
+    """
+    return len(next(iter(inv_chars)))
+
+
+def symbol_count(nbits: int, bits_per_symbol: int = 1) -> int:
+    """Count the invisible characters of a bit buffer.
+
+    Mappings with several bits per character add the padding of
+    pad_symbols.
+
+    Args:
+        nbits (int): The number of bits.
+        bits_per_symbol (int, optional): The bits per character.
+
+    Returns:
+        int: The number of invisible characters.
+    """
+    if bits_per_symbol == 1:
+        return nbits
+    return -(-(nbits + 1) // bits_per_symbol)
+
+
+def static_mapping(bits_per_symbol: int = 1) -> Dict[str, str]:
+    """Map every group of bits_per_symbol bits to an invisible character.
+
+    Args:
+        bits_per_symbol (int, optional): The bits per invisible character,
+            one of SYMBOL_SIZES. Defaults to 1.
+
+    Returns:
+        Dict[str, str]: A dict mapping bit groups to invisible characters.
+    """
+    if bits_per_symbol not in SYMBOL_SIZES:
+        raise ValueError(f"Unsupported symbol size: {bits_per_symbol}")
+    return {format(value, f'0{bits_per_symbol}b'): char
+            for value, char in enumerate(
+                INVISIBLE_CHARACTERS[:1 << bits_per_symbol])}
+
+
+def pad_symbols(bits: str, bits_per_symbol: int) -> str:
+    """Pad a binary string to whole symbols with a '1' and then zeros.
+
+    Args:
+        bits (str): A string of '0' and '1' characters.
+        bits_per_symbol (int): The bits per invisible character.
+
+    Returns:
+        str: The padded binary string.
+    """
+    return bits + '1' + '0' * (-(len(bits) + 1) % bits_per_symbol)
+
+
+def unpad_symbols(bits: str) -> str:
+    """Remove the padding added by pad_symbols.
+
+    Args:
+        bits (str): The padded binary string.
+
+    Returns:
+        str: The original binary string.
+    """
+    end = bits.rfind('1')
+    return bits[:end] if end >= 0 else ''
+
+
+@lru_cache(maxsize=None)
+def _byte_table(zero: str, one: str) -> List[str]:
+    # Invisible representation of every byte value
+    return [''.join(one if value & (1 << bit) else zero
+                    for bit in range(7, -1, -1))
+            for value in range(256)]
+
+
+@lru_cache(maxsize=None)
+def _bit_table(zero: str, one: str) -> Dict[int, str]:
+    # str.translate table from invisible characters to '0' and '1'
+    return {ord(zero): '0', ord(one): '1'}
+
+
+@lru_cache(maxsize=None)
+def _invisible_table(zero: str, one: str) -> Dict[int, str]:
+    # str.translate table from '0' and '1' to invisible characters
+    return {ord('0'): zero, ord('1'): one}
+
+
+@lru_cache(maxsize=None)
+def _symbol_tables(mapping: Tuple[Tuple[str, str], ...]
+                   ) -> Tuple[Dict[int, str], Dict[int, str]]:
+    # str.translate tables between base 2**b digits and invisible characters.
+    # Base 4 has no format code, so two symbols share one hex digit instead.
+    inv_chars = dict(mapping)
+    size = len(mapping[0][0])
+    to_invisible = {}
+    if size == 2:
+        for value in range(16):
+            bits = format(value, '04b')
+            to_invisible[ord(format(value, 'x'))] = (inv_chars[bits[:2]] +
+                                                     inv_chars[bits[2:]])
+    else:
+        for bits, char in mapping:
+            to_invisible[ord(format(int(bits, 2), 'x'))] = char
+    to_digits = {ord(char): format(int(bits, 2), 'x')
+                 for bits, char in mapping}
+
+    return to_invisible, to_digits
+
+
+def bits_to_invisible(bits: str, inv_chars: Dict[str, str]) -> str:
+    """Convert a binary string directly into invisible characters.
+
+    Args:
+        bits (str): A string of '0' and '1' characters, a whole number of
+            symbols long.
+        inv_chars (Dict[str, str]): A dictionary mapping bit groups to
+            invisible characters.
+
+    Returns:
+        str: One invisible character per symbol.
+    """
+    size = symbol_size(inv_chars)
+    if size == 1:
+        return bits.translate(_invisible_table(inv_chars['0'],
+                                               inv_chars['1']))
+    if not bits:
+        return ''
+
+    to_invisible, _ = _symbol_tables(tuple(sorted(inv_chars.items())))
+    if size == 2:
+        extra = len(bits) % 4
+        digits = format(int(bits + '0' * extra, 2),
+                        f'0{(len(bits) + extra) // 4}x')
+        return digits.translate(to_invisible)[:len(bits) // 2]
+
+    digits = format(int(bits, 2),
+                    f"0{len(bits) // size}{'o' if size == 3 else 'x'}")
+    return digits.translate(to_invisible)
+
+
+def invisible_to_bits(invisible: str, inv_chars: Dict[str, str]) -> str:
+    """Convert a sequence of invisible characters into a binary string.
+
+    Args:
+        invisible (str): The invisible characters, without any other text.
+        inv_chars (Dict[str, str]): A dictionary mapping bit groups to
+            invisible characters.
+
+    Returns:
+        str: A string of '0' and '1' characters.
+    """
+    size = symbol_size(inv_chars)
+    if size == 1:
+        return invisible.translate(_bit_table(inv_chars['0'],
+                                              inv_chars['1']))
+    if not invisible:
+        return ''
+
+    _, to_digits = _symbol_tables(tuple(sorted(inv_chars.items())))
+    value = int(invisible.translate(to_digits), 1 << size)
+    return format(value, f'0{len(invisible) * size}b')
+
+
+def bytes_to_invisible(data: bytes, inv_chars: Dict[str, str],
+                       nbits: int = None, backend: str = 'python') -> str:
+    """Convert a bit buffer directly into invisible characters.
+
+    Mappings with several bits per character pad the bits to whole
+    symbols with pad_symbols, which invisible_to_bytes removes again.
+
+    Args:
+        data (bytes): The packed bits.
+        inv_chars (Dict[str, str]): A dictionary mapping bit groups to
+            invisible characters.
+        nbits (int, optional): The number of valid bits. Defaults to None,
+            in which case all bits of data are used.
+        backend (str, optional): The conversion backend, one of BACKENDS.
+            Defaults to 'python'.
+
+    Returns:
+        str: One invisible character per symbol.
+    """
+    size = symbol_size(inv_chars)
+    if size > 1:
+        return bits_to_invisible(pad_symbols(bytes_to_bits(data, nbits), size),
+                                 inv_chars)
+    if use_numpy(backend):
+        return numpy_backend.bytes_to_invisible(data, inv_chars, nbits)
+
+    table = _byte_table(inv_chars['0'], inv_chars['1'])
+    if nbits is None or nbits == len(data) * 8:
+        return ''.join(map(table.__getitem__, data))
+
+    # Only part of the last byte holds valid bits
+    full, remainder = divmod(nbits, 8)
+    invisible = ''.join(map(table.__getitem__, data[:full]))
+    if remainder:
+        invisible += table[data[full]][:remainder]
+
+    return invisible
+
+
+def invisible_to_bytes(invisible: str, inv_chars: Dict[str, str],
+                       backend: str = 'python') -> Tuple[bytes, int]:
+    """Convert a sequence of invisible characters into a bit buffer.
+
+    Args:
+        invisible (str): The invisible characters, without any other text.
+        inv_chars (Dict[str, str]): A dictionary mapping bit groups to
+            invisible characters.
+        backend (str, optional): The conversion backend, one of BACKENDS.
+            Defaults to 'python'.
+
+    Returns:
+        Tuple[bytes, int]: The packed bits and the number of bits.
+    """
+    if symbol_size(inv_chars) > 1:
+        return bits_to_bytes(unpad_symbols(invisible_to_bits(invisible,
+                                                             inv_chars)))
+    if use_numpy(backend):
+        return numpy_backend.invisible_to_bytes(invisible, inv_chars)
+
+    return bits_to_bytes(invisible_to_bits(invisible, inv_chars))
+
+
+@lru_cache(maxsize=None)
+def visible_pattern(chars: Tuple[str, ...]) -> 're.Pattern':
+    """Compile a pattern matching every run of characters not in chars.
+
+    Args:
+        chars (Tuple[str, ...]): The invisible characters to keep.
+
+    Returns:
+        re.Pattern: The compiled pattern.
+    """
+    return re.compile('[^' + re.escape(''.join(chars)) + ']+')
+
+
+def extract_invisible(text: str, chars: Iterable[str]) -> str:
+    """Strip everything but the given invisible characters from a text.
+
+    The visible text is removed by one precompiled regular expression
+    instead of testing every character in Python.
+
+    Args:
+        text (str): The text holding the invisible characters.
+        chars (Iterable[str]): The characters to keep.
+
+    Returns:
+        str: The invisible characters in order.
+    """
+    return visible_pattern(tuple(chars)).sub('', text)
+
+
+def extract_bytes(text: str, inv_chars: Dict[str, str],
+                  backend: str = 'python') -> Tuple[bytes, int]:
+    """Collect the invisible characters of a text into a bit buffer.
+
+    Args:
+        text (str): The text holding the invisible characters.
+        inv_chars (Dict[str, str]): A dictionary mapping bit groups to
+            invisible characters.
+        backend (str, optional): The conversion backend, one of BACKENDS.
+            Defaults to 'python'.
+
+    Returns:
+        Tuple[bytes, int]: The packed bits and the number of bits.
+    """
+    if use_numpy(backend) and symbol_size(inv_chars) == 1:
+        # The NumPy backend masks out all other characters itself
+        return numpy_backend.invisible_to_bytes(text, inv_chars)
+
+    return invisible_to_bytes(extract_invisible(text, inv_chars.values()),
+                              inv_chars)
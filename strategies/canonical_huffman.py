@@ -0,0 +1,607 @@
+import json
+import math
+import zlib
+from collections import Counter, OrderedDict, deque
+from functools import lru_cache
+from typing import Callable, Dict, Iterable, Iterator, List, Tuple
+
+from strategies.bit_buffer import bytes_to_text, text_to_bytes
+
+
+# Huffman tree construction, canonical Huffman codes and a table-driven
+# decoder shared by the huffman_encoding and hamming_code strategies.
+def canonical_codebook(codebook: Dict[str, str]) -> Dict[str, str]:
+    """Reassign the codes of a codebook in canonical order.
+
+    Only the code lengths of the original codebook are kept, so the
+    compression is unchanged. Symbols are sorted by code length and then
+    by symbol, and each gets the next binary number of its length.
+
+    Args:
+        codebook (Dict[str, str]): A prefix-free codebook.
+
+    Returns:
+        Dict[str, str]: The canonical codebook.
+    """
+    # A message with a single distinct symbol still needs one bit per symbol
+    lengths = {char: max(1, len(code)) for char, code in codebook.items()}
+    return canonical_codes(lengths)
+
+
+def canonical_codes(lengths: Dict[str, int]) -> Dict[str, str]:
+    """Generate canonical Huffman codes from code lengths.
+
+    Args:
+        lengths (Dict[str, int]): The code length of every symbol.
+
+    Returns:
+        Dict[str, str]: The canonical codebook.
+    """
+    codebook = {}
+    code = 0
+    previous_length = 0
+    for char, length in sorted(lengths.items(),
+                               key=lambda item: (item[1], item[0])):
+        code <<= length - previous_length
+        codebook[char] = format(code, f'0{length}b')
+        code += 1
+        previous_length = length
+
+    return codebook
+
+
+# First byte of a compact codebook header; JSON codebooks start with '{'
+CODEBOOK_HEADER_VERSION = 1
+
+
+def _write_varint(value: int, out: bytearray):
+    # Seven bits per byte, the high bit marks that more bytes follow
+    while value > 0x7F:
+        out.append((value & 0x7F) | 0x80)
+        value >>= 7
+    out.append(value)
+
+
+def _read_varint(data: bytes, position: int) -> Tuple[int, int]:
+    value = 0
+    shift = 0
+    while True:
+        byte = data[position]
+        position += 1
+        value |= (byte & 0x7F) << shift
+        shift += 7
+        if byte < 0x80:
+            return value, position
+
+
+def pack_codebook(codebook: Dict[str, str]) -> bytes:
+    """Serialize a canonical codebook into a compact binary header.
+
+    Only the code lengths are stored: a version byte, the longest code
+    length, the number of codes of every length and the symbols in
+    canonical order as UTF-8, followed by a CRC32 of the header.
+
+    Args:
+        codebook (Dict[str, str]): A canonical codebook.
+
+    Returns:
+        bytes: The header.
+    """
+    symbols = sorted(codebook, key=lambda char: (len(codebook[char]), char))
+    max_length = max(map(len, codebook.values()), default=0)
+    counts = [0] * (max_length + 1)
+    for code in codebook.values():
+        counts[len(code)] += 1
+
+    header = bytearray([CODEBOOK_HEADER_VERSION])
+    _write_varint(max_length, header)
+    for count in counts[1:]:
+        _write_varint(count, header)
+    header += ''.join(symbols).encode('utf-8')
+    header += zlib.crc32(header).to_bytes(4, 'big')
+
+    return bytes(header)
+
+
+def unpack_codebook(header: bytes) -> Dict[str, str]:
+    """Rebuild a canonical codebook from a compact binary header.
+
+    Args:
+        header (bytes): The header written by pack_codebook.
+
+    Returns:
+        Dict[str, str]: The canonical codebook.
+
+    Raises:
+        ValueError: If the header is damaged or of an unknown version.
+    """
+    header = bytes(header)
+    if len(header) < 6 or header[0] != CODEBOOK_HEADER_VERSION:
+        raise ValueError("Unknown codebook header")
+    if zlib.crc32(header[:-4]) != int.from_bytes(header[-4:], 'big'):
+        raise ValueError("Codebook header checksum mismatch")
+
+    max_length, position = _read_varint(header, 1)
+    lengths = []
+    for length in range(1, max_length + 1):
+        count, position = _read_varint(header, position)
+        lengths.extend([length] * count)
+    symbols = header[position:-4].decode('utf-8')
+    if len(symbols) != len(lengths):
+        raise ValueError("Codebook header symbol count mismatch")
+
+    return canonical_codes(dict(zip(symbols, lengths)))
+
+
+# Largest lookup table built for the decoder, in entries
+MAX_TABLE_SIZE = 1 << 20
+
+
+@lru_cache(maxsize=32)
+def _decode_tables(codes: Tuple[Tuple[str, str], ...], max_stride: int = 8
+                   ) -> Tuple[List[Tuple[str, int]], int,
+                              List[Tuple[str, int]]]:
+    """Build the lookup tables for a codebook.
+
+    The decoder state is the node of the code tree reached so far, i.e.
+    the bits of an unfinished code. The table for a state and the next
+    stride bits holds every symbol completed by those bits together with
+    the new state. Wider tables are composed from two narrower ones, so
+    building costs a few hundred steps per state.
+
+    Returns:
+        Tuple[list, int, list]: The table for the widest stride, that
+        stride and the one-bit table. Next states are stored multiplied by
+        the table size, ready to be combined with the next bits.
+    """
+    reverse_codebook = {code: char for char, code in codes}
+    prefixes = sorted({code[:i] for _, code in codes
+                       for i in range(len(code))},
+                      key=lambda prefix: (len(prefix), prefix))
+    index = {prefix: i for i, prefix in enumerate(prefixes)}
+
+    # One bit at a time; invalid bits restart at the root
+    tables = {1: []}
+    for prefix in prefixes:
+        for bit in '01':
+            code = prefix + bit
+            if code in reverse_codebook:
+                tables[1].append((reverse_codebook[code], 0))
+            else:
+                tables[1].append(('', index.get(code, 0)))
+
+    # Double the stride while the table stays small enough
+    stride = 1
+    while (stride < max_stride
+           and len(prefixes) << (2 * stride) <= MAX_TABLE_SIZE):
+        narrow = tables[stride]
+        wide = []
+        for state in range(len(prefixes)):
+            for high in range(1 << stride):
+                chars, middle = narrow[(state << stride) | high]
+                for low in range(1 << stride):
+                    more, end = narrow[(middle << stride) | low]
+                    wide.append((chars + more, end))
+        stride *= 2
+        tables[stride] = wide
+
+    return ([(chars, state << stride) for chars, state in tables[stride]],
+            stride, tables[1])
+
+
+def huffman_decode(data: bytes, nbits: int, codebook: Dict[str, str]) -> str:
+    """Decode a Huffman-encoded bit buffer with lookup tables.
+
+    Whole bytes (or halves of them for very large alphabets) are decoded
+    per lookup, instead of extending a buffer one bit at a time.
+
+    Args:
+        data (bytes): The packed Huffman-encoded bits.
+        nbits (int): The number of valid bits in data.
+        codebook (Dict[str, str]): The Huffman codebook.
+
+    Returns:
+        str: The decoded hidden message.
+    """
+    # Short messages do not pay back the cost of building wide tables
+    max_stride = 8
+    while max_stride > 1 and len(codebook) << max_stride > nbits:
+        max_stride //= 2
+
+    return ''.join(huffman_decode_stream([(data, nbits)], codebook,
+                                         max_stride))
+
+
+def huffman_decode_stream(buffers: Iterable[Tuple[bytes, int]],
+                          codebook: Dict[str, str],
+                          max_stride: int = 8) -> Iterator[str]:
+    """Decode a stream of Huffman-encoded bit buffers.
+
+    The decoder state is carried from one buffer to the next, so codes may
+    be split across buffers.
+
+    Args:
+        buffers (Iterable[Tuple[bytes, int]]): The packed bits in chunks.
+        codebook (Dict[str, str]): The Huffman codebook.
+        max_stride (int, optional): The most bits decoded per lookup, 1, 2,
+            4 or 8. Defaults to 8.
+
+    Yields:
+        str: The decoded text of the next buffer.
+    """
+    table, stride, bit_table = _decode_tables(tuple(sorted(codebook.items())),
+                                              max_stride)
+    mask = (1 << stride) - 1
+    shifts = range(8 - stride, -1, -stride)
+
+    state = 0
+    for data, nbits in buffers:
+        full_bytes = nbits >> 3
+        decoded = []
+        append = decoded.append
+        state <<= stride
+        if stride == 8:
+            for byte in data[:full_bytes]:
+                chars, state = table[state | byte]
+                append(chars)
+        else:
+            for byte in data[:full_bytes]:
+                for shift in shifts:
+                    chars, state = table[state | ((byte >> shift) & mask)]
+                    append(chars)
+        state >>= stride
+
+        # The bits of a partial last byte are decoded one at a time
+        for position in range(full_bytes * 8, nbits):
+            bit = (data[position >> 3] >> (7 - (position & 7))) & 1
+            chars, state = bit_table[(state << 1) | bit]
+            append(chars)
+
+        yield ''.join(decoded)
+
+
+def dump_codebook(codebook: Dict[str, str], compact: bool = False) -> bytes:
+    """Serialize a codebook for embedding.
+
+    Args:
+        codebook (Dict[str, str]): The Huffman codebook.
+        compact (bool, optional): Write a compact canonical header instead
+            of JSON. Defaults to False.
+
+    Returns:
+        bytes: The serialized codebook.
+    """
+    if compact:
+        return pack_codebook(codebook)
+    return text_to_bytes(json.dumps(codebook))
+
+
+def load_codebook(data: bytes) -> Dict[str, str]:
+    """Deserialize an embedded codebook, JSON or compact header.
+
+    Args:
+        data (bytes): The serialized codebook.
+
+    Returns:
+        Dict[str, str]: The Huffman codebook.
+    """
+    if data[:1] == b'{':
+        return json.loads(bytes_to_text(data))
+    return unpack_codebook(data)
+
+
+def save_codebook(codebook: Dict[str, str], path: str, compact: bool = False):
+    """Write a shared codebook to a file, e.g. one made by train_codebook.
+
+    Args:
+        codebook (Dict[str, str]): The Huffman codebook.
+        path (str): The file to write.
+        compact (bool, optional): Write a compact canonical header instead
+            of JSON. Only for canonical codebooks. Defaults to False.
+    """
+    with open(path, "wb") as file:
+        file.write(dump_codebook(codebook, compact))
+
+
+def read_codebook(path: str) -> Dict[str, str]:
+    """Read a shared codebook written by save_codebook.
+
+    Args:
+        path (str): The file to read.
+
+    Returns:
+        Dict[str, str]: The Huffman codebook.
+    """
+    with open(path, "rb") as file:
+        return load_codebook(file.read())
+
+
+# Default number of codebooks kept by a CodebookCache
+CODEBOOK_CACHE_SIZE = 256
+
+# Steps per bit of the character information in a frequency fingerprint
+FINGERPRINT_RESOLUTION = 2
+
+
+def frequency_fingerprint(frequencies: Dict[str, int],
+                          resolution: int = FINGERPRINT_RESOLUTION
+                          ) -> Tuple[Tuple[str, int], ...]:
+    """Describe a frequency profile independently of character order and
+    message length.
+
+    Every character is keyed by its information content -log2(p), rounded
+    to 1 / resolution bits. Huffman code lengths follow -log2(p), so
+    messages with the same characters in similar proportions (e.g. from
+    one language or template) get the same fingerprint and can share a
+    codebook, which costs them at most a fraction of a bit per character.
+
+    Args:
+        frequencies (Dict[str, int]): The count of every character.
+        resolution (int, optional): Steps per bit of the rounding. Defaults
+            to FINGERPRINT_RESOLUTION.
+
+    Returns:
+        Tuple[Tuple[str, int], ...]: The sorted (character, step) pairs.
+    """
+    total = sum(frequencies.values())
+    return tuple(sorted((char, round(-math.log2(count / total) * resolution))
+                        for char, count in frequencies.items() if count))
+
+
+class CodebookCache:
+    """Least recently used cache of codebooks keyed by frequency profile.
+
+    Messages with the same frequency_fingerprint share the codebook of the
+    first one; the fingerprint contains every character, so the codebook
+    always covers the message.
+    """
+
+    def __init__(self, maxsize: int = CODEBOOK_CACHE_SIZE):
+        self.maxsize = maxsize
+        self.codebooks = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def __len__(self):
+        return len(self.codebooks)
+
+    def clear(self):
+        """Remove all codebooks and reset the statistics."""
+        self.codebooks.clear()
+        self.hits = 0
+        self.misses = 0
+
+    def codebook(self, frequencies: Dict[str, int],
+                 build: Callable[[Dict[str, int]], Dict[str, str]]
+                 ) -> Dict[str, str]:
+        """Return the codebook of a frequency profile, building it once.
+
+        Args:
+            frequencies (Dict[str, int]): The count of every character.
+            build (Callable): Builds the codebook from the frequencies when
+                it is not cached.
+
+        Returns:
+            Dict[str, str]: The codebook.
+        """
+        key = frequency_fingerprint(frequencies)
+        codebook = self.codebooks.get(key)
+        if codebook is not None:
+            self.hits += 1
+            self.codebooks.move_to_end(key)
+            return codebook
+
+        self.misses += 1
+        codebook = build(frequencies)
+        self.codebooks[key] = codebook
+        if len(self.codebooks) > self.maxsize:
+            self.codebooks.popitem(last=False)
+
+        return codebook
+
+
+# Huffman tree construction
+class HuffmanNode:
+    __slots__ = ('char', 'freq', 'left', 'right')
+
+    def __init__(self, char: str, freq: int):
+        self.char = char
+        self.freq = freq
+        self.left = None
+        self.right = None
+
+    def __lt__(self, other):
+        return self.freq < other.freq
+
+
+def build_huffman_tree(hidden_message: str) -> HuffmanNode:
+    """Builds a Huffman tree for the given hidden message.
+
+    The leaves are sorted by frequency and character, after which the
+    tree is built in linear time with two queues: one of leaves and one of
+    merged nodes, whose frequencies never decrease. On equal frequencies
+    a leaf goes first, so the tree only depends on the frequencies.
+
+    Args:
+        text (str): The message for which the Huffman tree will be built,
+            or a Counter of its characters.
+
+    Returns:
+        HuffmanNode: The root node of the constructed Huffman tree.
+    """
+    freq = Counter(hidden_message)
+    ordered = sorted(freq.items(), key=lambda item: (item[1], item[0]))
+    leaves = deque(HuffmanNode(char, count) for char, count in ordered)
+    merged_nodes = deque()
+
+    def pop_smallest() -> HuffmanNode:
+        if not merged_nodes or (leaves and
+                                leaves[0].freq <= merged_nodes[0].freq):
+            return leaves.popleft()
+        return merged_nodes.popleft()
+
+    while len(leaves) + len(merged_nodes) > 1:
+        left = pop_smallest()
+        right = pop_smallest()
+        merged = HuffmanNode(None, left.freq + right.freq)
+        merged.left = left
+        merged.right = right
+        merged_nodes.append(merged)
+
+    if not leaves and not merged_nodes:
+        return None
+    return (leaves or merged_nodes)[0]
+
+
+def generate_huffman_codes(node: HuffmanNode, prefix: str = "",
+                           codebook: Dict[str, str] = None) -> Dict[str, str]:
+    """Generates Huffman codes for characters based on a Huffman tree.
+
+    The tree is walked with an explicit stack, so deep trees do not hit
+    the recursion limit.
+
+    Args:
+        node (HuffmanNode): The root node of the Huffman tree
+        prefix (str, optional): The current prefix of the binary code
+            during traversal. Defaults to an empty string.
+        codebook (dict, optional): A dictionary to store the generated
+            codes. Defaults to None, in which case a new dictionary is created.
+
+    Returns:
+        dict: A dictionary containing characters as keys and
+        their corresponding Huffman codes as values.
+    """
+    if codebook is None:
+        codebook = {}
+    stack = [(node, prefix)] if node is not None else []
+    while stack:
+        node, prefix = stack.pop()
+        if node.char is not None:
+            codebook[node.char] = prefix
+        else:
+            stack.append((node.right, prefix + "1"))
+            stack.append((node.left, prefix + "0"))
+
+    return codebook
+
+
+def build_codebook(hidden_message: str) -> Dict[str, str]:
+    """Builds the canonical Huffman codebook of a message.
+
+    Args:
+        hidden_message (str): The message, or a Counter of its characters.
+
+    Returns:
+        dict: The canonical codebook.
+    """
+    tree = build_huffman_tree(hidden_message)
+    return canonical_codebook(generate_huffman_codes(tree))
+
+
+# Characters whose codes are packed at once; the bits of a whole message
+# never exist as one '0'/'1' string
+ENCODE_CHUNK_SIZE = 4096
+
+
+def huffman_encode_stream(chunks: Iterable[str], codebook: Dict[str, str]
+                          ) -> Iterator[Tuple[bytes, int]]:
+    """Huffman encode a message in chunks into packed bit buffers.
+
+    The codes of every ENCODE_CHUNK_SIZE characters are shifted into an
+    int in one go. Bits that do not fill a whole byte are carried over to
+    the next buffer, so only the last buffer can end in a partial byte.
+
+    Args:
+        chunks (Iterable[str]): The message in chunks.
+        codebook (Dict[str, str]): The Huffman codebook.
+
+    Yields:
+        Tuple[bytes, int]: The packed bits and the number of bits.
+    """
+    code = codebook.__getitem__
+    value = 0
+    nbits = 0
+    for chunk in chunks:
+        for start in range(0, len(chunk), ENCODE_CHUNK_SIZE):
+            bits = ''.join(map(code, chunk[start:start + ENCODE_CHUNK_SIZE]))
+            value = (value << len(bits)) | int(bits, 2)
+            full, nbits = (nbits + len(bits)) >> 3, (nbits + len(bits)) & 7
+            yield (value >> nbits).to_bytes(full, 'big'), full * 8
+            value &= (1 << nbits) - 1
+
+    if nbits:
+        yield (value << (8 - nbits)).to_bytes(1, 'big'), nbits
+
+
+def message_codebook(frequencies: Dict[str, int],
+                     codebook: Dict[str, str] = None,
+                     cache: CodebookCache = None) -> Dict[str, str]:
+    """Choose the codebook a message is encoded with.
+
+    Args:
+        frequencies (Dict[str, int]): The count of every character of the
+            message.
+        codebook (dict, optional): A shared codebook, see huffman_encode.
+            Defaults to None.
+        cache (CodebookCache, optional): A cache of codebooks, see
+            huffman_encode. Defaults to None.
+
+    Returns:
+        dict: The shared codebook, the cached codebook of the frequency
+        profile or a new codebook.
+
+    Raises:
+        ValueError: If the shared codebook lacks characters of the message.
+    """
+    if codebook is not None:
+        missing = set(frequencies).difference(codebook)
+        if missing:
+            raise ValueError("Characters not in the codebook: "
+                             f"{''.join(sorted(missing))!r}")
+        return codebook
+    if cache is not None:
+        return cache.codebook(frequencies, build_codebook)
+    return build_codebook(frequencies)
+
+
+def huffman_size(frequencies: Dict[str, int],
+                 codebook: Dict[str, str]) -> int:
+    """Work out the Huffman-encoded size of a message from its character
+    counts, without encoding it.
+
+    Args:
+        frequencies (Dict[str, int]): The count of every character.
+        codebook (Dict[str, str]): The codebook, see message_codebook.
+
+    Returns:
+        int: The number of encoded bits.
+    """
+    return sum(count * len(codebook[char])
+               for char, count in frequencies.items())
+
+
+def huffman_encode(hidden_message: str, codebook: Dict[str, str] = None,
+                   cache: CodebookCache = None
+                   ) -> Tuple[bytes, int, Dict[str, str]]:
+    """Encodes a hidden message using Huffman coding.
+
+    Args:
+        hidden_message (str): The hidden message to be encoded
+        codebook (dict, optional): A shared codebook to encode with, e.g.
+            one read with read_codebook. Defaults to None, in which case a
+            codebook is built for the message.
+        cache (CodebookCache, optional): A cache of codebooks to look the
+            message's frequency profile up in. Defaults to None.
+
+    Returns:
+        Tuple[bytes, int, dict]: The packed encoded bits, their number and
+        the corresponding canonical codebook.
+
+    Raises:
+        ValueError: If the shared codebook lacks characters of the message.
+    """
+    codebook = message_codebook(Counter(hidden_message), codebook, cache)
+    buffers = list(huffman_encode_stream([hidden_message], codebook))
+    nbits = sum(buffer_bits for _, buffer_bits in buffers)
+
+    return b''.join(data for data, _ in buffers), nbits, codebook
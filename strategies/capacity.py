@@ -0,0 +1,250 @@
+from collections import Counter
+from typing import Iterable, List, NamedTuple, Tuple
+
+from strategies.bit_buffer import SYMBOL_SIZES, symbol_count
+from strategies.canonical_huffman import (build_codebook, dump_codebook,
+                                          huffman_size)
+from strategies.hamming_code import hamming_size
+from strategies.placement import check_fit
+from strategies.reed_solomon import DEFAULT_PARITY, rs_size
+
+
+# Capacity planning: the exact number of invisible characters a strategy
+# embeds, worked out from the message without encoding it. Every word of
+# the cover text is followed by one invisible character; what does not fit
+# follows the last word as one long run, which the planner reports as
+# overflow.
+
+# Strategies the planner knows, in order of preference
+STRATEGIES = ('basic_approach', 'dynamic_mapping', 'huffman_encoding',
+              'hamming_code')
+
+# Compression and error correction stages of every strategy; pipeline specs
+# such as 'huffman+reed_solomon' name them directly
+STRATEGY_STAGES = {
+    'basic_approach': ('none', 'none'),
+    'dynamic_mapping': ('none', 'none'),
+    'huffman_encoding': ('huffman', 'none'),
+    'hamming_code': ('huffman', 'hamming'),
+}
+
+# Stages whose output size is known without encoding
+PLANNED_COMPRESSION = ('none', 'huffman')
+PLANNED_ERROR_CORRECTION = ('none', 'hamming', 'reed_solomon')
+
+
+class CapacityPlan(NamedTuple):
+    """The embedded size of a message with one strategy and radix."""
+    strategy: str
+    bits_per_symbol: int
+    message_bits: int
+    header_bits: int
+    message_symbols: int
+    header_symbols: int
+    slots: int
+
+    @property
+    def overflow(self) -> int:
+        """Invisible characters of the message that do not fit the words."""
+        return max(0, self.message_symbols - self.slots)
+
+    @property
+    def fits(self) -> bool:
+        """Whether every message character follows a word of the cover."""
+        return self.message_symbols <= self.slots
+
+    @property
+    def total_symbols(self) -> int:
+        """All invisible characters, including separator and header."""
+        return self.message_symbols + self.header_symbols
+
+
+def cover_capacity(cover_text: str) -> int:
+    """Count the invisible characters a cover text can hold between words.
+
+    Args:
+        cover_text (str): The cover text.
+
+    Returns:
+        int: The number of words.
+    """
+    return len(cover_text.split())
+
+
+def huffman_sizes(hidden_message: str,
+                  compact_header: bool = False) -> Tuple[int, int]:
+    """Work out the Huffman-encoded size of a message and its codebook.
+
+    Only the code lengths are needed, so this costs one count of the
+    characters and a tree over the distinct characters.
+
+    Args:
+        hidden_message (str): The message.
+        compact_header (bool, optional): Size the compact header instead
+            of the JSON codebook. Defaults to False.
+
+    Returns:
+        Tuple[int, int]: The bits of the encoded message and the bits of
+        the serialized codebook.
+    """
+    frequencies = Counter(hidden_message)
+    codebook = build_codebook(frequencies)
+    message_bits = huffman_size(frequencies, codebook)
+    header_bits = len(dump_codebook(codebook, compact_header)) * 8
+
+    return message_bits, header_bits
+
+
+def strategy_stages(strategy: str) -> Tuple[str, str]:
+    """Look up the compression and error correction stage of a strategy.
+
+    Args:
+        strategy (str): One of STRATEGIES, or a pipeline spec starting with
+            a compression and an error correction stage the planner can
+            size, e.g. 'huffman+reed_solomon+dynamic'.
+
+    Returns:
+        Tuple[str, str]: The compression and error correction stage names.
+
+    Raises:
+        ValueError: If the strategy or one of its stages is unknown to the
+            planner.
+    """
+    if strategy in STRATEGY_STAGES:
+        return STRATEGY_STAGES[strategy]
+
+    names = strategy.split('+')
+    compression = names[0]
+    error_correction = names[1] if len(names) > 1 else 'none'
+    if compression not in PLANNED_COMPRESSION or \
+            error_correction not in PLANNED_ERROR_CORRECTION:
+        raise ValueError(f"Unknown strategy: {strategy}")
+    return compression, error_correction
+
+
+def error_correction_size(nbits: int, error_correction: str,
+                          block_code: Tuple[int, int] = None,
+                          parity: int = DEFAULT_PARITY) -> int:
+    """Work out the size of a bit buffer after an error correction stage.
+
+    Args:
+        nbits (int): The number of bits to protect.
+        error_correction (str): One of PLANNED_ERROR_CORRECTION.
+        block_code (Tuple[int, int], optional): The Hamming block code, see
+            hamming_size.
+        parity (int, optional): Parity bytes per Reed-Solomon codeword.
+            Defaults to reed_solomon.DEFAULT_PARITY.
+
+    Returns:
+        int: The number of encoded bits.
+    """
+    if error_correction == 'hamming':
+        return hamming_size(nbits, block_code)
+    if error_correction == 'reed_solomon':
+        return rs_size(nbits, parity)
+    return nbits
+
+
+def plan_capacity(cover_text: str, hidden_message: str, strategy: str,
+                  bits_per_symbol: int = 1, block_code: Tuple[int, int] = None,
+                  compact_header: bool = False,
+                  parity: int = DEFAULT_PARITY) -> CapacityPlan:
+    """Work out how a message would be embedded, without encoding it.
+
+    Args:
+        cover_text (str): The cover text.
+        hidden_message (str): The message to be hidden.
+        strategy (str): One of STRATEGIES or a pipeline spec, see
+            strategy_stages.
+        bits_per_symbol (int, optional): The bits per invisible character.
+        block_code (Tuple[int, int], optional): The Hamming block code of
+            the hamming_code strategy. Defaults to None (single codeword).
+        compact_header (bool, optional): Whether the Huffman codebook is
+            embedded as compact header. Defaults to False.
+        parity (int, optional): Parity bytes per Reed-Solomon codeword.
+            Defaults to reed_solomon.DEFAULT_PARITY.
+
+    Returns:
+        CapacityPlan: The sizes of the embedded message and header.
+    """
+    compression, error_correction = strategy_stages(strategy)
+    if bits_per_symbol not in SYMBOL_SIZES:
+        raise ValueError(f"Unsupported symbol size: {bits_per_symbol}")
+
+    header_bits = 0
+    header_symbols = 0
+    if compression == 'none':
+        message_bits = len(hidden_message) * 8
+    else:
+        message_bits, header_bits = huffman_sizes(hidden_message,
+                                                  compact_header)
+        # The separator and the codebook
+        header_symbols = 1 + symbol_count(header_bits, bits_per_symbol)
+    message_bits = error_correction_size(message_bits, error_correction,
+                                         block_code, parity)
+
+    return CapacityPlan(strategy, bits_per_symbol, message_bits, header_bits,
+                        symbol_count(message_bits, bits_per_symbol),
+                        header_symbols, cover_capacity(cover_text))
+
+
+def check_capacity(cover_text: str, hidden_message: str, strategy: str,
+                   **options) -> CapacityPlan:
+    """Plan an encoding and reject it if the message overflows the cover.
+
+    Args:
+        cover_text (str): The cover text.
+        hidden_message (str): The message to be hidden.
+        strategy (str): One of STRATEGIES or a pipeline spec, see
+            strategy_stages.
+        **options: bits_per_symbol, block_code, compact_header or parity,
+            see plan_capacity.
+
+    Returns:
+        CapacityPlan: The plan, if the message fits.
+
+    Raises:
+        ValueError: If the message needs more invisible characters than
+            the cover text has words.
+    """
+    plan = plan_capacity(cover_text, hidden_message, strategy, **options)
+    check_fit(cover_text, plan.message_symbols,
+              f"{strategy}, {plan.bits_per_symbol} bits per character")
+    return plan
+
+
+def select_plan(cover_text: str, hidden_message: str,
+                strategies: Iterable[str] = STRATEGIES,
+                symbol_sizes: Iterable[int] = SYMBOL_SIZES,
+                **options) -> CapacityPlan:
+    """Pick the strategy and radix that embed a message in the fewest
+    invisible characters while still fitting the cover text.
+
+    Args:
+        cover_text (str): The cover text.
+        hidden_message (str): The message to be hidden.
+        strategies (Iterable[str], optional): The strategies (or pipeline
+            specs) to consider. Defaults to all of STRATEGIES.
+        symbol_sizes (Iterable[int], optional): The bits per invisible
+            character to consider. Defaults to SYMBOL_SIZES.
+        **options: block_code, compact_header or parity, see
+            plan_capacity.
+
+    Returns:
+        CapacityPlan: The chosen plan.
+
+    Raises:
+        ValueError: If the message fits none of the combinations.
+    """
+    plans: List[CapacityPlan] = []
+    for strategy in strategies:
+        for bits_per_symbol in symbol_sizes:
+            plan = plan_capacity(cover_text, hidden_message, strategy,
+                                 bits_per_symbol, **options)
+            if plan.fits:
+                plans.append(plan)
+
+    if not plans:
+        raise ValueError("The message does not fit the cover text with any "
+                         "strategy or symbol size")
+    return min(plans, key=lambda plan: plan.total_symbols)
@@ -1,86 +1,136 @@
-from typing import Dict
+from functools import lru_cache
+from typing import Dict, Tuple, Union
+import hashlib
+import hmac
 import random
 
+from strategies.bit_buffer import static_mapping
+from strategies.embedding import (decode_batch, decode_bytes,
+                                  decode_message, decode_stream,
+                                  encode_batch, encode_bytes, encode_message,
+                                  encode_stream)
+
+
+# Number of seeded permutations kept in memory. Rotating keys give every
+# message or block its own seed, so the cache is bounded
+MAPPING_CACHE_SIZE = 4096
+
+
+@lru_cache(maxsize=MAPPING_CACHE_SIZE)
+def _permutation(seed: Union[int, str, bytes],
+                 bits_per_symbol: int) -> Tuple[Tuple[str, str], ...]:
+    # A private generator leaves the state of the global random module
+    # alone, and shuffles exactly like random.seed(seed) + random.shuffle
+    mapping = static_mapping(bits_per_symbol)
+    invisible_characters = list(mapping.values())
+    random.Random(seed).shuffle(invisible_characters)
+
+    return tuple(zip(mapping, invisible_characters))
+
 
 # For better security
-def dynamic_mapping(seed: int) -> Dict[str, str]:
+def dynamic_mapping(seed: int, bits_per_symbol: int = 1) -> Dict[str, str]:
     """Generate a dynamic mapping for invisible characters based on a seed.
 
+    The permutation is computed once per seed; every call returns a new
+    dict, so callers may change it, and the function is safe to call from
+    many threads at once.
+
     Args:
         seed (int): The seed for the random number generator.
+        bits_per_symbol (int, optional): The number of bits carried by each
+            invisible character (1 to 4). The seeded permutation covers all
+            2**bits_per_symbol characters. Defaults to 1.
 
     Returns:
-        Dict[str, str]: A dict mapping '0' and '1' to invisible characters.
+        Dict[str, str]: A dict mapping bit groups ('0' and '1' by default)
+        to invisible characters.
     """
-    random.seed(seed)
-    invisible_characters = ['\u200C', '\u200B']
-    random.shuffle(invisible_characters)
+    if seed is None:
+        raise ValueError("The dynamic mapping requires a seed")
+    return dict(_permutation(seed, bits_per_symbol))
 
-    return {'0': invisible_characters[0], '1': invisible_characters[1]}
 
+def derive_seed(key: Union[int, str, bytes], index: int) -> int:
+    """Derive the seed of one message or block from a key.
 
-def encode_message(cover_text: str, hidden_message: str,
-                   inv_chars: Dict[str, str]) -> str:
-    """Encodes a hidden message into cover text using invisible characters
-    and outputs the stego object.
+    The seed is the first 8 bytes of HMAC-SHA256(key, index), so knowing
+    the seeds of some messages tells nothing about the others.
 
     Args:
-        cover_text (str): The cover text to embed the hidden message into.
-        hidden_message (str): The message to be hidden.
-        inv_char (dict): A dictionary mapping bits ('0', '1') to
-        invisible characters.
+        key (Union[int, str, bytes]): The shared key.
+        index (int): The number of the message or block, from 0.
 
     Returns:
-        str: The resulting stego object containing the hidden message.
+        int: A 64-bit seed for dynamic_mapping.
     """
-    # Convert the hidden message to binary
-    binary_message = ''.join(
-        format(ord(char), '08b') for char in hidden_message)
-    invisible_sequence = ''.join(inv_chars[bit] for bit in binary_message)
+    if isinstance(key, int):
+        key = key.to_bytes(key.bit_length() // 8 + 1, 'big', signed=True)
+    elif isinstance(key, str):
+        key = key.encode('utf-8')
+    digest = hmac.new(key, index.to_bytes(8, 'big'), hashlib.sha256).digest()
 
-    # Split the cover text into words
-    words = cover_text.split()
-    stego_object = []
+    return int.from_bytes(digest[:8], 'big')
 
-    # Distribute invisible characters after each word
-    char_index = 0
-    for word in words:
-        stego_object.append(word)
-        if char_index < len(invisible_sequence):
-            stego_object.append(invisible_sequence[char_index])
-            char_index += 1
 
-    # Append remaining invisible characters at the end if there are any
-    if char_index < len(invisible_sequence):
-        stego_object.append(invisible_sequence[char_index:])
+def rotated_mapping(key: Union[int, str, bytes], index: int,
+                    bits_per_symbol: int = 1) -> Dict[str, str]:
+    """Generate the mapping of the index-th message under a rotating key.
 
-    return ' '.join(stego_object)
+    Args:
+        key (Union[int, str, bytes]): The shared key.
+        index (int): The number of the message, from 0.
+        bits_per_symbol (int, optional): The number of bits carried by each
+            invisible character (1 to 4). Defaults to 1.
 
+    Returns:
+        Dict[str, str]: A dict mapping bit groups to invisible characters.
+    """
+    return dynamic_mapping(derive_seed(key, index), bits_per_symbol)
+
+
+@lru_cache(maxsize=MAPPING_CACHE_SIZE)
+def _rotation_table(key: Union[int, str, bytes], index: int,
+                    bits_per_symbol: int,
+                    inverse: bool) -> Dict[int, int]:
+    # str.translate table between the static and the rotated characters
+    static = static_mapping(bits_per_symbol)
+    rotated = rotated_mapping(key, index, bits_per_symbol)
+    pairs = [(static[bits], rotated[bits]) for bits in static]
+    if inverse:
+        pairs = [(after, before) for before, after in pairs]
+
+    return str.maketrans(dict(pairs))
 
-def decode_message(stego_obj: str, inv_chars: Dict[str, str]) -> str:
-    """Extracts the binary message from the invisible characters embedded in
-    the stego object and converts it back to the original hidden message.
+
+def rotate_symbols(invisible: str, key: Union[int, str, bytes],
+                   block_size: int, bits_per_symbol: int = 1,
+                   inverse: bool = False) -> str:
+    """Give every block of invisible characters its own mapping.
+
+    The invisible characters are written with static_mapping; the
+    characters of block i are then swapped for those of
+    rotated_mapping(key, i), so the mapping changes every block_size
+    symbols. inverse=True swaps them back.
 
     Args:
-        stego_object (str): The stego object containing the hidden message.
-        inv_chars (dict): A dictionary mapping bits ('0', '1') to invisible
-        characters.
+        invisible (str): The invisible characters.
+        key (Union[int, str, bytes]): The shared key.
+        block_size (int): The number of symbols per block.
+        bits_per_symbol (int, optional): The number of bits carried by each
+            invisible character (1 to 4). Defaults to 1.
+        inverse (bool, optional): Undo the rotation. Defaults to False.
 
     Returns:
-        str: The decoded hidden message.
+        str: The invisible characters with their block mappings.
     """
-    # Extract invisible characters from the text
-    invisible_chars = ''.join(c for c in stego_obj if c in inv_chars.values())
-
-    # Convert back to binary
-    binary_message = ''.join(
-        '0' if c == '\u200C' else '1' for c in invisible_chars)
-
-    # Decode binary to string
-    decoded_hidden_message = ''.join(chr(int(binary_message[i:i+8], 2))
-                                     for i in range(0, len(binary_message), 8))
+    if block_size < 1:
+        raise ValueError("The block size must be at least 1")
 
-    return decoded_hidden_message
+    return ''.join(
+        invisible[start:start + block_size].translate(
+            _rotation_table(key, index, bits_per_symbol, inverse))
+        for index, start in enumerate(range(0, len(invisible), block_size)))
 
 
 def main():
@@ -94,7 +144,8 @@ def main():
 
     seed = 11
     invisible_chars = dynamic_mapping(seed)
-    stego_object = encode_message(cover_text, hidden_message, invisible_chars)
+    stego_object = encode_message(cover_text, hidden_message, invisible_chars,
+                                  allow_overflow=True)
     decoded_message = decode_message(stego_object, invisible_chars)
 
     # For debugging purposes
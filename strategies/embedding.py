@@ -0,0 +1,217 @@
+from functools import partial
+from typing import Dict, Iterable, Iterator, TextIO, Tuple, Union
+
+from strategies.batch import map_batch
+from strategies.bit_buffer import (bytes_to_bits, bytes_to_invisible,
+                                   bytes_to_text, extract_bytes, symbol_count,
+                                   symbol_size, text_to_bytes)
+from strategies.placement import check_fit, splice
+from strategies.streaming import (CHUNK_SIZE, iter_bit_buffers, iter_chunks,
+                                  iter_invisible, iter_runs, iter_symbols,
+                                  splice_runs, write_pieces)
+
+
+# Embedding of the message bits as they are, one invisible character per
+# symbol of a given mapping. basic_approach (with the static mapping) and
+# dynamic_mapping (with a seeded one) both use these functions.
+def encode_message(cover_text: str, hidden_message: str,
+                   inv_chars: Dict[str, str], backend: str = 'python',
+                   allow_overflow: bool = False) -> str:
+    """Embed a hidden message into the cover text using zero-width characters.
+
+    Args:
+        cover_text (str): The cover text to embed the hidden message into.
+        hidden_message (str): The message to hide within the cover text.
+        inv_chars (Dict[str, str]): A dictionary mapping bits ('0', '1') to
+        zero-width characters.
+        backend (str, optional): The bit conversion backend, 'python',
+            'numpy' or 'auto'. Defaults to 'python'.
+        allow_overflow (bool, optional): Put the invisible characters that
+            do not fit after the last word instead of raising. Defaults to
+            False.
+
+    Returns:
+        str: The resulting stego object containing the hidden message.
+
+    Raises:
+        ValueError: If the message needs more invisible characters than
+            the cover text has words, unless allow_overflow is set.
+    """
+    if not allow_overflow:
+        check_fit(cover_text, symbol_count(len(hidden_message) * 8,
+                                           symbol_size(inv_chars)))
+
+    # Convert the hidden message straight to invisible characters
+    invisible_sequence = bytes_to_invisible(text_to_bytes(hidden_message),
+                                            inv_chars, backend=backend)
+
+    # Splice one invisible character in after every word of the cover text
+    return splice(cover_text, invisible_sequence)
+
+
+def decode_message(stego_obj: str, inv_chars: Dict[str, str],
+                   backend: str = 'python') -> str:
+    """Extract and decode a hidden message from a stego object.
+
+    Args:
+        stego_object (str): The text containing the hidden message.
+        inv_chars (dict): A dictionary mapping bits ('0', '1') to invisible
+        characters.
+        backend (str, optional): The bit conversion backend, 'python',
+            'numpy' or 'auto'. Defaults to 'python'.
+
+    Returns:
+        str: The decoded hidden message.
+    """
+    # Extract invisible characters from the text and convert them to bytes
+    data, _ = extract_bytes(stego_obj, inv_chars, backend)
+
+    return bytes_to_text(data)
+
+
+def encode_bytes(cover_text: str, payload: Union[bytes, memoryview],
+                 inv_chars: Dict[str, str], backend: str = 'python',
+                 allow_overflow: bool = False) -> str:
+    """Embed a binary payload into the cover text using zero-width
+    characters.
+
+    The bytes are converted straight to invisible characters, eight bits
+    each, so any binary payload can be embedded; text with characters
+    above U+00FF can be passed as hidden_message.encode('utf-8').
+
+    Args:
+        cover_text (str): The cover text to embed the payload into.
+        payload (Union[bytes, memoryview]): The bytes to hide.
+        inv_chars (Dict[str, str]): A dictionary mapping bits ('0', '1') to
+        zero-width characters.
+        backend (str, optional): The bit conversion backend, 'python',
+            'numpy' or 'auto'. Defaults to 'python'.
+        allow_overflow (bool, optional): See encode_message. Defaults to
+            False.
+
+    Returns:
+        str: The resulting stego object containing the payload.
+
+    Raises:
+        ValueError: If the payload needs more invisible characters than
+            the cover text has words, unless allow_overflow is set.
+    """
+    if not allow_overflow:
+        check_fit(cover_text, symbol_count(len(payload) * 8,
+                                           symbol_size(inv_chars)))
+    return splice(cover_text, bytes_to_invisible(payload, inv_chars,
+                                                 backend=backend))
+
+
+def decode_bytes(stego_obj: str, inv_chars: Dict[str, str],
+                 backend: str = 'python') -> bytes:
+    """Extract a binary payload embedded with encode_bytes.
+
+    Args:
+        stego_object (str): The text containing the payload.
+        inv_chars (dict): A dictionary mapping bits ('0', '1') to invisible
+        characters.
+        backend (str, optional): The bit conversion backend, 'python',
+            'numpy' or 'auto'. Defaults to 'python'.
+
+    Returns:
+        bytes: The payload.
+    """
+    data, _ = extract_bytes(stego_obj, inv_chars, backend)
+
+    return data
+
+
+def encode_batch(pairs: Iterable[Tuple[str, str]],
+                 inv_chars: Dict[str, str],
+                 backend: str = 'python',
+                 workers: int = 1,
+                 allow_overflow: bool = False) -> Iterator[str]:
+    """Embed many hidden messages into many cover texts.
+
+    The bit conversion tables of inv_chars are built on the first message
+    and reused for the rest of the batch.
+
+    Args:
+        pairs (Iterable[Tuple[str, str]]): (cover text, hidden message)
+            pairs.
+        inv_chars (Dict[str, str]): A dictionary mapping bits ('0', '1') to
+        zero-width characters.
+        backend (str, optional): The bit conversion backend, 'python',
+            'numpy' or 'auto'. Defaults to 'python'.
+        workers (int, optional): Number of worker processes, see
+            batch.map_batch. Defaults to 1.
+        allow_overflow (bool, optional): See encode_message. Defaults to
+            False.
+
+    Returns:
+        Iterator[str]: The stego objects, in the order of the pairs.
+    """
+    encode = partial(encode_message, inv_chars=inv_chars, backend=backend,
+                     allow_overflow=allow_overflow)
+    return map_batch(encode, pairs, workers)
+
+
+def decode_batch(stego_objects: Iterable[str], inv_chars: Dict[str, str],
+                 backend: str = 'python',
+                 workers: int = 1) -> Iterator[str]:
+    """Extract and decode the hidden messages of many stego objects.
+
+    Args:
+        stego_objects (Iterable[str]): The stego objects.
+        inv_chars (Dict[str, str]): A dictionary mapping bits ('0', '1') to
+        zero-width characters.
+        backend (str, optional): The bit conversion backend, 'python',
+            'numpy' or 'auto'. Defaults to 'python'.
+        workers (int, optional): Number of worker processes, see
+            batch.map_batch. Defaults to 1.
+
+    Returns:
+        Iterator[str]: The decoded messages, in the order of the stego
+        objects.
+    """
+    decode = partial(decode_message, inv_chars=inv_chars, backend=backend)
+    return map_batch(decode, ((stego_object,) for stego_object in
+                              stego_objects), workers)
+
+
+def encode_stream(cover_file: TextIO, message_file: TextIO,
+                  output_file: TextIO, inv_chars: Dict[str, str],
+                  chunk_size: int = CHUNK_SIZE):
+    """Embed a hidden message into a cover text, reading and writing files
+    in chunks so memory use does not grow with their size.
+
+    The output is the same as that of encode_message with allow_overflow
+    set: the cover text is only read as the stego object is written, so
+    a message with more bits than the cover has words is not rejected.
+
+    Args:
+        cover_file (TextIO): The cover text to embed the hidden message into.
+        message_file (TextIO): The message to hide within the cover text.
+        output_file (TextIO): The file the stego object is written to.
+        inv_chars (Dict[str, str]): A dictionary mapping bits ('0', '1') to
+        zero-width characters.
+        chunk_size (int, optional): The number of characters read at once.
+    """
+    bit_chunks = (bytes_to_bits(text_to_bytes(chunk))
+                  for chunk in iter_chunks(message_file, chunk_size))
+    invisible_chunks = iter_symbols(bit_chunks, inv_chars)
+    runs = iter_runs(iter_chunks(cover_file, chunk_size))
+    write_pieces(splice_runs(runs, invisible_chunks), output_file)
+
+
+def decode_stream(stego_file: TextIO, output_file: TextIO,
+                  inv_chars: Dict[str, str], chunk_size: int = CHUNK_SIZE):
+    """Extract a hidden message from a stego object file in chunks.
+
+    Args:
+        stego_file (TextIO): The text containing the hidden message.
+        output_file (TextIO): The file the decoded message is written to.
+        inv_chars (dict): A dictionary mapping bits ('0', '1') to invisible
+        characters.
+        chunk_size (int, optional): The number of characters read at once.
+    """
+    invisible_chunks = iter_invisible(iter_chunks(stego_file, chunk_size),
+                                      tuple(inv_chars.values()))
+    for data, _ in iter_bit_buffers(invisible_chunks, inv_chars):
+        output_file.write(bytes_to_text(data))
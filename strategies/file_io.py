@@ -0,0 +1,313 @@
+import argparse
+import mmap
+import re
+from contextlib import contextmanager
+from itertools import islice
+from typing import BinaryIO, Iterable, Iterator, Union
+
+from strategies.pipeline import Pipeline, parse_pipeline
+from strategies.placement import check_word_count
+
+
+# Size of the output buffer in bytes
+BUFFER_SIZE = 1 << 20
+
+# Number of bytes scanned at a time when decoding. A regex run over a long
+# stretch of invisible characters keeps a backtracking stack that grows with
+# its length, so the scan is done in windows
+WINDOW_SIZE = 1 << 16
+
+# The characters str.split() splits on, so the byte-level encoder finds the
+# same words as placement.splice
+WHITESPACE_CHARS = ('\t\n\x0b\x0c\r\x1c\x1d\x1e\x1f \x85\xa0\u1680'
+                    '\u2000\u2001\u2002\u2003\u2004\u2005'
+                    '\u2006\u2007\u2008\u2009\u200a'
+                    '\u2028\u2029\u202f\u205f\u3000')
+
+
+def utf8_alternatives(chars: Iterable[str]) -> bytes:
+    """Build a bytes regex that matches the UTF-8 encoding of any of chars.
+
+    Characters are grouped by their leading bytes, e.g. U+200B and U+200C
+    become E2 80 [8B 8C]. In valid UTF-8 a match can only start at a
+    character boundary, so the pattern can be used on the raw bytes.
+
+    Args:
+        chars (Iterable[str]): The characters.
+
+    Returns:
+        bytes: The regex, without enclosing group.
+    """
+    groups = {}
+    for char in sorted(set(chars)):
+        encoded = char.encode('utf-8')
+        groups.setdefault(encoded[:-1], []).append(re.escape(encoded[-1:]))
+
+    return b'|'.join(re.escape(prefix) + b'[' + b''.join(last) + b']'
+                     for prefix, last in groups.items())
+
+
+# Whitespace runs and leading whitespace of UTF-8 encoded text
+_WHITESPACE = utf8_alternatives(WHITESPACE_CHARS)
+WHITESPACE_RUN = re.compile(b'(?:' + _WHITESPACE + b')+')
+LEADING_WHITESPACE = re.compile(b'(?:' + _WHITESPACE + b')*')
+
+
+def invisible_runs_pattern(chars: Iterable[str]) -> 're.Pattern':
+    """Compile a bytes regex matching runs of the given invisible characters.
+
+    Args:
+        chars (Iterable[str]): The invisible characters.
+
+    Returns:
+        re.Pattern: The compiled pattern.
+    """
+    # Spelling out the first character lets the regex engine skip ahead to
+    # its leading bytes instead of trying the group at every offset
+    alternatives = b'(?:' + utf8_alternatives(chars) + b')'
+    return re.compile(alternatives + alternatives + b'*')
+
+
+@contextmanager
+def map_file(path: str) -> Iterator[Union[mmap.mmap, bytes]]:
+    """Memory-map a file read-only.
+
+    Args:
+        path (str): The path of the file.
+
+    Yields:
+        Union[mmap.mmap, bytes]: The mapped contents, or b'' for an empty
+        file, which cannot be mapped.
+    """
+    with open(path, 'rb') as file:
+        try:
+            data = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+        except ValueError:
+            yield b''
+            return
+        try:
+            yield data
+        finally:
+            data.close()
+
+
+def iter_invisible_bytes(data: Union[mmap.mmap, bytes],
+                         pattern: 're.Pattern',
+                         window_size: int = WINDOW_SIZE) -> Iterator[bytes]:
+    """Find the runs of invisible characters in UTF-8 encoded text.
+
+    Args:
+        data (Union[mmap.mmap, bytes]): The UTF-8 encoded text.
+        pattern (re.Pattern): A pattern from invisible_runs_pattern.
+        window_size (int, optional): The number of bytes scanned at a time.
+
+    Yields:
+        bytes: The next run; runs crossing a window boundary come in parts.
+    """
+    start = 0
+    while start < len(data):
+        end = min(start + window_size, len(data))
+        # Do not cut a character in two: step back over continuation bytes
+        while end < len(data) and 0x80 <= data[end] < 0xC0:
+            end -= 1
+        yield from pattern.findall(data, start, end)
+        start = end
+
+
+def _text_end(data: Union[mmap.mmap, bytes]) -> int:
+    # Offset behind the last non-whitespace character, like len(rstrip()).
+    # Only a window at the end is decoded, grown until it has a word
+    size = 4096
+    while True:
+        start = max(0, len(data) - size)
+        window = str(data[start:], 'utf-8', 'ignore')
+        stripped = window.rstrip()
+        if stripped or start == 0:
+            return len(data) - len(window[len(stripped):].encode('utf-8'))
+        size *= 2
+
+
+def count_words(cover: Union[mmap.mmap, bytes], limit: int = None) -> int:
+    """Count the words of UTF-8 encoded text, like len(text.split()).
+
+    Args:
+        cover (Union[mmap.mmap, bytes]): The UTF-8 encoded cover text.
+        limit (int, optional): Stop counting at this many words. Defaults
+            to None, count them all.
+
+    Returns:
+        int: The number of words, at most limit.
+    """
+    tail = _text_end(cover)
+    lead = min(LEADING_WHITESPACE.match(cover).end(), tail)
+    if lead == tail or limit == 0:
+        return 0
+
+    # Every whitespace run within the text ends a word
+    gaps = WHITESPACE_RUN.finditer(cover, lead, tail)
+    if limit is not None:
+        gaps = islice(gaps, limit - 1)
+    return 1 + sum(1 for _ in gaps)
+
+
+def splice_bytes(cover: Union[mmap.mmap, bytes], invisible: str,
+                 trailing: str, output: BinaryIO):
+    """Splice invisible characters into UTF-8 encoded cover text.
+
+    Writes the same stego object as placement.splice, UTF-8 encoded, but
+    copies the cover text straight from the (mapped) bytes to the output,
+    without decoding it or splitting it into words.
+
+    Args:
+        cover (Union[mmap.mmap, bytes]): The UTF-8 encoded cover text.
+        invisible (str): The invisible characters to embed, in order.
+        trailing (str): Parts added after the message, e.g. the separator
+            and the codebook.
+        output (BinaryIO): The file the stego object is written to.
+
+    Raises:
+        ValueError: If the invisible characters differ in UTF-8 length.
+    """
+    encoded = invisible.encode('utf-8')
+    width = len(invisible[:1].encode('utf-8'))
+    if len(encoded) != width * len(invisible):
+        raise ValueError("The invisible characters must have the same "
+                         "UTF-8 length")
+
+    view = memoryview(cover)
+    tail = _text_end(cover)
+    lead = min(LEADING_WHITESPACE.match(cover).end(), tail)
+    output.write(view[:lead])
+
+    # One invisible character after every word, up to the whitespace behind it
+    position = lead
+    count = 0
+    for match in islice(WHITESPACE_RUN.finditer(cover, lead, tail),
+                        len(invisible)):
+        output.write(view[position:match.start()])
+        output.write(encoded[count * width:(count + 1) * width])
+        position = match.start()
+        count += 1
+
+    # The last word has no whitespace behind it within the text
+    if count < len(invisible) and position < tail:
+        output.write(view[position:tail])
+        output.write(encoded[count * width:(count + 1) * width])
+        position = tail
+        count += 1
+
+    output.write(view[position:tail])
+    output.write(encoded[count * width:])
+    output.write(trailing.encode('utf-8'))
+    output.write(view[tail:])
+    view.release()
+
+
+def encode_file(pipeline: Pipeline, cover_path: str, message_path: str,
+                output_path: str, binary: bool = False):
+    """Encode a hidden message file into a cover text file.
+
+    Both files are memory-mapped; the cover text is never decoded, and the
+    stego object is written through a large output buffer.
+
+    Args:
+        pipeline (Pipeline): The pipeline, see pipeline.parse_pipeline. Its
+            placement must be 'interleave'.
+        cover_path (str): The UTF-8 cover text file.
+        message_path (str): The UTF-8 hidden message file.
+        output_path (str): The file the stego object is written to.
+        binary (bool, optional): Embed the message file as it is, as a
+            binary payload, instead of as text. Defaults to False.
+
+    Raises:
+        ValueError: If the message needs more invisible characters than
+            the cover text has words, unless the pipeline allows overflow.
+            The output file is not created then.
+    """
+    if pipeline.placement.name != 'interleave':
+        raise ValueError("File mode supports the interleave placement only")
+
+    with map_file(message_path) as message:
+        if binary:
+            invisible, trailing = pipeline.embedded_bytes(message)
+        else:
+            invisible, trailing = pipeline.embedded(str(message, 'utf-8'))
+
+    with map_file(cover_path) as cover:
+        if not pipeline.allow_overflow:
+            check_word_count(count_words(cover, len(invisible)),
+                             len(invisible), 'interleave placement')
+        with open(output_path, 'wb', buffering=BUFFER_SIZE) as output:
+            splice_bytes(cover, invisible, ''.join(trailing), output)
+
+
+def decode_file(pipeline: Pipeline, stego_path: str, output_path: str,
+                binary: bool = False):
+    """Decode the hidden message of a stego object file.
+
+    The memory-mapped file is scanned for the UTF-8 byte sequences of the
+    invisible characters, so only those are ever decoded to str.
+
+    Args:
+        pipeline (Pipeline): The pipeline the stego object was encoded with.
+        stego_path (str): The stego object file.
+        output_path (str): The file the decoded message is written to.
+        binary (bool, optional): Decode a binary payload embedded with
+            encode_file(binary=True). Defaults to False.
+    """
+    pattern = invisible_runs_pattern(pipeline.chars)
+    with map_file(stego_path) as stego:
+        invisible = b''.join(iter_invisible_bytes(stego, pattern))
+    invisible = invisible.decode('utf-8')
+
+    if binary:
+        with open(output_path, 'wb') as output:
+            output.write(pipeline.decode_invisible_bytes(invisible))
+        return
+
+    with open(output_path, 'w', encoding='utf-8', newline='') as output:
+        output.write(pipeline.decode_invisible(invisible))
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Encode or decode files with memory-mapped I/O.")
+    parser.add_argument('mode', choices=['encode', 'decode'])
+    parser.add_argument('strategy',
+                        help="a strategy (e.g. huffman_encoding) or a "
+                             "pipeline spec (e.g. huffman+hamming+static)")
+    parser.add_argument('files', nargs='+',
+                        help="encode: COVER MESSAGE OUTPUT, "
+                             "decode: STEGO OUTPUT")
+    parser.add_argument('--seed', type=int, default=11,
+                        help="seed of the dynamic mapping")
+    parser.add_argument('--bits-per-symbol', type=int, default=1,
+                        help="bits per invisible character (1 to 4)")
+    parser.add_argument('--block-code', type=int, nargs=2, default=None,
+                        metavar=('N', 'K'), help="Hamming block code")
+    parser.add_argument('--binary', action='store_true',
+                        help="embed the message file as raw bytes")
+    parser.add_argument('--allow-overflow', action='store_true',
+                        help="embed a message with more invisible "
+                             "characters than the cover has words")
+    args = parser.parse_args()
+
+    block_code = tuple(args.block_code) if args.block_code else None
+    pipeline = parse_pipeline(args.strategy, seed=args.seed,
+                              bits_per_symbol=args.bits_per_symbol,
+                              block_code=block_code,
+                              allow_overflow=args.allow_overflow)
+
+    if args.mode == 'encode':
+        if len(args.files) != 3:
+            parser.error("encode needs COVER MESSAGE OUTPUT")
+        encode_file(pipeline, *args.files, binary=args.binary)
+    else:
+        if len(args.files) != 2:
+            parser.error("decode needs STEGO OUTPUT")
+        decode_file(pipeline, *args.files, binary=args.binary)
+    print(f"Written to {args.files[-1]}")
+
+
+if __name__ == "__main__":
+    main()
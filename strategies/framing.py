@@ -0,0 +1,191 @@
+import struct
+import zlib
+from collections import Counter
+from typing import Dict, Iterable, List, NamedTuple, Optional, Tuple, Union
+
+
+# Framed container: instead of one run of message bits and a header behind
+# the separator, the payload is cut into frames that each start with a sync
+# marker and carry their sequence number, the number of frames, their
+# length and a CRC32. The pipeline protects every frame with its own error
+# correction. The decoder splits the invisible characters at the markers,
+# so a lost or inserted character only damages the frame it falls in, and
+# every frame can be converted, corrected and verified on its own.
+
+# Starts every frame; it is neither one of the mapping characters nor the
+# separator, so it can be found without decoding the frames
+FRAME_MARKER = '\u034F'
+
+# Default payload bytes per frame
+FRAME_SIZE = 256
+
+# Frame header: sequence number, number of frames, payload length
+FRAME_HEADER = struct.Struct('>IIH')
+
+# Bytes of the CRC32 behind the payload
+CRC_SIZE = 4
+
+# Container header: number of bits and header length of the bit buffer
+CONTAINER_HEADER = struct.Struct('>II')
+
+# Header length of a bit buffer without header
+NO_HEADER = 0xFFFFFFFF
+
+
+class FramedMessage(NamedTuple):
+    """The outcome of decoding a framed stego object.
+
+    message is None if frames are missing; damaged lists the positions of
+    the frames in the stego object that failed verification, missing the
+    sequence numbers that were not recovered. frames holds the container
+    bytes of every recovered frame by sequence number, so what survived
+    can still be salvaged when the message cannot be decoded.
+    """
+    message: Optional[Union[str, bytes]]
+    frame_count: int
+    damaged: List[int]
+    missing: List[int]
+    frames: Dict[int, bytes]
+
+    @property
+    def complete(self) -> bool:
+        """Whether every frame was recovered and the message decoded."""
+        return self.message is not None
+
+
+def pack_container(data: bytes, nbits: int, header: Optional[bytes]) -> bytes:
+    """Serialize a bit buffer and its optional header into one payload.
+
+    Args:
+        data (bytes): The packed bits.
+        nbits (int): The number of valid bits in data.
+        header (Optional[bytes]): The header of the compression stage, or
+            None if it has none.
+
+    Returns:
+        bytes: The container header, the header and the packed bits.
+    """
+    header_length = NO_HEADER if header is None else len(header)
+    return (CONTAINER_HEADER.pack(nbits, header_length) + (header or b'') +
+            bytes(data[:(nbits + 7) // 8]))
+
+
+def unpack_container(payload: bytes) -> Tuple[bytes, int, Optional[bytes]]:
+    """Split a payload of pack_container into its bit buffer and header.
+
+    Args:
+        payload (bytes): The payload of pack_container.
+
+    Returns:
+        Tuple[bytes, int, Optional[bytes]]: The packed bits, their number
+        and the header (None if there was none).
+
+    Raises:
+        ValueError: If the payload is shorter than its lengths.
+    """
+    if len(payload) < CONTAINER_HEADER.size:
+        raise ValueError("Framed payload too short")
+    nbits, header_length = CONTAINER_HEADER.unpack_from(payload)
+    start = CONTAINER_HEADER.size
+
+    header = None
+    if header_length != NO_HEADER:
+        header = payload[start:start + header_length]
+        start += header_length
+
+    data = payload[start:]
+    if start > len(payload) or nbits > len(data) * 8:
+        raise ValueError("Invalid framed payload length")
+    return data, nbits, header
+
+
+def pack_frames(payload: bytes, frame_size: int = FRAME_SIZE) -> List[bytes]:
+    """Cut a payload into frames with a header and a CRC32.
+
+    Args:
+        payload (bytes): The bytes to frame.
+        frame_size (int, optional): Payload bytes per frame, at most 65535.
+            Defaults to FRAME_SIZE.
+
+    Returns:
+        List[bytes]: The frames in order; an empty payload gives one empty
+        frame.
+
+    Raises:
+        ValueError: If frame_size is not between 1 and 65535.
+    """
+    if not 0 < frame_size <= 0xFFFF:
+        raise ValueError(f"Invalid frame size: {frame_size}")
+
+    chunks = [payload[start:start + frame_size]
+              for start in range(0, len(payload), frame_size)] or [b'']
+    frames = []
+    for sequence, chunk in enumerate(chunks):
+        body = FRAME_HEADER.pack(sequence, len(chunks), len(chunk)) + chunk
+        frames.append(body + zlib.crc32(body).to_bytes(CRC_SIZE, 'big'))
+    return frames
+
+
+def read_frame(frame: bytes) -> Tuple[int, int, bytes]:
+    """Verify a frame and return its sequence number, the number of frames
+    and its payload.
+
+    Args:
+        frame (bytes): A frame of pack_frames, with its header and CRC32.
+
+    Returns:
+        Tuple[int, int, bytes]: The sequence number, the number of frames
+        and the payload.
+
+    Raises:
+        ValueError: If the frame is too short, the CRC32 does not match or
+            the header is inconsistent.
+    """
+    if len(frame) < FRAME_HEADER.size + CRC_SIZE:
+        raise ValueError("Frame too short")
+    body = frame[:-CRC_SIZE]
+    if zlib.crc32(body) != int.from_bytes(frame[-CRC_SIZE:], 'big'):
+        raise ValueError("Frame CRC32 mismatch")
+
+    sequence, count, length = FRAME_HEADER.unpack_from(body)
+    if length != len(body) - FRAME_HEADER.size or sequence >= count:
+        raise ValueError("Invalid frame header")
+    return sequence, count, bytes(body[FRAME_HEADER.size:])
+
+
+def assemble_frames(frames: Iterable[Optional[Tuple[int, int, bytes]]]
+                    ) -> Tuple[Optional[bytes], int, List[int], List[int],
+                               Dict[int, bytes]]:
+    """Put verified frames back together in sequence order.
+
+    Args:
+        frames (Iterable[Optional[Tuple[int, int, bytes]]]): The result of
+            read_frame for every frame in the stego object, None for frames
+            that failed verification.
+
+    Returns:
+        Tuple[Optional[bytes], int, List[int], List[int], Dict[int, bytes]]:
+        The payload (None if frames are missing), the number of frames, the
+        positions of the damaged frames, the missing sequence numbers and
+        the payloads of the recovered frames by sequence number.
+    """
+    frames = list(frames)
+    counts = Counter(frame[1] for frame in frames if frame is not None)
+    count = counts.most_common(1)[0][0] if counts else 0
+
+    # Frames that disagree on the number of frames count as damaged; of
+    # repeated sequence numbers the first one is kept
+    damaged = []
+    chunks = {}
+    for position, frame in enumerate(frames):
+        if frame is None or frame[1] != count:
+            damaged.append(position)
+        else:
+            chunks.setdefault(frame[0], frame[2])
+
+    missing = [sequence for sequence in range(count)
+               if sequence not in chunks]
+    payload = None
+    if count and not missing:
+        payload = b''.join(chunks[sequence] for sequence in range(count))
+    return payload, count, damaged, missing, chunks
@@ -1,189 +1,524 @@
-import json
 from collections import Counter
-from queue import PriorityQueue
-from typing import Dict, Tuple
-import random
+from functools import lru_cache, partial
+from itertools import chain
+from typing import Dict, Iterable, Iterator, TextIO, Tuple, Union
+
+from strategies.batch import map_batch
+from strategies.bit_buffer import (bytes_to_bits, bytes_to_invisible,
+                                   bytes_to_text, extract_invisible,
+                                   invisible_to_bytes, symbol_count,
+                                   symbol_size, text_to_bytes)
+from strategies.canonical_huffman import (CodebookCache, build_codebook,
+                                          dump_codebook, huffman_decode,
+                                          huffman_decode_stream,
+                                          huffman_encode,
+                                          huffman_encode_stream, huffman_size,
+                                          load_codebook, message_codebook)
+from strategies.dynamic_mapping import dynamic_mapping
+from strategies.placement import check_fit, splice
+from strategies.streaming import (CHUNK_SIZE, iter_after, iter_before,
+                                  iter_bit_buffers, iter_chunks,
+                                  iter_invisible, iter_runs, iter_symbols,
+                                  splice_runs, write_pieces)
+
+
+# For error handling. The whole message is a single Hamming codeword with
+# parity bits at the power-of-two positions 1, 2, 4, ... The codeword is
+# held as one int, position 1 being the most significant bit, so every
+# parity check is one AND with a position mask and int.bit_count().
+
+# Byte patterns of the positions with bit 0, 1 or 2 set, counting the
+# positions of a byte from 0 at its most significant bit
+_LOW_POSITION_BYTES = (0x55, 0x33, 0x0F)
+
+
+@lru_cache(maxsize=8)
+def _parity_masks(length: int, r: int) -> Tuple[int, ...]:
+    """Build the masks of the positions checked by each parity bit.
 
+    Args:
+        length (int): The number of bits of the codeword.
+        r (int): The number of parity bits.
 
-# For better payload capacity
-class HuffmanNode:
-    def __init__(self, char: str, freq: int):
-        self.char = char
-        self.freq = freq
-        self.left = None
-        self.right = None
+    Returns:
+        Tuple[int, ...]: Mask i has a bit at every position j of the
+        codeword (1 to length) with j & 2**i, matching the int layout of
+        the codeword.
+    """
+    # Built over the positions 0 to length, position 0 being an extra
+    # leading bit that no mask contains, as whole repeated bytes
+    size = (length + 1 + 7) // 8
+    unused = size * 8 - (length + 1)
+    masks = []
+    for i in range(r):
+        if i < 3:
+            pattern = bytes([_LOW_POSITION_BYTES[i]])
+        else:
+            half = 1 << (i - 3)
+            pattern = bytes(half) + b'\xff' * half
+        pattern *= -(-size // len(pattern))
+        masks.append(int.from_bytes(pattern[:size], 'big') >> unused)
+    return tuple(masks)
 
-    def __lt__(self, other):
-        return self.freq < other.freq
 
+def _data_runs(length: int) -> Iterator[Tuple[int, int]]:
+    # The runs of data positions between the parity positions, as
+    # (first position, number of positions)
+    power = 2
+    while power + 1 <= length:
+        yield power + 1, min(2 * power - 1, length) - power
+        power *= 2
 
-def build_huffman_tree(hidden_message: str) -> HuffmanNode:
-    """Builds a Huffman tree for the given hidden message.
+
+def hamming_encode_int(value: int, nbits: int) -> Tuple[int, int]:
+    """Encode nbits data bits as a single Hamming codeword.
+
+    The same codeword as hamming_encode, as an int.
 
     Args:
-        text (str): The message for which the Huffman tree will be built.
+        value (int): The data bits, the first bit most significant.
+        nbits (int): The number of data bits.
 
     Returns:
-        HuffmanNode: The root node of the constructed Huffman tree.
+        Tuple[int, int]: The codeword and its number of bits.
     """
-    freq = Counter(hidden_message)
-    pq = PriorityQueue()
+    r = 0
+    while (2**r < nbits + r + 1):
+        r += 1
+    length = nbits + r
 
-    for char, count in freq.items():
-        pq.put(HuffmanNode(char, count))
+    # Spread the runs of data bits over the positions between the parities
+    codeword = 0
+    taken = 0
+    for first, count in _data_runs(length):
+        taken += count
+        run = (value >> (nbits - taken)) & ((1 << count) - 1)
+        codeword |= run << (length - (first + count - 1))
 
-    while pq.qsize() > 1:
-        left = pq.get()
-        right = pq.get()
-        merged = HuffmanNode(None, left.freq + right.freq)
-        merged.left = left
-        merged.right = right
-        pq.put(merged)
+    # Set every parity bit that makes its checked positions even
+    for i, mask in enumerate(_parity_masks(length, r)):
+        if (codeword & mask).bit_count() & 1:
+            codeword |= 1 << (length - (1 << i))
 
-    return pq.get()
+    return codeword, length
 
 
-def generate_huffman_codes(node: HuffmanNode, prefix: str = "",
-                           codebook: Dict[str, str] = None) -> Dict[str, str]:
-    """Generates Huffman codes for characters based on a Huffman tree.
+def hamming_decode_int(codeword: int, length: int) -> Tuple[int, int]:
+    """Correct a single error in a Hamming codeword and extract its data.
+
+    The same result as hamming_decode, as an int.
 
     Args:
-        node (HuffmanNode): The root node of the Huffman tree
-        prefix (str, optional): The current prefix of the binary code
-            during traversal. Defaults to an empty string.
-        codebook (dict, optional): A dictionary to store the generated
-            codes. Defaults to None, in which case a new dictionary is created.
+        codeword (int): The codeword bits, position 1 most significant.
+        length (int): The number of codeword bits.
 
     Returns:
-        dict: A dictionary containing characters as keys and
-        their corresponding Huffman codes as values.
+        Tuple[int, int]: The data bits and their number.
+
+    Raises:
+        ValueError: If the syndrome points behind the end of the codeword.
     """
-    if codebook is None:
-        codebook = {}
-    if node is not None:
-        if node.char is not None:
-            codebook[node.char] = prefix
-        generate_huffman_codes(node.left, prefix + "0", codebook)
-        generate_huffman_codes(node.right, prefix + "1", codebook)
+    r = 0
+    while (2**r < length):
+        r += 1
+
+    # The failing parity checks add up to the position of the error
+    error_pos = 0
+    for i, mask in enumerate(_parity_masks(length, r)):
+        if (codeword & mask).bit_count() & 1:
+            error_pos += 1 << i
 
-    return codebook
+    if error_pos > length:
+        raise ValueError("Uncorrectable error in Hamming codeword")
+    if error_pos > 0:
+        codeword ^= 1 << (length - error_pos)
 
+    # Gather the runs of data bits between the parity positions
+    value = 0
+    nbits = 0
+    for first, count in _data_runs(length):
+        run = (codeword >> (length - (first + count - 1))) & \
+            ((1 << count) - 1)
+        value = (value << count) | run
+        nbits += count
 
-def huffman_encode(hidden_message: str) -> Tuple[str, Dict[str, str]]:
-    """Encodes a hidden message using Huffman coding.
+    return value, nbits
+
+
+def hamming_encode(data: str) -> str:
+    """Encode a binary string as a single Hamming codeword.
 
     Args:
-        hidden_message (str): The hidden message to be encoded
+        data (str): The data bits as '0' and '1'.
 
     Returns:
-        Tuple[str, dict]: A tuple containing the encoded text
-        as a binary string and the corresponding codebook.
+        str: The codeword, with the parity bits at the power-of-two
+        positions.
     """
-    tree = build_huffman_tree(hidden_message)
-    codebook = generate_huffman_codes(tree)
-    huffman_encoded = ''.join(codebook[char] for char in hidden_message)
+    codeword, length = hamming_encode_int(int(data or '0', 2), len(data))
+    return format(codeword, f'0{length}b') if length else ''
+
+
+def hamming_decode(data: str) -> str:
+    """Correct a single error in a Hamming codeword and extract its data.
+
+    Args:
+        data (str): The codeword bits as '0' and '1'.
 
-    return huffman_encoded, codebook
+    Returns:
+        str: The data bits.
+    """
+    value, nbits = hamming_decode_int(int(data or '0', 2), len(data))
+    return format(value, f'0{nbits}b') if nbits else ''
 
 
-def huffman_decode(binary_message: str, codebook: Dict[str, str]) -> str:
-    """uses the given Huffman codebook to decode a binary
-    string back into the original text.
+def hamming_encode_buffer(data: bytes, nbits: int) -> Tuple[bytes, int]:
+    """Encode a bit buffer as a single Hamming codeword.
 
     Args:
-        binary_message (str): The binary string encoded using Huffman coding.
-        codebook (Dict[str, str]): The Huffman codebook.
+        data (bytes): The packed bits.
+        nbits (int): The number of valid bits.
 
     Returns:
-        str: The decoded hidden message.
+        Tuple[bytes, int]: The packed codeword and its number of bits.
     """
-    reverse_codebook = {v: k for k, v in codebook.items()}
-    decoded_text = ""
-    buffer = ""
-    for bit in binary_message:
-        buffer += bit
-        if buffer in reverse_codebook:
-            decoded_text += reverse_codebook[buffer]
-            buffer = ""
+    value = int.from_bytes(data, 'big') >> (len(data) * 8 - nbits)
+    return _int_to_buffer(*hamming_encode_int(value, nbits))
 
-    return decoded_text
 
+def hamming_decode_buffer(data: bytes, nbits: int) -> Tuple[bytes, int]:
+    """Decode a bit buffer holding a single Hamming codeword.
 
-# For error handling
-def hamming_encode(data: str) -> str:
-    n = len(data)
-    r = 0
-    while (2**r < n + r + 1):
-        r += 1
+    Args:
+        data (bytes): The packed codeword.
+        nbits (int): The number of codeword bits.
 
-    hamming_code = [''] * (n + r)
-    j = 0
-    for i in range(1, len(hamming_code) + 1):
-        if i & (i - 1) == 0:
-            hamming_code[i - 1] = '0'
-        else:
-            hamming_code[i - 1] = data[j]
-            j += 1
+    Returns:
+        Tuple[bytes, int]: The packed data bits and their number.
+    """
+    value = int.from_bytes(data, 'big') >> (len(data) * 8 - nbits)
+    return _int_to_buffer(*hamming_decode_int(value, nbits))
 
-    for i in range(r):
-        pos = 2**i
-        parity = 0
-        for j in range(1, len(hamming_code) + 1):
-            if j & pos and hamming_code[j - 1] == '1':
-                parity ^= 1
-        hamming_code[pos - 1] = str(parity)
 
-    return ''.join(hamming_code)
+def _int_to_buffer(value: int, nbits: int) -> Tuple[bytes, int]:
+    # Pack an int of nbits bits, the first bit most significant
+    size = (nbits + 7) // 8
+    return (value << (size * 8 - nbits)).to_bytes(size, 'big'), nbits
 
 
-def hamming_decode(data: str) -> str:
-    n = len(data)
-    r = 0
-    while (2**r < n):
-        r += 1
+# Block Hamming codes: name -> (inner Hamming length, SECDED overall parity)
+HAMMING_BLOCK_CODES = {
+    (7, 4): (7, False),
+    (8, 4): (7, True),
+    (15, 11): (15, False),
+    (16, 11): (15, True),
+    (31, 26): (31, False),
+    (63, 57): (63, False),
+    (72, 64): (71, True),
+}
 
-    error_pos = 0
-    for i in range(r):
-        pos = 2**i
-        parity = 0
-        for j in range(1, n + 1):
-            if j & pos and data[j - 1] == '1':
-                parity ^= 1
-        if parity != 0:
-            error_pos += pos
+# Number of bits used to store the payload length in front of the blocks
+BLOCK_LENGTH_BITS = 32
 
-    if error_pos > 0:
-        error_pos -= 1
-        data = data[:error_pos] + (
-            '1' if data[error_pos] == '0' else '0') + data[error_pos + 1:]
 
-    original_data = ''
-    for i in range(1, n + 1):
-        if i & (i - 1) != 0:
-            original_data += data[i - 1]
+class HammingBlockCode:
+    """Hamming code over fixed-size blocks with precomputed lookup tables.
 
-    return original_data
+    Parity bits sit at the power-of-two positions of every block, exactly
+    like in hamming_encode. SECDED codes append one overall parity bit so
+    double errors in a block are detected instead of miscorrected. All
+    tables are indexed per byte of the block, so encoding, computing the
+    syndrome and extracting the data each take one lookup per byte.
+    """
+
+    def __init__(self, n: int, k: int):
+        if (n, k) not in HAMMING_BLOCK_CODES:
+            raise ValueError(f"Unsupported Hamming block code: ({n}, {k})")
+        inner, secded = HAMMING_BLOCK_CODES[(n, k)]
+        self.n = n
+        self.k = k
+        self.secded = secded
+        self.r = inner.bit_length()
+
+        # Bit masks of the codeword, position 1 is the most significant bit
+        def position_mask(position: int) -> int:
+            return 1 << (n - position)
+
+        data_positions = [p for p in range(1, inner + 1) if p & (p - 1)]
+
+        # Codeword of every single data bit, parities included
+        single_codewords = []
+        for position in data_positions:
+            codeword = position_mask(position)
+            for i in range(self.r):
+                if position & (1 << i):
+                    codeword |= position_mask(1 << i)
+            if secded and bin(codeword).count('1') % 2:
+                codeword |= position_mask(n)
+            single_codewords.append(codeword)
+
+        # Syndrome contribution of every codeword bit, overall parity on top
+        syndromes = []
+        for position in range(1, n + 1):
+            syndrome = position if position <= inner else 0
+            if secded:
+                syndrome |= 1 << self.r
+            syndromes.append(syndrome)
+
+        self.encode_tables = self._byte_tables(
+            single_codewords, k)
+        self.syndrome_tables = self._byte_tables(syndromes, n)
+        self.extract_tables = self._byte_tables(
+            [1 << (k - 1 - data_positions.index(p)) if p in data_positions
+             else 0 for p in range(1, n + 1)], n)
+
+        # Syndrome lookup table: syndrome -> codeword bits to flip
+        self.corrections = {0: 0}
+        for position in range(1, n + 1):
+            self.corrections[syndromes[position - 1]] = \
+                position_mask(position)
+
+    @staticmethod
+    def _byte_tables(contributions, width):
+        """Build one 256-entry XOR table per byte of a width-bit value.
+
+        Args:
+            contributions (list): The value contributed by each bit, most
+                significant bit first.
+            width (int): The number of bits of the indexed value.
+
+        Returns:
+            list: Tuples of (shift, table) from the most significant byte.
+        """
+        tables = []
+        for start in range(0, width, 8):
+            size = min(8, width - start)
+            shift = width - start - size
+            table = [0] * (1 << size)
+            for value in range(1, 1 << size):
+                low = value & -value
+                bit = size - low.bit_length()
+                table[value] = table[value ^ low] ^ contributions[start + bit]
+            tables.append((shift, table))
+        return tables
+
+    @staticmethod
+    def _lookup(tables, value: int) -> int:
+        result = 0
+        for shift, table in tables:
+            result ^= table[(value >> shift) & (len(table) - 1)]
+        return result
+
+    def encode_block(self, data: int) -> int:
+        """Encode k data bits into an n-bit codeword."""
+        return self._lookup(self.encode_tables, data)
+
+    def decode_block(self, codeword: int) -> Tuple[int, bool]:
+        """Correct a single error in a codeword and return its data bits.
+
+        Args:
+            codeword (int): The received n-bit codeword.
+
+        Returns:
+            Tuple[int, bool]: The k data bits and whether a bit was flipped.
+
+        Raises:
+            ValueError: If the block holds an uncorrectable error.
+        """
+        syndrome = self._lookup(self.syndrome_tables, codeword)
+        flip = self.corrections.get(syndrome)
+        if flip is None:
+            raise ValueError("Uncorrectable error in Hamming block")
+        codeword ^= flip
+        return self._lookup(self.extract_tables, codeword), flip != 0
+
+
+@lru_cache(maxsize=None)
+def get_block_code(block_code: Tuple[int, int]) -> HammingBlockCode:
+    """Return the (cached) lookup tables for an (n, k) Hamming block code."""
+    return HammingBlockCode(*block_code)
+
+
+def _encode_groups(code: HammingBlockCode, data: bytes) -> bytes:
+    # Encode whole groups of eight blocks, k bytes in and n bytes out
+    k, n = code.k, code.n
+    data_mask = (1 << k) - 1
+    encoded = bytearray()
+    for i in range(0, len(data), k):
+        group = int.from_bytes(data[i:i+k], 'big')
+        codewords = 0
+        for shift in range(7 * k, -1, -k):
+            codewords = (codewords << n) | code.encode_block(
+                (group >> shift) & data_mask)
+        encoded += codewords.to_bytes(n, 'big')
+
+    return bytes(encoded)
+
+
+def _decode_groups(code: HammingBlockCode, data: bytes) -> bytes:
+    # Decode whole groups of eight blocks, n bytes in and k bytes out
+    k, n = code.k, code.n
+    codeword_mask = (1 << n) - 1
+    decoded = bytearray()
+    for i in range(0, len(data), n):
+        group = int.from_bytes(data[i:i+n], 'big')
+        blocks = 0
+        for shift in range(7 * n, -1, -n):
+            block, _ = code.decode_block((group >> shift) & codeword_mask)
+            blocks = (blocks << k) | block
+        decoded += blocks.to_bytes(k, 'big')
+
+    return bytes(decoded)
+
+
+def hamming_block_encode(data: bytes, nbits: int,
+                         block_code: Tuple[int, int] = (72, 64)
+                         ) -> Tuple[bytes, int]:
+    """Encode a bit buffer as a series of independent Hamming blocks.
+
+    The payload length is stored in front of the data so the zero padding
+    of the last blocks can be removed again when decoding. Blocks are
+    processed in groups of eight, so k input bytes become n output bytes.
+
+    Args:
+        data (bytes): The packed bits to protect.
+        nbits (int): The number of valid bits in data.
+        block_code (Tuple[int, int], optional): The (n, k) block code.
+            Defaults to the (72, 64) SECDED code.
 
+    Returns:
+        Tuple[bytes, int]: The packed codewords and their number of bits.
+    """
+    encoded = b''.join(hamming_block_encode_stream([data], nbits, block_code))
+    return encoded, len(encoded) * 8
 
-# For better security
-def dynamic_mapping(seed: int) -> Dict[str, str]:
-    """Generate a dynamic mapping for invisible characters based on a seed.
+
+def hamming_block_encode_stream(chunks: Iterable[bytes], nbits: int,
+                                block_code: Tuple[int, int] = (72, 64)
+                                ) -> Iterator[bytes]:
+    """Encode chunks of packed bits as independent Hamming blocks.
 
     Args:
-        seed (int): The seed for the random number generator.
+        chunks (Iterable[bytes]): The packed bits to protect in chunks.
+        nbits (int): The total number of valid bits in all chunks.
+        block_code (Tuple[int, int], optional): The (n, k) block code.
+            Defaults to the (72, 64) SECDED code.
+
+    Yields:
+        bytes: The packed codewords of the next chunk.
+    """
+    code = get_block_code(block_code)
+    pending = nbits.to_bytes(BLOCK_LENGTH_BITS // 8, 'big')
+    for chunk in chunks:
+        pending += chunk
+        full = len(pending) - len(pending) % code.k
+        if full:
+            yield _encode_groups(code, pending[:full])
+            pending = pending[full:]
+
+    if pending:
+        yield _encode_groups(code, pending + bytes(-len(pending) % code.k))
+
+
+def hamming_size(nbits: int, block_code: Tuple[int, int] = None) -> int:
+    """Work out the size of a bit buffer after Hamming encoding.
+
+    Args:
+        nbits (int): The number of bits to protect.
+        block_code (Tuple[int, int], optional): The (n, k) block code.
+            Defaults to None, a single codeword over the whole message.
+
+    Returns:
+        int: The number of encoded bits.
+    """
+    if block_code is None:
+        parity_bits = 0
+        while 2**parity_bits < nbits + parity_bits + 1:
+            parity_bits += 1
+        return nbits + parity_bits
+
+    if block_code not in HAMMING_BLOCK_CODES:
+        raise ValueError(f"Unsupported Hamming block code: {block_code}")
+    n, k = block_code
+    payload_bytes = BLOCK_LENGTH_BITS // 8 + -(-nbits // 8)
+    return -(-payload_bytes // k) * n * 8
+
+
+def hamming_block_decode(data: bytes,
+                         block_code: Tuple[int, int] = (72, 64)
+                         ) -> Tuple[bytes, int]:
+    """Decode a series of Hamming blocks, correcting one error per block.
+
+    Args:
+        data (bytes): The packed codewords.
+        block_code (Tuple[int, int], optional): The (n, k) block code.
+            Defaults to the (72, 64) SECDED code.
 
     Returns:
-        Dict[str, str]: A dict mapping '0' and '1' to invisible characters.
+        Tuple[bytes, int]: The original packed bits and their number.
+
+    Raises:
+        ValueError: If a block holds an uncorrectable error.
     """
-    random.seed(seed)
-    invisible_characters = ['\u200C', '\u200B']
-    random.shuffle(invisible_characters)
+    buffers = list(hamming_block_decode_stream([data], block_code))
+    return (b''.join(chunk for chunk, _ in buffers),
+            sum(nbits for _, nbits in buffers))
+
 
-    return {'0': invisible_characters[0], '1': invisible_characters[1]}
+def hamming_block_decode_stream(chunks: Iterable[bytes],
+                                block_code: Tuple[int, int] = (72, 64)
+                                ) -> Iterator[Tuple[bytes, int]]:
+    """Decode chunks of Hamming blocks, correcting one error per block.
+
+    Args:
+        chunks (Iterable[bytes]): The packed codewords in chunks.
+        block_code (Tuple[int, int], optional): The (n, k) block code.
+            Defaults to the (72, 64) SECDED code.
+
+    Yields:
+        Tuple[bytes, int]: The next packed bits and their number.
+
+    Raises:
+        ValueError: If a block holds an uncorrectable error.
+    """
+    code = get_block_code(block_code)
+    header = BLOCK_LENGTH_BITS // 8
+    remaining = None
+    pending = b''
+    decoded = b''
+    for chunk in chain(chunks, [None]):
+        if chunk is None:
+            # Missing codewords of the last group decode to zero bits
+            pending += bytes(-len(pending) % code.n)
+        else:
+            pending += chunk
+        full = len(pending) - len(pending) % code.n
+        decoded += _decode_groups(code, pending[:full])
+        pending = pending[full:]
+
+        # The payload length is stored in the first bytes
+        if remaining is None:
+            if len(decoded) < header:
+                continue
+            remaining = int.from_bytes(decoded[:header], 'big')
+            decoded = decoded[header:]
+
+        output = decoded[:(remaining + 7) // 8]
+        decoded = b''
+        if output:
+            nbits = min(remaining, len(output) * 8)
+            remaining -= nbits
+            yield output, nbits
 
 
 def encode_message(cover_text: str, hidden_message: str,
-                   inv_chars: Dict[str, str]) -> str:
+                   inv_chars: Dict[str, str],
+                   block_code: Tuple[int, int] = None,
+                   compact_header: bool = False,
+                   backend: str = 'python',
+                   codebook: Dict[str, str] = None,
+                   cache: CodebookCache = None,
+                   allow_overflow: bool = False) -> str:
     """Encode a hidden message and the Huffman codebook into cover text
     using invisible characters and hamming code for error correction.
 
@@ -192,50 +527,63 @@ def encode_message(cover_text: str, hidden_message: str,
         hidden_message (str): The message to be hidden.
         inv_char (dict): A dictionary mapping bits ('0', '1') to
         invisible characters.
+        block_code (Tuple[int, int], optional): The (n, k) Hamming block
+            code, e.g. (7, 4) or (72, 64). Defaults to None, in which case
+            the whole message is encoded as a single codeword.
+        compact_header (bool, optional): Embed the codebook as a compact
+            canonical header instead of JSON. Defaults to False.
+        backend (str, optional): The bit conversion backend, 'python',
+            'numpy' or 'auto'. Defaults to 'python'.
+        codebook (dict, optional): A shared codebook, e.g. one read with
+            read_codebook. It is not embedded, so the receiver must pass
+            the same codebook to decode_message. Defaults to None.
+        cache (CodebookCache, optional): A cache of codebooks built for
+            earlier messages. Defaults to None.
+        allow_overflow (bool, optional): Put the invisible characters that
+            do not fit after the last word instead of raising. Defaults to
+            False.
 
     Returns:
         str: The resulting stego object containing the hidden message.
-    """
-    # Huffman encode the hidden message
-    huffman_encoded, codebook = huffman_encode(hidden_message)
 
-    # Serialize the Huffman codebook
-    serialized_codebook = json.dumps(codebook)
+    Raises:
+        ValueError: If the message needs more invisible characters than
+            the cover text has words, unless allow_overflow is set.
+    """
+    # Choose the codebook and check the encoded size before encoding
+    shared_codebook = codebook is not None
+    frequencies = Counter(hidden_message)
+    codebook = message_codebook(frequencies, codebook, cache)
+    if not allow_overflow:
+        nbits = hamming_size(huffman_size(frequencies, codebook), block_code)
+        check_fit(cover_text, symbol_count(nbits, symbol_size(inv_chars)))
 
-    # Convert serialized codebook to binary and encode it
-    codebook_binary = ''.join(format(ord(char), '08b')
-                              for char in serialized_codebook)
-    encoded_codebook = ''.join(inv_chars[bit] for bit in codebook_binary)
+    # Huffman encode the hidden message
+    packed, nbits, _ = huffman_encode(hidden_message, codebook)
 
     # Hamming encode the Huffman-encoded message and convert to inv chars
-    hamming_encoded = hamming_encode(huffman_encoded)
-    invisible_message = ''.join(inv_chars[bit] for bit in hamming_encoded)
-
-    # Split cover text into words
-    words = cover_text.split()
-    stego_object = []
-    char_index = 0
-
-    # Distribute invisible characters between words
-    for word in words:
-        stego_object.append(word)
-        if char_index < len(invisible_message):
-            stego_object.append(invisible_message[char_index])
-            char_index += 1
-
-    # Append remaining invisible characters of the message
-    if char_index < len(invisible_message):
-        stego_object.append(invisible_message[char_index:])
-
-    # Add separator and encode the serialized codebook
-    separator = '\u200D'
-    stego_object.append(separator)
-    stego_object.append(encoded_codebook)
+    if block_code is None:
+        packed, nbits = hamming_encode_buffer(packed, nbits)
+    else:
+        packed, nbits = hamming_block_encode(packed, nbits, block_code)
+    invisible_message = bytes_to_invisible(packed, inv_chars, nbits, backend)
+
+    # Add the separator and the serialized codebook behind the message
+    trailing = ()
+    if not shared_codebook:
+        separator = '\u200D'
+        trailing = (separator, bytes_to_invisible(
+            dump_codebook(codebook, compact_header), inv_chars,
+            backend=backend))
 
-    return ' '.join(stego_object)
+    # Splice one invisible character in after every word of the cover text
+    return splice(cover_text, invisible_message, trailing)
 
 
-def decode_message(stego_object: str, inv_chars: Dict[str, str]) -> str:
+def decode_message(stego_object: str, inv_chars: Dict[str, str],
+                   block_code: Tuple[int, int] = None,
+                   backend: str = 'python',
+                   codebook: Dict[str, str] = None) -> str:
     """Extracts the binary message from the invisible characters embedded in
     the stego object and converts it back to the original hidden message.
 
@@ -243,27 +591,272 @@ def decode_message(stego_object: str, inv_chars: Dict[str, str]) -> str:
         stego_object (str): The stego object containing the hidden message.
         inv_chars (dict): A dictionary mapping bits ('0', '1') to invisible
         characters.
+        block_code (Tuple[int, int], optional): The (n, k) Hamming block
+            code used when encoding. Defaults to None (single codeword).
+        backend (str, optional): The bit conversion backend, 'python',
+            'numpy' or 'auto'. Defaults to 'python'.
+        codebook (dict, optional): The shared codebook the message was
+            encoded with, if it is not embedded. Defaults to None.
 
     Returns:
         str: The decoded hidden message.
     """
     # Extract invisible characters and separator
     separator = '\u200D'
-    invisible_parts = ''.join(c for c in stego_object
-                              if c in inv_chars.values() or c == separator)
-    encoded_message, encoded_codebook = invisible_parts.split(separator)
+    invisible_parts = extract_invisible(stego_object,
+                                        (*inv_chars.values(), separator))
+    encoded_message, _, encoded_codebook = invisible_parts.partition(separator)
 
     # Decode the Huffman codebook
-    inverted_mapping = {v: k for k, v in inv_chars.items()}
-    codebook_binary = ''.join(inverted_mapping[c] for c in encoded_codebook)
-    serialized_codebook = ''.join(chr(int(codebook_binary[i:i+8], 2))
-                                  for i in range(0, len(codebook_binary), 8))
-    codebook = json.loads(serialized_codebook)
+    if codebook is None:
+        codebook_bytes, _ = invisible_to_bytes(encoded_codebook, inv_chars,
+                                               backend)
+        codebook = load_codebook(codebook_bytes)
 
     # Decode the hidden message
-    hamming_encoded = ''.join(inverted_mapping[c] for c in encoded_message)
-    huffman_encoded = hamming_decode(hamming_encoded)
-    return huffman_decode(huffman_encoded, codebook)
+    packed, nbits = invisible_to_bytes(encoded_message, inv_chars, backend)
+    if block_code is None:
+        packed, nbits = hamming_decode_buffer(packed, nbits)
+    else:
+        packed, nbits = hamming_block_decode(packed, block_code)
+    return huffman_decode(packed, nbits, codebook)
+
+
+def encode_bytes(cover_text: str, payload: Union[bytes, memoryview],
+                 inv_chars: Dict[str, str],
+                 block_code: Tuple[int, int] = None,
+                 compact_header: bool = False,
+                 backend: str = 'python',
+                 codebook: Dict[str, str] = None,
+                 cache: CodebookCache = None,
+                 allow_overflow: bool = False) -> str:
+    """Huffman and Hamming encode a binary payload and embed it with its
+    codebook.
+
+    The byte values are Huffman coded as the characters U+0000 to U+00FF,
+    as in huffman_encoding.encode_bytes.
+
+    Args:
+        cover_text (str): The cover text to embed the payload into.
+        payload (Union[bytes, memoryview]): The bytes to hide.
+        inv_char (dict): A dictionary mapping bits ('0', '1') to
+        invisible characters.
+        block_code (Tuple[int, int], optional): The (n, k) Hamming block
+            code, see encode_message. Defaults to None.
+        compact_header (bool, optional): Embed the codebook as a compact
+            canonical header instead of JSON. Defaults to False.
+        backend (str, optional): The bit conversion backend, 'python',
+            'numpy' or 'auto'. Defaults to 'python'.
+        codebook (dict, optional): A shared codebook, see encode_message.
+            Defaults to None.
+        cache (CodebookCache, optional): A cache of codebooks built for
+            earlier payloads. Defaults to None.
+        allow_overflow (bool, optional): See encode_message. Defaults to
+            False.
+
+    Returns:
+        str: The resulting stego object containing the payload.
+
+    Raises:
+        ValueError: If the payload needs more invisible characters than
+            the cover text has words, unless allow_overflow is set.
+    """
+    return encode_message(cover_text, bytes_to_text(payload), inv_chars,
+                          block_code, compact_header, backend, codebook,
+                          cache, allow_overflow)
+
+
+def decode_bytes(stego_object: str, inv_chars: Dict[str, str],
+                 block_code: Tuple[int, int] = None,
+                 backend: str = 'python',
+                 codebook: Dict[str, str] = None) -> bytes:
+    """Extract and error-correct a binary payload embedded with
+    encode_bytes.
+
+    Args:
+        stego_object (str): The stego object containing the payload.
+        inv_chars (dict): A dictionary mapping bits ('0', '1') to invisible
+        characters.
+        block_code (Tuple[int, int], optional): The (n, k) Hamming block
+            code used when encoding. Defaults to None (single codeword).
+        backend (str, optional): The bit conversion backend, 'python',
+            'numpy' or 'auto'. Defaults to 'python'.
+        codebook (dict, optional): The shared codebook the payload was
+            encoded with, if it is not embedded. Defaults to None.
+
+    Returns:
+        bytes: The payload.
+    """
+    return text_to_bytes(decode_message(stego_object, inv_chars, block_code,
+                                        backend, codebook))
+
+
+def encode_batch(pairs: Iterable[Tuple[str, str]],
+                 inv_chars: Dict[str, str],
+                 block_code: Tuple[int, int] = None,
+                 compact_header: bool = False, backend: str = 'python',
+                 codebook: Dict[str, str] = None,
+                 cache: CodebookCache = None,
+                 workers: int = 1,
+                 allow_overflow: bool = False) -> Iterator[str]:
+    """Huffman and Hamming encode many hidden messages into many cover
+    texts. The lookup tables of a block code are shared by all messages.
+
+    Args:
+        pairs (Iterable[Tuple[str, str]]): (cover text, hidden message)
+            pairs.
+        inv_chars (dict): A dictionary mapping bits ('0', '1') to
+            invisible characters.
+        block_code (Tuple[int, int], optional): The Hamming block code, see
+            encode_message. Defaults to None.
+        compact_header (bool, optional): Embed the codebooks as compact
+            canonical headers instead of JSON. Defaults to False.
+        backend (str, optional): The bit conversion backend, 'python',
+            'numpy' or 'auto'. Defaults to 'python'.
+        codebook (dict, optional): A shared codebook for all messages.
+            Defaults to None.
+        cache (CodebookCache, optional): A cache of codebooks. Defaults to
+            None, a new cache for this batch.
+        workers (int, optional): Number of worker processes, see
+            batch.map_batch. Defaults to 1.
+        allow_overflow (bool, optional): See encode_message. Defaults to
+            False.
+
+    Returns:
+        Iterator[str]: The stego objects, in the order of the pairs.
+    """
+    if codebook is None and cache is None:
+        cache = CodebookCache()
+    encode = partial(encode_message, inv_chars=inv_chars,
+                     block_code=block_code, compact_header=compact_header,
+                     backend=backend, codebook=codebook, cache=cache,
+                     allow_overflow=allow_overflow)
+    return map_batch(encode, pairs, workers)
+
+
+def decode_batch(stego_objects: Iterable[str], inv_chars: Dict[str, str],
+                 block_code: Tuple[int, int] = None,
+                 backend: str = 'python', codebook: Dict[str, str] = None,
+                 workers: int = 1) -> Iterator[str]:
+    """Decode and error-correct the messages of many stego objects.
+
+    Args:
+        stego_objects (Iterable[str]): The stego objects.
+        inv_chars (dict): A dictionary mapping bits ('0', '1') to
+            invisible characters.
+        block_code (Tuple[int, int], optional): The Hamming block code the
+            messages were encoded with. Defaults to None.
+        backend (str, optional): The bit conversion backend, 'python',
+            'numpy' or 'auto'. Defaults to 'python'.
+        codebook (dict, optional): The shared codebook, if any. Defaults to
+            None.
+        workers (int, optional): Number of worker processes, see
+            batch.map_batch. Defaults to 1.
+
+    Returns:
+        Iterator[str]: The decoded messages, in the order of the stego
+        objects.
+    """
+    decode = partial(decode_message, inv_chars=inv_chars,
+                     block_code=block_code, backend=backend,
+                     codebook=codebook)
+    return map_batch(decode, ((stego_object,) for stego_object in
+                              stego_objects), workers)
+
+
+def encode_stream(cover_file: TextIO, message_file: TextIO,
+                  output_file: TextIO, inv_chars: Dict[str, str],
+                  block_code: Tuple[int, int] = (72, 64),
+                  compact_header: bool = False,
+                  chunk_size: int = CHUNK_SIZE):
+    """Encode a hidden message and the Huffman codebook into cover text
+    with Hamming block codes, reading and writing files in chunks.
+
+    A single codeword over the whole message cannot be streamed, so a
+    block code is required. message_file must be seekable because it is
+    read twice. The output is the same as that of encode_message with
+    allow_overflow set; the cover text is read only once, as the stego
+    object is written, so a message that does not fit is not rejected.
+
+    Args:
+        cover_file (TextIO): The cover text to embed the hidden message into.
+        message_file (TextIO): The message to be hidden.
+        output_file (TextIO): The file the stego object is written to.
+        inv_char (dict): A dictionary mapping bits ('0', '1') to
+        invisible characters.
+        block_code (Tuple[int, int], optional): The (n, k) Hamming block
+            code. Defaults to the (72, 64) SECDED code.
+        compact_header (bool, optional): Embed the codebook as a compact
+            canonical header instead of JSON. Defaults to False.
+        chunk_size (int, optional): The number of characters read at once.
+    """
+    if block_code is None:
+        raise ValueError("Streaming requires a Hamming block code")
+
+    # Count the characters and build the codebook
+    frequencies = Counter()
+    for chunk in iter_chunks(message_file, chunk_size):
+        frequencies.update(chunk)
+    codebook = build_codebook(frequencies)
+    encoded_codebook = bytes_to_invisible(
+        dump_codebook(codebook, compact_header), inv_chars)
+    nbits = sum(frequencies[char] * len(code)
+                for char, code in codebook.items())
+
+    # Huffman encode and Hamming encode the message chunk by chunk
+    message_file.seek(0)
+    buffers = huffman_encode_stream(iter_chunks(message_file, chunk_size),
+                                    codebook)
+    codewords = hamming_block_encode_stream(
+        (data for data, _ in buffers), nbits, block_code)
+    invisible_chunks = iter_symbols(map(bytes_to_bits, codewords), inv_chars)
+
+    runs = iter_runs(iter_chunks(cover_file, chunk_size))
+    separator = '\u200D'
+    write_pieces(splice_runs(runs, invisible_chunks,
+                             (separator, encoded_codebook)), output_file)
+
+
+def decode_stream(stego_file: TextIO, output_file: TextIO,
+                  inv_chars: Dict[str, str],
+                  block_code: Tuple[int, int] = (72, 64),
+                  chunk_size: int = CHUNK_SIZE):
+    """Extract a hidden message from a stego object file in chunks,
+    correcting one error per Hamming block.
+
+    The codebook follows the message, so the stego object is read twice
+    and stego_file must be seekable.
+
+    Args:
+        stego_file (TextIO): The stego object containing the hidden message.
+        output_file (TextIO): The file the decoded message is written to.
+        inv_chars (dict): A dictionary mapping bits ('0', '1') to invisible
+        characters.
+        block_code (Tuple[int, int], optional): The (n, k) Hamming block
+            code used when encoding. Defaults to the (72, 64) SECDED code.
+        chunk_size (int, optional): The number of characters read at once.
+    """
+    if block_code is None:
+        raise ValueError("Streaming requires a Hamming block code")
+    separator = '\u200D'
+    chars = (*inv_chars.values(), separator)
+
+    # Decode the Huffman codebook behind the separator
+    invisible_chunks = iter_invisible(iter_chunks(stego_file, chunk_size),
+                                      chars)
+    encoded_codebook = ''.join(iter_after(invisible_chunks, separator))
+    codebook_bytes, _ = invisible_to_bytes(encoded_codebook, inv_chars)
+    codebook = load_codebook(codebook_bytes)
+
+    # Decode the hidden message in front of the separator
+    stego_file.seek(0)
+    invisible_chunks = iter_invisible(iter_chunks(stego_file, chunk_size),
+                                      chars)
+    buffers = iter_bit_buffers(iter_before(invisible_chunks, separator),
+                               inv_chars)
+    decoded = hamming_block_decode_stream((data for data, _ in buffers),
+                                          block_code)
+    write_pieces(huffman_decode_stream(decoded, codebook), output_file)
 
 
 def main():
@@ -278,7 +871,8 @@ def main():
     seed = 11
     invisible_chars = dynamic_mapping(seed)
 
-    stego_object = encode_message(cover_text, hidden_message, invisible_chars)
+    stego_object = encode_message(cover_text, hidden_message, invisible_chars,
+                                  allow_overflow=True)
     decoded_hidden_message = decode_message(stego_object, invisible_chars)
 
     # For debugging purposes
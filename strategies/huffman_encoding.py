@@ -1,212 +1,342 @@
-import json
 from collections import Counter
-from queue import PriorityQueue
-from typing import Dict, Tuple
-import random
+from functools import partial
+from typing import Dict, Iterable, Iterator, TextIO, Tuple, Union
+
+from strategies.batch import map_batch
+from strategies.bit_buffer import (bytes_to_invisible, bytes_to_text,
+                                   extract_invisible, invisible_to_bytes,
+                                   symbol_count, symbol_size, text_to_bytes)
+from strategies.canonical_huffman import (CodebookCache, build_codebook,
+                                          dump_codebook, huffman_decode,
+                                          huffman_decode_stream,
+                                          huffman_encode, huffman_size,
+                                          load_codebook, message_codebook)
+from strategies.dynamic_mapping import dynamic_mapping
+from strategies.placement import check_fit, splice
+from strategies.streaming import (CHUNK_SIZE, iter_after, iter_before,
+                                  iter_bit_buffers, iter_chunks,
+                                  iter_invisible, iter_runs, iter_symbols,
+                                  splice_runs, write_pieces)
+
+
+def train_codebook(texts: Iterable[str], alphabet: str = '') -> Dict[str, str]:
+    """Builds a shared codebook from sample texts, e.g. of one language.
 
+    Args:
+        texts (Iterable[str]): The sample texts.
+        alphabet (str, optional): Characters that must be in the codebook
+            even if the samples do not contain them. Defaults to ''.
 
-# For better payload capacity
-class HuffmanNode:
-    def __init__(self, char: str, freq: int):
-        self.char = char
-        self.freq = freq
-        self.left = None
-        self.right = None
+    Returns:
+        dict: The canonical codebook, to be stored with save_codebook.
+    """
+    frequencies = Counter(alphabet)
+    for text in texts:
+        frequencies.update(text)
 
-    def __lt__(self, other):
-        return self.freq < other.freq
+    return build_codebook(frequencies)
 
 
-def build_huffman_tree(hidden_message: str) -> HuffmanNode:
-    """Builds a Huffman tree for the given hidden message.
+def encode_message(cover_text: str, hidden_message: str,
+                   inv_chars: Dict[str, str],
+                   compact_header: bool = False,
+                   backend: str = 'python',
+                   codebook: Dict[str, str] = None,
+                   cache: CodebookCache = None,
+                   allow_overflow: bool = False) -> str:
+    """Encode a hidden message and the Huffman codebook into cover text
+    using invisible characters.
 
     Args:
-        text (str): The message for which the Huffman tree will be built.
+        cover_text (str): The cover text to embed the hidden message into.
+        hidden_message (str): The message to be hidden.
+        inv_char (dict): A dictionary mapping bits ('0', '1') to
+        invisible characters.
+        compact_header (bool, optional): Embed the codebook as a compact
+            canonical header instead of JSON. Defaults to False.
+        backend (str, optional): The bit conversion backend, 'python',
+            'numpy' or 'auto'. Defaults to 'python'.
+        codebook (dict, optional): A shared codebook, e.g. one read with
+            read_codebook. It is not embedded, so the receiver must pass
+            the same codebook to decode_message. Defaults to None.
+        cache (CodebookCache, optional): A cache of codebooks built for
+            earlier messages. Defaults to None.
+        allow_overflow (bool, optional): Put the invisible characters that
+            do not fit after the last word instead of raising. Defaults to
+            False.
 
     Returns:
-        HuffmanNode: The root node of the constructed Huffman tree.
+        str: The resulting stego object containing the hidden message.
+
+    Raises:
+        ValueError: If the message needs more invisible characters than
+            the cover text has words, unless allow_overflow is set.
     """
-    freq = Counter(hidden_message)
-    pq = PriorityQueue()
+    # Choose the codebook and check the encoded size before encoding
+    shared_codebook = codebook is not None
+    frequencies = Counter(hidden_message)
+    codebook = message_codebook(frequencies, codebook, cache)
+    if not allow_overflow:
+        check_fit(cover_text, symbol_count(huffman_size(frequencies, codebook),
+                                           symbol_size(inv_chars)))
 
-    for char, count in freq.items():
-        pq.put(HuffmanNode(char, count))
+    # Huffman encode the hidden message
+    packed, nbits, _ = huffman_encode(hidden_message, codebook)
+
+    # Convert the packed Huffman-encoded message to invisible characters
+    invisible_message = bytes_to_invisible(packed, inv_chars, nbits, backend)
 
-    while pq.qsize() > 1:
-        left = pq.get()
-        right = pq.get()
-        merged = HuffmanNode(None, left.freq + right.freq)
-        merged.left = left
-        merged.right = right
-        pq.put(merged)
+    # Add the separator and the serialized codebook behind the message
+    trailing = ()
+    if not shared_codebook:
+        separator = '\u200D'
+        trailing = (separator, bytes_to_invisible(
+            dump_codebook(codebook, compact_header), inv_chars,
+            backend=backend))
 
-    return pq.get()
+    # Splice one invisible character in after every word of the cover text
+    return splice(cover_text, invisible_message, trailing)
 
 
-def generate_huffman_codes(node: HuffmanNode, prefix: str = "",
-                           codebook: Dict[str, str] = None) -> Dict[str, str]:
-    """Generates Huffman codes for characters based on a Huffman tree.
+def decode_message(stego_object: str, inv_chars: Dict[str, str],
+                   backend: str = 'python',
+                   codebook: Dict[str, str] = None) -> str:
+    """Extracts the binary message from the invisible characters embedded in
+    the stego object and converts it back to the original hidden message.
 
     Args:
-        node (HuffmanNode): The root node of the Huffman tree
-        prefix (str, optional): The current prefix of the binary code
-            during traversal. Defaults to an empty string.
-        codebook (dict, optional): A dictionary to store the generated
-            codes. Defaults to None, in which case a new dictionary is created.
+        stego_object (str): The stego object containing the hidden message.
+        inv_chars (dict): A dictionary mapping bits ('0', '1') to invisible
+        characters.
+        backend (str, optional): The bit conversion backend, 'python',
+            'numpy' or 'auto'. Defaults to 'python'.
+        codebook (dict, optional): The shared codebook the message was
+            encoded with, if it is not embedded. Defaults to None.
 
     Returns:
-        dict: A dictionary containing characters as keys and
-        their corresponding Huffman codes as values.
+        str: The decoded hidden message.
     """
+    # Extract invisible characters and separator
+    separator = '\u200D'
+    invisible_parts = extract_invisible(stego_object,
+                                        (*inv_chars.values(), separator))
+    encoded_message, _, encoded_codebook = invisible_parts.partition(separator)
+
+    # Decode the Huffman codebook
     if codebook is None:
-        codebook = {}
-    if node is not None:
-        if node.char is not None:
-            codebook[node.char] = prefix
-        generate_huffman_codes(node.left, prefix + "0", codebook)
-        generate_huffman_codes(node.right, prefix + "1", codebook)
+        codebook_bytes, _ = invisible_to_bytes(encoded_codebook, inv_chars,
+                                               backend)
+        codebook = load_codebook(codebook_bytes)
+
+    # Decode the hidden message
+    packed, nbits = invisible_to_bytes(encoded_message, inv_chars, backend)
+    decoded_message = huffman_decode(packed, nbits, codebook)
+
+    return decoded_message
 
-    return codebook
 
+def encode_bytes(cover_text: str, payload: Union[bytes, memoryview],
+                 inv_chars: Dict[str, str],
+                 compact_header: bool = False,
+                 backend: str = 'python',
+                 codebook: Dict[str, str] = None,
+                 cache: CodebookCache = None,
+                 allow_overflow: bool = False) -> str:
+    """Huffman encode a binary payload and embed it with its codebook.
 
-def huffman_encode(hidden_message: str) -> Tuple[str, Dict[str, str]]:
-    """Encodes a hidden message using Huffman coding.
+    The byte values are the symbols of the code. They are kept as the
+    characters U+0000 to U+00FF (a single latin-1 decode), so the codebook
+    and its header are the same as for text.
 
     Args:
-        hidden_message (str): The hidden message to be encoded
+        cover_text (str): The cover text to embed the payload into.
+        payload (Union[bytes, memoryview]): The bytes to hide.
+        inv_char (dict): A dictionary mapping bits ('0', '1') to
+        invisible characters.
+        compact_header (bool, optional): Embed the codebook as a compact
+            canonical header instead of JSON. Defaults to False.
+        backend (str, optional): The bit conversion backend, 'python',
+            'numpy' or 'auto'. Defaults to 'python'.
+        codebook (dict, optional): A shared codebook, see encode_message.
+            Defaults to None.
+        cache (CodebookCache, optional): A cache of codebooks built for
+            earlier payloads. Defaults to None.
+        allow_overflow (bool, optional): See encode_message. Defaults to
+            False.
 
     Returns:
-        Tuple[str, dict]: A tuple containing the encoded text
-        as a binary string and the corresponding codebook.
-    """
-    tree = build_huffman_tree(hidden_message)
-    codebook = generate_huffman_codes(tree)
-    huffman_encoded = ''.join(codebook[char] for char in hidden_message)
+        str: The resulting stego object containing the payload.
 
-    return huffman_encoded, codebook
+    Raises:
+        ValueError: If the payload needs more invisible characters than
+            the cover text has words, unless allow_overflow is set.
+    """
+    return encode_message(cover_text, bytes_to_text(payload), inv_chars,
+                          compact_header, backend, codebook, cache,
+                          allow_overflow)
 
 
-def huffman_decode(binary_message: str, codebook: Dict[str, str]) -> str:
-    """uses the given Huffman codebook to decode a binary
-    string back into the original text.
+def decode_bytes(stego_object: str, inv_chars: Dict[str, str],
+                 backend: str = 'python',
+                 codebook: Dict[str, str] = None) -> bytes:
+    """Extract a binary payload embedded with encode_bytes.
 
     Args:
-        binary_message (str): The binary string encoded using Huffman coding.
-        codebook (Dict[str, str]): The Huffman codebook.
+        stego_object (str): The stego object containing the payload.
+        inv_chars (dict): A dictionary mapping bits ('0', '1') to invisible
+        characters.
+        backend (str, optional): The bit conversion backend, 'python',
+            'numpy' or 'auto'. Defaults to 'python'.
+        codebook (dict, optional): The shared codebook the payload was
+            encoded with, if it is not embedded. Defaults to None.
 
     Returns:
-        str: The decoded hidden message.
+        bytes: The payload.
     """
-    reverse_codebook = {v: k for k, v in codebook.items()}
-    decoded_text = ""
-    buffer = ""
-    for bit in binary_message:
-        buffer += bit
-        if buffer in reverse_codebook:
-            decoded_text += reverse_codebook[buffer]
-            buffer = ""
-
-    return decoded_text
+    return text_to_bytes(decode_message(stego_object, inv_chars, backend,
+                                        codebook))
 
 
-# For better security
-def dynamic_mapping(seed: int) -> Dict[str, str]:
-    """Generate a dynamic mapping for invisible characters based on a seed.
+def encode_batch(pairs: Iterable[Tuple[str, str]],
+                 inv_chars: Dict[str, str],
+                 compact_header: bool = False,
+                 backend: str = 'python', codebook: Dict[str, str] = None,
+                 cache: CodebookCache = None,
+                 workers: int = 1,
+                 allow_overflow: bool = False) -> Iterator[str]:
+    """Huffman encode many hidden messages into many cover texts.
 
     Args:
-        seed (int): The seed for the random number generator.
+        pairs (Iterable[Tuple[str, str]]): (cover text, hidden message)
+            pairs.
+        inv_chars (dict): A dictionary mapping bits ('0', '1') to
+        invisible characters.
+        compact_header (bool, optional): Embed the codebooks as compact
+            canonical headers instead of JSON. Defaults to False.
+        backend (str, optional): The bit conversion backend, 'python',
+            'numpy' or 'auto'. Defaults to 'python'.
+        codebook (dict, optional): A shared codebook for all messages, see
+            encode_message. Defaults to None.
+        cache (CodebookCache, optional): A cache of codebooks. Defaults to
+            None, a new cache for this batch, so messages with the same
+            character counts share one codebook.
+        workers (int, optional): Number of worker processes, see
+            batch.map_batch. Defaults to 1.
+        allow_overflow (bool, optional): See encode_message. Defaults to
+            False.
 
     Returns:
-        Dict[str, str]: A dict mapping '0' and '1' to invisible characters.
+        Iterator[str]: The stego objects, in the order of the pairs.
     """
-    random.seed(seed)
-    invisible_characters = ['\u200C', '\u200B']
-    random.shuffle(invisible_characters)
-
-    return {'0': invisible_characters[0], '1': invisible_characters[1]}
+    if codebook is None and cache is None:
+        cache = CodebookCache()
+    encode = partial(encode_message, inv_chars=inv_chars,
+                     compact_header=compact_header, backend=backend,
+                     codebook=codebook, cache=cache,
+                     allow_overflow=allow_overflow)
+    return map_batch(encode, pairs, workers)
 
 
-def encode_message(cover_text: str, hidden_message: str,
-                   inv_chars: Dict[str, str]) -> str:
-    """Encode a hidden message and the Huffman codebook into cover text
-    using invisible characters.
+def decode_batch(stego_objects: Iterable[str], inv_chars: Dict[str, str],
+                 backend: str = 'python', codebook: Dict[str, str] = None,
+                 workers: int = 1) -> Iterator[str]:
+    """Decode the Huffman-encoded messages of many stego objects.
 
     Args:
-        cover_text (str): The cover text to embed the hidden message into.
-        hidden_message (str): The message to be hidden.
-        inv_char (dict): A dictionary mapping bits ('0', '1') to
+        stego_objects (Iterable[str]): The stego objects.
+        inv_chars (dict): A dictionary mapping bits ('0', '1') to
         invisible characters.
+        backend (str, optional): The bit conversion backend, 'python',
+            'numpy' or 'auto'. Defaults to 'python'.
+        codebook (dict, optional): The shared codebook, if the messages were
+            encoded with one. Defaults to None.
+        workers (int, optional): Number of worker processes, see
+            batch.map_batch. Defaults to 1.
 
     Returns:
-        str: The resulting stego object containing the hidden message.
+        Iterator[str]: The decoded messages, in the order of the stego
+        objects.
     """
-    # Huffman encode the hidden message
-    huffman_encoded, codebook = huffman_encode(hidden_message)
-
-    # Serialize the Huffman codebook
-    serialized_codebook = json.dumps(codebook)
-
-    # Convert serialized codebook to binary and encode it
-    codebook_binary = ''.join(format(ord(char), '08b')
-                              for char in serialized_codebook)
-    encoded_codebook = ''.join(inv_chars[bit] for bit in codebook_binary)
+    decode = partial(decode_message, inv_chars=inv_chars, backend=backend,
+                     codebook=codebook)
+    return map_batch(decode, ((stego_object,) for stego_object in
+                              stego_objects), workers)
 
-    # Convert Huffman-encoded message to invisible characters
-    invisible_message = ''.join(inv_chars[bit] for bit in huffman_encoded)
 
-    # Distribute invisible characters between words in the cover text
-    words = cover_text.split()
-    stego_object = []
-    char_index = 0
+def encode_stream(cover_file: TextIO, message_file: TextIO,
+                  output_file: TextIO, inv_chars: Dict[str, str],
+                  compact_header: bool = False,
+                  chunk_size: int = CHUNK_SIZE):
+    """Encode a hidden message and the Huffman codebook into cover text,
+    reading and writing files in chunks.
 
-    for word in words:
-        stego_object.append(word)
-        if char_index < len(invisible_message):
-            stego_object.append(invisible_message[char_index])
-            char_index += 1
+    The message is read twice, once to count the characters and once to
+    encode them, so message_file must be seekable. The output is the same
+    as that of encode_message with allow_overflow set; the cover text is
+    read only once, as the stego object is written, so its words are not
+    counted up front.
 
-    # Append remaining invisible characters of the message
-    if char_index < len(invisible_message):
-        stego_object.append(invisible_message[char_index:])
-
-    # Add separator and encode the serialized codebook
+    Args:
+        cover_file (TextIO): The cover text to embed the hidden message into.
+        message_file (TextIO): The message to be hidden.
+        output_file (TextIO): The file the stego object is written to.
+        inv_char (dict): A dictionary mapping bits ('0', '1') to
+        invisible characters.
+        compact_header (bool, optional): Embed the codebook as a compact
+            canonical header instead of JSON. Defaults to False.
+        chunk_size (int, optional): The number of characters read at once.
+    """
+    # Count the characters and build the codebook
+    frequencies = Counter()
+    for chunk in iter_chunks(message_file, chunk_size):
+        frequencies.update(chunk)
+    codebook = build_codebook(frequencies)
+    encoded_codebook = bytes_to_invisible(
+        dump_codebook(codebook, compact_header), inv_chars)
+
+    # Huffman encode the message chunk by chunk
+    message_file.seek(0)
+    bit_chunks = (''.join(map(codebook.__getitem__, chunk))
+                  for chunk in iter_chunks(message_file, chunk_size))
+    invisible_chunks = iter_symbols(bit_chunks, inv_chars)
+
+    runs = iter_runs(iter_chunks(cover_file, chunk_size))
     separator = '\u200D'
-    stego_object.append(separator)
-    stego_object.append(encoded_codebook)
+    write_pieces(splice_runs(runs, invisible_chunks,
+                             (separator, encoded_codebook)), output_file)
 
-    return ' '.join(stego_object)
 
+def decode_stream(stego_file: TextIO, output_file: TextIO,
+                  inv_chars: Dict[str, str], chunk_size: int = CHUNK_SIZE):
+    """Extract a hidden message from a stego object file in chunks.
 
-def decode_message(stego_object: str, inv_chars: Dict[str, str]) -> str:
-    """Extracts the binary message from the invisible characters embedded in
-    the stego object and converts it back to the original hidden message.
+    The codebook follows the message, so the stego object is read twice
+    and stego_file must be seekable.
 
     Args:
-        stego_object (str): The stego object containing the hidden message.
+        stego_file (TextIO): The stego object containing the hidden message.
+        output_file (TextIO): The file the decoded message is written to.
         inv_chars (dict): A dictionary mapping bits ('0', '1') to invisible
         characters.
-
-    Returns:
-        str: The decoded hidden message.
+        chunk_size (int, optional): The number of characters read at once.
     """
-    # Extract invisible characters and separator
     separator = '\u200D'
-    invisible_parts = ''.join(c for c in stego_object
-                              if c in inv_chars.values() or c == separator)
-    encoded_message, encoded_codebook = invisible_parts.split(separator)
+    chars = (*inv_chars.values(), separator)
 
-    # Decode the Huffman codebook
-    inverted_mapping = {v: k for k, v in inv_chars.items()}
-    codebook_binary = ''.join(inverted_mapping[c] for c in encoded_codebook)
-    serialized_codebook = ''.join(chr(int(codebook_binary[i:i+8], 2))
-                                  for i in range(0, len(codebook_binary), 8))
-    codebook = json.loads(serialized_codebook)
-
-    # Decode the hidden message
-    huffman_encoded = ''.join(inverted_mapping[c] for c in encoded_message)
-    decoded_message = huffman_decode(huffman_encoded, codebook)
+    # Decode the Huffman codebook behind the separator
+    invisible_chunks = iter_invisible(iter_chunks(stego_file, chunk_size),
+                                      chars)
+    encoded_codebook = ''.join(iter_after(invisible_chunks, separator))
+    codebook_bytes, _ = invisible_to_bytes(encoded_codebook, inv_chars)
+    codebook = load_codebook(codebook_bytes)
 
-    return decoded_message
+    # Decode the hidden message in front of the separator
+    stego_file.seek(0)
+    invisible_chunks = iter_invisible(iter_chunks(stego_file, chunk_size),
+                                      chars)
+    buffers = iter_bit_buffers(iter_before(invisible_chunks, separator),
+                               inv_chars)
+    write_pieces(huffman_decode_stream(buffers, codebook), output_file)
 
 
 def main():
@@ -220,7 +350,8 @@ def main():
 
     seed = 11
     invisible_chars = dynamic_mapping(seed)
-    stego_object = encode_message(cover_text, hidden_message, invisible_chars)
+    stego_object = encode_message(cover_text, hidden_message, invisible_chars,
+                                  allow_overflow=True)
     decoded_message = decode_message(stego_object, invisible_chars)
 
     # For debugging purposes
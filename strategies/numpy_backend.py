@@ -0,0 +1,58 @@
+from typing import Dict, Tuple
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+
+# Vectorized conversions between packed bits and invisible characters.
+# Used by strategies.bit_buffer when the 'numpy' backend is selected.
+HAVE_NUMPY = np is not None
+
+
+def bytes_to_invisible(data: bytes, inv_chars: Dict[str, str],
+                       nbits: int = None) -> str:
+    """Convert a bit buffer into invisible characters with NumPy.
+
+    The bits are unpacked with np.unpackbits and used as indices into an
+    array of the two code points, which is decoded as UTF-32 in one go.
+
+    Args:
+        data (bytes): The packed bits.
+        inv_chars (Dict[str, str]): A dictionary mapping bits ('0', '1') to
+            invisible characters.
+        nbits (int, optional): The number of valid bits. Defaults to None,
+            in which case all bits of data are used.
+
+    Returns:
+        str: One invisible character per bit.
+    """
+    bits = np.unpackbits(np.frombuffer(data, dtype=np.uint8), count=nbits)
+    code_points = np.array([ord(inv_chars['0']), ord(inv_chars['1'])],
+                           dtype='<u4')
+
+    return code_points[bits].tobytes().decode('utf-32-le')
+
+
+def invisible_to_bytes(text: str,
+                       inv_chars: Dict[str, str]) -> Tuple[bytes, int]:
+    """Convert the invisible characters of a text into a bit buffer.
+
+    The text is viewed as an array of UTF-32 code points; all characters
+    other than the two invisible ones are masked out.
+
+    Args:
+        text (str): The text holding the invisible characters.
+        inv_chars (Dict[str, str]): A dictionary mapping bits ('0', '1') to
+            invisible characters.
+
+    Returns:
+        Tuple[bytes, int]: The packed bits and the number of bits.
+    """
+    code_points = np.frombuffer(text.encode('utf-32-le'), dtype='<u4')
+    zero, one = ord(inv_chars['0']), ord(inv_chars['1'])
+    code_points = code_points[(code_points == zero) | (code_points == one)]
+    bits = code_points == one
+
+    return np.packbits(bits).tobytes(), int(bits.size)
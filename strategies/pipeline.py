@@ -0,0 +1,911 @@
+import abc
+import inspect
+from functools import partial
+from typing import Dict, Iterable, Iterator, Optional, Tuple, Union
+
+from strategies.adaptive_coding import (adaptive_decode, adaptive_decode_bytes,
+                                        adaptive_encode, adaptive_encode_bytes)
+from strategies.batch import map_batch
+from strategies.bit_buffer import (bytes_to_invisible, bytes_to_text,
+                                   extract_invisible, invisible_to_bytes,
+                                   static_mapping, text_to_bytes)
+from strategies.canonical_huffman import (CodebookCache, dump_codebook,
+                                          huffman_decode, huffman_encode,
+                                          load_codebook)
+from strategies.dynamic_mapping import dynamic_mapping, rotate_symbols
+from strategies.framing import (FRAME_MARKER, FRAME_SIZE, FramedMessage,
+                                assemble_frames, pack_container, pack_frames,
+                                read_frame, unpack_container)
+from strategies.hamming_code import (hamming_block_decode,
+                                     hamming_block_encode,
+                                     hamming_decode_buffer,
+                                     hamming_encode_buffer)
+from strategies.placement import check_fit, splice, spread
+from strategies.reed_solomon import DEFAULT_PARITY, rs_decode, rs_encode
+
+
+# Separates the message from the header of the compression stage
+SEPARATOR = '\u200D'
+
+# Registered stage classes: stage kind -> name -> class
+STAGES = {
+    'compression': {},
+    'error_correction': {},
+    'mapping': {},
+    'placement': {},
+}
+
+
+def register_stage(kind: str, name: str):
+    """Register a stage class under a name, as a class decorator.
+
+    Args:
+        kind (str): The kind of stage, one of the keys of STAGES.
+        name (str): The name to register the stage under.
+
+    Returns:
+        Callable: The decorator. It raises a TypeError for a class that
+        leaves abstract methods of its stage kind unimplemented.
+    """
+    def decorator(cls):
+        if kind not in STAGES:
+            raise ValueError(f"Unknown stage kind: {kind}")
+        if inspect.isabstract(cls):
+            missing = ', '.join(sorted(cls.__abstractmethods__))
+            raise TypeError(f"Stage {cls.__name__} does not implement "
+                            f"{missing}")
+        cls.kind = kind
+        cls.name = name
+        STAGES[kind][name] = cls
+        return cls
+
+    return decorator
+
+
+def create_stage(kind: str, name: str, **options) -> 'Stage':
+    """Create a registered stage.
+
+    Args:
+        kind (str): The kind of stage, one of the keys of STAGES.
+        name (str): The registered name of the stage.
+        **options: Options for the stage, e.g. seed or block_code. Stages
+            ignore the options they do not use.
+
+    Returns:
+        Stage: The stage.
+    """
+    if kind not in STAGES:
+        raise ValueError(f"Unknown stage kind: {kind}")
+    if name not in STAGES[kind]:
+        raise ValueError(f"Unknown {kind} stage: {name}")
+    return STAGES[kind][name](**options)
+
+
+class Stage(abc.ABC):
+    """Base class of all pipeline stages."""
+    kind = None
+    name = None
+
+    def __init__(self, **options):
+        self.options = options
+
+    def __repr__(self):
+        return f"{type(self).__name__}()"
+
+
+# Compression stages turn the message into a bit buffer and an optional
+# header, which is embedded behind the separator.
+class Compression(Stage):
+    """Turns the hidden message into a bit buffer."""
+
+    @abc.abstractmethod
+    def compress(self, message: str) -> Tuple[bytes, int, Optional[bytes]]:
+        """Compress a message.
+
+        Args:
+            message (str): The hidden message.
+
+        Returns:
+            Tuple[bytes, int, Optional[bytes]]: The packed bits, the number
+            of bits and the header, or None if there is no header.
+        """
+
+    @abc.abstractmethod
+    def decompress(self, data: bytes, nbits: int,
+                   header: Optional[bytes]) -> str:
+        """Decompress a bit buffer back into the message.
+
+        Args:
+            data (bytes): The packed bits.
+            nbits (int): The number of valid bits.
+            header (Optional[bytes]): The header written by compress.
+
+        Returns:
+            str: The hidden message.
+        """
+
+    def compress_bytes(self, payload: Union[bytes, memoryview]
+                       ) -> Tuple[bytes, int, Optional[bytes]]:
+        """Compress a binary payload.
+
+        By default the bytes are compressed as the characters U+0000 to
+        U+00FF; stages that work on bytes override this.
+
+        Args:
+            payload (Union[bytes, memoryview]): The bytes to hide.
+
+        Returns:
+            Tuple[bytes, int, Optional[bytes]]: As compress.
+        """
+        return self.compress(bytes_to_text(payload))
+
+    def decompress_bytes(self, data: bytes, nbits: int,
+                         header: Optional[bytes]) -> bytes:
+        """Decompress a bit buffer back into the payload.
+
+        Args:
+            data (bytes): The packed bits.
+            nbits (int): The number of valid bits.
+            header (Optional[bytes]): The header written by compress_bytes.
+
+        Returns:
+            bytes: The payload.
+        """
+        return text_to_bytes(self.decompress(data, nbits, header))
+
+
+@register_stage('compression', 'none')
+class NoCompression(Compression):
+    """Eight bits per character, like basic_approach."""
+
+    def compress(self, message):
+        data = text_to_bytes(message)
+        return data, len(data) * 8, None
+
+    def decompress(self, data, nbits, header):
+        return bytes_to_text(data[:nbits // 8])
+
+    def compress_bytes(self, payload):
+        data = bytes(payload)
+        return data, len(data) * 8, None
+
+    def decompress_bytes(self, data, nbits, header):
+        return bytes(data[:nbits // 8])
+
+
+@register_stage('compression', 'huffman')
+class HuffmanCompression(Compression):
+    """Canonical Huffman codes with the codebook as header.
+
+    With a shared codebook there is no header; with a CodebookCache the
+    codebooks of earlier messages with the same profile are reused.
+    """
+
+    def __init__(self, compact_header: bool = False,
+                 codebook: Dict[str, str] = None, cache: CodebookCache = None,
+                 **options):
+        super().__init__(**options)
+        self.compact_header = compact_header
+        self.codebook = codebook
+        self.cache = cache
+
+    def compress(self, message):
+        data, nbits, codebook = huffman_encode(message, self.codebook,
+                                               self.cache)
+        if self.codebook is not None:
+            return data, nbits, None
+        return data, nbits, dump_codebook(codebook, self.compact_header)
+
+    def decompress(self, data, nbits, header):
+        codebook = self.codebook if header is None else load_codebook(header)
+        return huffman_decode(data, nbits, codebook)
+
+
+@register_stage('compression', 'adaptive')
+class AdaptiveCompression(Compression):
+    """Adaptive arithmetic coding, which needs no header."""
+
+    def compress(self, message):
+        data = adaptive_encode(message)
+        return data, len(data) * 8, None
+
+    def decompress(self, data, nbits, header):
+        return adaptive_decode(data[:nbits // 8])
+
+    def compress_bytes(self, payload):
+        data = adaptive_encode_bytes(payload)
+        return data, len(data) * 8, None
+
+    def decompress_bytes(self, data, nbits, header):
+        return adaptive_decode_bytes(data[:nbits // 8])
+
+
+# Error correction stages map a bit buffer to a longer bit buffer and back.
+class ErrorCorrection(Stage):
+    """Adds redundancy to a bit buffer.
+
+    burst_bits is the longest run of damaged bits the stage corrects
+    wherever it falls; framed decoding uses it to realign a frame that
+    lost or gained an invisible character.
+    """
+    burst_bits = 0
+
+    @abc.abstractmethod
+    def encode(self, data: bytes, nbits: int) -> Tuple[bytes, int]:
+        """Encode a bit buffer.
+
+        Args:
+            data (bytes): The packed bits.
+            nbits (int): The number of valid bits.
+
+        Returns:
+            Tuple[bytes, int]: The packed encoded bits and their number.
+        """
+
+    @abc.abstractmethod
+    def decode(self, data: bytes, nbits: int) -> Tuple[bytes, int]:
+        """Decode a bit buffer, correcting errors where possible.
+
+        Args:
+            data (bytes): The packed encoded bits.
+            nbits (int): The number of valid bits.
+
+        Returns:
+            Tuple[bytes, int]: The packed decoded bits and their number.
+        """
+
+
+@register_stage('error_correction', 'none')
+class NoErrorCorrection(ErrorCorrection):
+    """Passes the bit buffer through unchanged."""
+
+    def encode(self, data, nbits):
+        return data, nbits
+
+    def decode(self, data, nbits):
+        return data, nbits
+
+
+@register_stage('error_correction', 'hamming')
+class HammingErrorCorrection(ErrorCorrection):
+    """Hamming code, per block or over the whole message."""
+    burst_bits = 1
+
+    def __init__(self, block_code: Tuple[int, int] = None, **options):
+        super().__init__(**options)
+        self.block_code = block_code
+
+    def encode(self, data, nbits):
+        if self.block_code is None:
+            return hamming_encode_buffer(data, nbits)
+        return hamming_block_encode(data, nbits, self.block_code)
+
+    def decode(self, data, nbits):
+        if self.block_code is None:
+            return hamming_decode_buffer(data, nbits)
+        return hamming_block_decode(data, self.block_code)
+
+    def __repr__(self):
+        return f"{type(self).__name__}(block_code={self.block_code})"
+
+
+@register_stage('error_correction', 'reed_solomon')
+class ReedSolomonErrorCorrection(ErrorCorrection):
+    """Reed-Solomon code over bytes, which corrects up to parity // 2
+    damaged bytes per codeword of 255 bytes."""
+
+    def __init__(self, parity: int = DEFAULT_PARITY, **options):
+        super().__init__(**options)
+        self.parity = parity
+        # A run of 8 * (n - 1) + 1 bits touches at most n bytes
+        self.burst_bits = max(0, 8 * (parity // 2 - 1) + 1)
+
+    def encode(self, data, nbits):
+        return rs_encode(data, nbits, self.parity)
+
+    def decode(self, data, nbits):
+        return rs_decode(data[:nbits // 8], self.parity)
+
+    def __repr__(self):
+        return f"{type(self).__name__}(parity={self.parity})"
+
+
+# Mapping stages choose the invisible character of every group of bits.
+class Mapping(Stage):
+    """Maps groups of bits to invisible characters."""
+
+    def __init__(self, bits_per_symbol: int = 1, **options):
+        super().__init__(**options)
+        self.bits_per_symbol = bits_per_symbol
+        self.inv_chars = self.mapping()
+
+    @abc.abstractmethod
+    def mapping(self) -> Dict[str, str]:
+        """Build the mapping.
+
+        Returns:
+            Dict[str, str]: A dict mapping bit groups to invisible characters.
+        """
+
+    def to_invisible(self, data: bytes, nbits: int = None,
+                     backend: str = 'python') -> str:
+        """Convert a bit buffer into invisible characters.
+
+        Args:
+            data (bytes): The packed bits.
+            nbits (int, optional): The number of valid bits.
+            backend (str, optional): The bit conversion backend.
+
+        Returns:
+            str: One invisible character per symbol.
+        """
+        return bytes_to_invisible(data, self.inv_chars, nbits, backend)
+
+    def from_invisible(self, invisible: str,
+                       backend: str = 'python') -> Tuple[bytes, int]:
+        """Convert invisible characters back into a bit buffer.
+
+        Args:
+            invisible (str): The invisible characters.
+            backend (str, optional): The bit conversion backend.
+
+        Returns:
+            Tuple[bytes, int]: The packed bits and the number of bits.
+        """
+        return invisible_to_bytes(invisible, self.inv_chars, backend)
+
+
+@register_stage('mapping', 'static')
+class StaticMapping(Mapping):
+    """The fixed mapping of basic_approach."""
+
+    def mapping(self):
+        return static_mapping(self.bits_per_symbol)
+
+
+@register_stage('mapping', 'dynamic')
+class DynamicMapping(Mapping):
+    """A mapping shuffled with a seed, like dynamic_mapping."""
+
+    def __init__(self, seed: int = None, **options):
+        if seed is None:
+            raise ValueError("The dynamic mapping requires a seed")
+        self.seed = seed
+        super().__init__(**options)
+
+    def mapping(self):
+        return dynamic_mapping(self.seed, self.bits_per_symbol)
+
+    def __repr__(self):
+        return f"{type(self).__name__}(seed={self.seed})"
+
+
+@register_stage('mapping', 'rotating')
+class RotatingMapping(Mapping):
+    """A mapping that changes every rotation_block symbols, derived from
+    the seed as key with dynamic_mapping.rotate_symbols."""
+
+    def __init__(self, seed: int = None, rotation_block: int = 64,
+                 **options):
+        if seed is None:
+            raise ValueError("The rotating mapping requires a seed")
+        self.seed = seed
+        self.rotation_block = rotation_block
+        super().__init__(**options)
+
+    def mapping(self):
+        return static_mapping(self.bits_per_symbol)
+
+    def to_invisible(self, data, nbits=None, backend='python'):
+        return rotate_symbols(super().to_invisible(data, nbits, backend),
+                              self.seed, self.rotation_block,
+                              self.bits_per_symbol)
+
+    def from_invisible(self, invisible, backend='python'):
+        return super().from_invisible(
+            rotate_symbols(invisible, self.seed, self.rotation_block,
+                           self.bits_per_symbol, inverse=True), backend)
+
+    def __repr__(self):
+        return (f"{type(self).__name__}(seed={self.seed}, "
+                f"rotation_block={self.rotation_block})")
+
+
+# Placement stages put the invisible characters into the cover text.
+class Placement(Stage):
+    """Places invisible characters in a cover text."""
+
+    @abc.abstractmethod
+    def embed(self, cover_text: str, invisible: str,
+              trailing: Tuple[str, ...] = ()) -> str:
+        """Embed invisible characters into a cover text.
+
+        Args:
+            cover_text (str): The cover text.
+            invisible (str): The invisible characters of the message.
+            trailing (Tuple[str, ...], optional): Extra parts added after
+                the message, e.g. the separator and the header.
+
+        Returns:
+            str: The stego object.
+        """
+
+    def check_fit(self, cover_text: str, symbols: int):
+        """Check that a message fits the cover text. Placements that never
+        run out of room accept any message.
+
+        Args:
+            cover_text (str): The cover text.
+            symbols (int): The number of invisible characters of the
+                message.
+
+        Raises:
+            ValueError: If the message does not fit.
+        """
+
+    def extract(self, stego_object: str, chars: Tuple[str, ...]) -> str:
+        """Extract the invisible characters from a stego object.
+
+        Args:
+            stego_object (str): The stego object.
+            chars (Tuple[str, ...]): The characters that may have been
+                embedded.
+
+        Returns:
+            str: The embedded characters in order.
+        """
+        return extract_invisible(stego_object, chars)
+
+
+@register_stage('placement', 'interleave')
+class InterleavePlacement(Placement):
+    """One invisible character after every word, the rest after the last."""
+
+    def embed(self, cover_text, invisible, trailing=()):
+        return splice(cover_text, invisible, trailing)
+
+    def check_fit(self, cover_text, symbols):
+        check_fit(cover_text, symbols, 'interleave placement')
+
+
+@register_stage('placement', 'spread')
+class SpreadPlacement(Placement):
+    """Runs of equal length at every insertion point of the cover text.
+
+    The separator and header are spread along with the message, so the
+    cover text keeps its whitespace and no long run builds up at the end.
+    """
+
+    def embed(self, cover_text, invisible, trailing=()):
+        return spread(cover_text, invisible + ''.join(trailing))
+
+
+class Pipeline:
+    """A composition of one stage of every kind.
+
+    The stages pass packed bit buffers between them; the bits are only
+    turned into invisible characters once, just before placement. Unless
+    allow_overflow is set, the encoders raise a ValueError if the placement
+    has no room for the message.
+    """
+
+    def __init__(self, compression: Compression,
+                 error_correction: ErrorCorrection, mapping: Mapping,
+                 placement: Placement, backend: str = 'python',
+                 allow_overflow: bool = False):
+        self.compression = compression
+        self.error_correction = error_correction
+        self.mapping = mapping
+        self.placement = placement
+        self.backend = backend
+        self.allow_overflow = allow_overflow
+
+    def __repr__(self):
+        return (f"Pipeline({self.compression!r}, {self.error_correction!r}, "
+                f"{self.mapping!r}, {self.placement!r})")
+
+    def embedded(self, hidden_message: str) -> Tuple[str, Tuple[str, ...]]:
+        """Turn a hidden message into the invisible characters to embed.
+
+        Args:
+            hidden_message (str): The message to be hidden.
+
+        Returns:
+            Tuple[str, Tuple[str, ...]]: The invisible characters of the
+            message and the parts after it (the separator and the header),
+            if the compression stage has a header.
+        """
+        return self._embedded(*self.compression.compress(hidden_message))
+
+    def embedded_bytes(self, payload: Union[bytes, memoryview]
+                       ) -> Tuple[str, Tuple[str, ...]]:
+        """Turn a binary payload into the invisible characters to embed.
+
+        Args:
+            payload (Union[bytes, memoryview]): The bytes to hide.
+
+        Returns:
+            Tuple[str, Tuple[str, ...]]: As embedded.
+        """
+        return self._embedded(*self.compression.compress_bytes(payload))
+
+    def _embedded(self, data: bytes, nbits: int, header: Optional[bytes]
+                  ) -> Tuple[str, Tuple[str, ...]]:
+        # Error correction and mapping of a compressed bit buffer
+        data, nbits = self.error_correction.encode(data, nbits)
+        invisible = self.mapping.to_invisible(data, nbits, self.backend)
+
+        trailing = ()
+        if header is not None:
+            trailing = (SEPARATOR, self.mapping.to_invisible(
+                header, backend=self.backend))
+        return invisible, trailing
+
+    def _embed(self, cover_text: str, invisible: str,
+               trailing: Tuple[str, ...] = ()) -> str:
+        # Placement of the invisible characters, after the capacity check
+        if not self.allow_overflow:
+            self.placement.check_fit(cover_text, len(invisible))
+        return self.placement.embed(cover_text, invisible, trailing)
+
+    def encode_message(self, cover_text: str, hidden_message: str) -> str:
+        """Encode a hidden message into a cover text.
+
+        Args:
+            cover_text (str): The cover text to embed the hidden message into.
+            hidden_message (str): The message to be hidden.
+
+        Returns:
+            str: The resulting stego object containing the hidden message.
+
+        Raises:
+            ValueError: If the message does not fit the cover text, unless
+                allow_overflow is set.
+        """
+        return self._embed(cover_text, *self.embedded(hidden_message))
+
+    def encode_bytes(self, cover_text: str,
+                     payload: Union[bytes, memoryview]) -> str:
+        """Encode a binary payload into a cover text.
+
+        Args:
+            cover_text (str): The cover text to embed the payload into.
+            payload (Union[bytes, memoryview]): The bytes to hide.
+
+        Returns:
+            str: The resulting stego object containing the payload.
+
+        Raises:
+            ValueError: If the payload does not fit the cover text, unless
+                allow_overflow is set.
+        """
+        return self._embed(cover_text, *self.embedded_bytes(payload))
+
+    @property
+    def chars(self) -> Tuple[str, ...]:
+        """The invisible characters of the mapping and the separator."""
+        return (*self.mapping.inv_chars.values(), SEPARATOR)
+
+    def decode_invisible(self, invisible: str) -> str:
+        """Decode the hidden message from the extracted invisible characters.
+
+        Args:
+            invisible (str): The invisible characters of a stego object,
+                in order.
+
+        Returns:
+            str: The decoded hidden message.
+        """
+        return self.compression.decompress(*self._unembedded(invisible))
+
+    def decode_invisible_bytes(self, invisible: str) -> bytes:
+        """Decode a binary payload from the extracted invisible characters.
+
+        Args:
+            invisible (str): The invisible characters of a stego object,
+                in order.
+
+        Returns:
+            bytes: The payload.
+        """
+        return self.compression.decompress_bytes(*self._unembedded(invisible))
+
+    def _unembedded(self, invisible: str
+                    ) -> Tuple[bytes, int, Optional[bytes]]:
+        # The compressed bit buffer and header of the invisible characters
+        header = None
+        if SEPARATOR in invisible:
+            invisible, encoded_header = invisible.split(SEPARATOR, 1)
+            header, _ = self.mapping.from_invisible(encoded_header,
+                                                    self.backend)
+
+        data, nbits = self.mapping.from_invisible(invisible, self.backend)
+        data, nbits = self.error_correction.decode(data, nbits)
+        return data, nbits, header
+
+    def decode_message(self, stego_object: str) -> str:
+        """Decode the hidden message from a stego object.
+
+        Args:
+            stego_object (str): The stego object containing the hidden message.
+
+        Returns:
+            str: The decoded hidden message.
+        """
+        return self.decode_invisible(
+            self.placement.extract(stego_object, self.chars))
+
+    def decode_bytes(self, stego_object: str) -> bytes:
+        """Decode a binary payload from a stego object.
+
+        Args:
+            stego_object (str): The stego object containing the payload.
+
+        Returns:
+            bytes: The payload.
+        """
+        return self.decode_invisible_bytes(
+            self.placement.extract(stego_object, self.chars))
+
+    def encode_framed(self, cover_text: str, hidden_message: str,
+                      frame_size: int = FRAME_SIZE) -> str:
+        """Encode a hidden message into a cover text as a framed container.
+
+        Args:
+            cover_text (str): The cover text to embed the hidden message into.
+            hidden_message (str): The message to be hidden.
+            frame_size (int, optional): Payload bytes per frame. Defaults to
+                framing.FRAME_SIZE.
+
+        Returns:
+            str: The resulting stego object containing the hidden message.
+
+        Raises:
+            ValueError: If the frames do not fit the cover text, unless
+                allow_overflow is set.
+        """
+        return self._embed(cover_text, self._framed(
+            *self.compression.compress(hidden_message), frame_size))
+
+    def encode_framed_bytes(self, cover_text: str,
+                            payload: Union[bytes, memoryview],
+                            frame_size: int = FRAME_SIZE) -> str:
+        """Encode a binary payload into a cover text as a framed container.
+
+        Args:
+            cover_text (str): The cover text to embed the payload into.
+            payload (Union[bytes, memoryview]): The bytes to hide.
+            frame_size (int, optional): Payload bytes per frame. Defaults to
+                framing.FRAME_SIZE.
+
+        Returns:
+            str: The resulting stego object containing the payload.
+
+        Raises:
+            ValueError: If the frames do not fit the cover text, unless
+                allow_overflow is set.
+        """
+        return self._embed(cover_text, self._framed(
+            *self.compression.compress_bytes(payload), frame_size))
+
+    def _framed(self, data: bytes, nbits: int, header: Optional[bytes],
+                frame_size: int) -> str:
+        # Every frame is error corrected and mapped on its own and starts
+        # with the marker
+        frames = pack_frames(pack_container(data, nbits, header), frame_size)
+        return ''.join(FRAME_MARKER + self.mapping.to_invisible(
+            *self.error_correction.encode(frame, len(frame) * 8),
+            backend=self.backend) for frame in frames)
+
+    def decode_framed(self, stego_object: str,
+                      workers: int = 1) -> FramedMessage:
+        """Decode the hidden message from a framed stego object.
+
+        Every frame is corrected by the error correction stage and
+        verified on its own. A frame that lost or gained an invisible
+        character is realigned where the error correction can repair the
+        characters around the guessed position. Frames that still fail are
+        skipped and reported, and the others are returned in frames; the
+        message is only decoded if no frame is missing.
+
+        Args:
+            stego_object (str): The stego object of encode_framed.
+            workers (int, optional): Number of worker processes that
+                convert and verify the frames, see batch.map_batch.
+                Defaults to 1.
+
+        Returns:
+            FramedMessage: The message (None if frames are missing), the
+            damaged and missing frames and the recovered frames.
+        """
+        result = self._unframed(stego_object, workers)
+        if result.complete:
+            result = result._replace(
+                message=self.compression.decompress(*result.message))
+        return result
+
+    def decode_framed_bytes(self, stego_object: str,
+                            workers: int = 1) -> FramedMessage:
+        """Decode a binary payload from a framed stego object.
+
+        Args:
+            stego_object (str): The stego object of encode_framed_bytes.
+            workers (int, optional): As decode_framed.
+
+        Returns:
+            FramedMessage: As decode_framed, with the payload as message.
+        """
+        result = self._unframed(stego_object, workers)
+        if result.complete:
+            result = result._replace(
+                message=self.compression.decompress_bytes(*result.message))
+        return result
+
+    def _unframed(self, stego_object: str, workers: int) -> FramedMessage:
+        # The message of the result is the compressed bit buffer and header
+        invisible = self.placement.extract(
+            stego_object, (*self.mapping.inv_chars.values(), FRAME_MARKER))
+        pieces = invisible.split(FRAME_MARKER)
+        if not pieces[0]:
+            del pieces[0]
+
+        frames = map_batch(partial(_read_frame, self.mapping,
+                                   self.error_correction, self.backend),
+                           ((piece,) for piece in pieces), workers)
+        payload, count, damaged, missing, chunks = assemble_frames(frames)
+        if payload is None:
+            return FramedMessage(None, count, damaged, missing, chunks)
+        return FramedMessage(unpack_container(payload), count, damaged,
+                             missing, chunks)
+
+    def encode_batch(self, pairs: Iterable[Tuple[str, str]],
+                     workers: int = 1) -> Iterator[str]:
+        """Encode many hidden messages into many cover texts.
+
+        Args:
+            pairs (Iterable[Tuple[str, str]]): (cover text, hidden message)
+                pairs.
+            workers (int, optional): Number of worker processes, see
+                batch.map_batch. Defaults to 1.
+
+        Returns:
+            Iterator[str]: The stego objects, in the order of the pairs.
+        """
+        return map_batch(self.encode_message, pairs, workers)
+
+    def decode_batch(self, stego_objects: Iterable[str],
+                     workers: int = 1) -> Iterator[str]:
+        """Decode the hidden messages of many stego objects.
+
+        Args:
+            stego_objects (Iterable[str]): The stego objects.
+            workers (int, optional): Number of worker processes, see
+                batch.map_batch. Defaults to 1.
+
+        Returns:
+            Iterator[str]: The decoded messages, in order.
+        """
+        return map_batch(self.decode_message,
+                         ((stego_object,) for stego_object in stego_objects),
+                         workers)
+
+
+def _read_frame(mapping: Mapping, error_correction: ErrorCorrection,
+                backend: str, invisible: str
+                ) -> Optional[Tuple[int, int, bytes]]:
+    # Convert, correct and verify one frame; None if it is damaged
+    frame = _correct_frame(mapping, error_correction, backend, invisible)
+    stride = error_correction.burst_bits // mapping.bits_per_symbol
+    if frame is not None or not stride:
+        return frame
+
+    # A lost or inserted character shifts everything behind it. Put a
+    # character back or take one out every stride characters: only the
+    # characters between the guess and the actual position are then
+    # wrong, which the error correction repairs
+    filler = next(iter(mapping.inv_chars.values()))
+    for end in range(stride - 1, len(invisible) + stride, stride):
+        position = min(end, len(invisible))
+        for candidate in (invisible[:position] + filler +
+                          invisible[position:],
+                          invisible[:position] + invisible[position + 1:]):
+            frame = _correct_frame(mapping, error_correction, backend,
+                                   candidate)
+            if frame is not None:
+                return frame
+    return None
+
+
+def _correct_frame(mapping: Mapping, error_correction: ErrorCorrection,
+                   backend: str, invisible: str
+                   ) -> Optional[Tuple[int, int, bytes]]:
+    # The frame of invisible characters, or None if it fails its CRC32;
+    # bits left over from the last symbol are ignored
+    try:
+        data, nbits = mapping.from_invisible(invisible, backend)
+        data, nbits = error_correction.decode(data, nbits)
+        return read_frame(data[:nbits // 8])
+    except ValueError:
+        return None
+
+
+# The stages of the strategy modules
+PRESETS = {
+    'basic_approach': ('none', 'none', 'static', 'interleave'),
+    'dynamic_mapping': ('none', 'none', 'dynamic', 'interleave'),
+    'huffman_encoding': ('huffman', 'none', 'dynamic', 'interleave'),
+    'hamming_code': ('huffman', 'hamming', 'dynamic', 'interleave'),
+    'adaptive_coding': ('adaptive', 'none', 'dynamic', 'interleave'),
+}
+
+
+def build_pipeline(compression: str = 'none', error_correction: str = 'none',
+                   mapping: str = 'static', placement: str = 'interleave',
+                   backend: str = 'python', allow_overflow: bool = False,
+                   **options) -> Pipeline:
+    """Build a pipeline from registered stage names.
+
+    Args:
+        compression (str, optional): Defaults to 'none'.
+        error_correction (str, optional): Defaults to 'none'.
+        mapping (str, optional): Defaults to 'static'.
+        placement (str, optional): Defaults to 'interleave'.
+        backend (str, optional): The bit conversion backend, 'python',
+            'numpy' or 'auto'. Defaults to 'python'.
+        allow_overflow (bool, optional): Let the encoders put the invisible
+            characters that do not fit after the last word instead of
+            raising. Defaults to False.
+        **options: Options passed to every stage, e.g. seed,
+            bits_per_symbol, block_code or compact_header.
+
+    Returns:
+        Pipeline: The pipeline.
+    """
+    return Pipeline(create_stage('compression', compression, **options),
+                    create_stage('error_correction', error_correction,
+                                 **options),
+                    create_stage('mapping', mapping, **options),
+                    create_stage('placement', placement, **options),
+                    backend, allow_overflow)
+
+
+def parse_pipeline(spec: str, **options) -> Pipeline:
+    """Build a pipeline from a preset name or a spec of stage names.
+
+    A spec lists the compression, error correction, mapping and placement
+    stage names separated by '+', e.g. 'huffman+hamming+dynamic+interleave'.
+    Trailing stages may be left out.
+
+    Args:
+        spec (str): A key of PRESETS or a spec.
+        **options: Options passed to every stage, see build_pipeline.
+
+    Returns:
+        Pipeline: The pipeline.
+    """
+    names = PRESETS.get(spec) or tuple(spec.split('+'))
+    if len(names) > 4:
+        raise ValueError(f"Too many stages in pipeline: {spec}")
+    return build_pipeline(*names, **options)
+
+
+def main():
+    # Read the cover text and hidden message
+    with open("cover_texts/long_covertext.txt", "r", encoding="utf-8") as file:
+        cover_text = file.read()
+
+    with open("hidden_messages/8000bits_message.txt", "r", encoding="utf-8") as file:
+        hidden_message = file.read()
+
+    # Encode and decode with every preset
+    for name in PRESETS:
+        pipeline = parse_pipeline(name, seed=11, block_code=(72, 64),
+                                  allow_overflow=True)
+        stego_object = pipeline.encode_message(cover_text, hidden_message)
+        decoded_message = pipeline.decode_message(stego_object)
+        print(f"{name}: {pipeline}")
+        print("Message decoded correctly:", decoded_message == hidden_message)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,154 @@
+import re
+from typing import List, Sequence
+
+
+# Insertion points of the cover text: after the last character of every
+# word, after punctuation that is directly followed by a word character
+# (e.g. 'end.Next' or 'e.g'), and after every line break
+INSERTION_POINT = re.compile(r'[^\w\s](?=\w)|\S(?=\s|\Z)|\n')
+
+# Whitespace between the words of the cover text, as split by str.split()
+WHITESPACE = re.compile(r'(\s+)')
+
+
+def insertion_points(cover_text: str) -> List[int]:
+    """Index the offsets in a cover text where invisible characters can go.
+
+    Args:
+        cover_text (str): The cover text.
+
+    Returns:
+        List[int]: The offsets in increasing order; an invisible run at
+        offset i is inserted in front of cover_text[i].
+    """
+    return [match.end() for match in INSERTION_POINT.finditer(cover_text)]
+
+
+def spread(cover_text: str, invisible: str, points: List[int] = None) -> str:
+    """Spread invisible characters evenly over the insertion points.
+
+    Unlike the interleaving of the strategies, which puts one character
+    after each word and the rest in one run at the end, every insertion
+    point gets a run of the same length (give or take one character). The
+    cover text itself, including its whitespace, is left as it is.
+
+    Args:
+        cover_text (str): The cover text.
+        invisible (str): The invisible characters to embed, in order.
+        points (List[int], optional): Insertion points from
+            insertion_points, to reuse an index for the same cover text.
+
+    Returns:
+        str: The stego object.
+    """
+    if points is None:
+        points = insertion_points(cover_text)
+    if not points:
+        return cover_text + invisible
+
+    # Slices of the cover text and runs of invisible characters alternate
+    # in a buffer of known size, so the output is joined only once
+    total = len(invisible)
+    count = len(points)
+    pieces = [''] * (2 * count + 1)
+    start = 0
+    taken = 0
+    for index, point in enumerate(points):
+        end = (index + 1) * total // count
+        pieces[2 * index] = cover_text[start:point]
+        pieces[2 * index + 1] = invisible[taken:end]
+        start = point
+        taken = end
+    pieces[-1] = cover_text[start:]
+
+    return ''.join(pieces)
+
+
+def check_fit(cover_text: str, symbols: int, label: str = '') -> int:
+    """Reject a message that would overflow the words of a cover text.
+
+    splice puts one invisible character after every word and all leftover
+    characters in one run after the last word, which gives the message
+    away. The encoders call this as soon as the size of the message is
+    known, before mapping and splicing it.
+
+    Args:
+        cover_text (str): The cover text.
+        symbols (int): The invisible characters of the message, without
+            the separator and header that follow it.
+        label (str, optional): The strategy and radix, for the error
+            message. Defaults to ''.
+
+    Returns:
+        int: The number of words of the cover text.
+
+    Raises:
+        ValueError: If the message has more invisible characters than the
+            cover text has words.
+    """
+    words = len(cover_text.split())
+    check_word_count(words, symbols, label)
+    return words
+
+
+def check_word_count(words: int, symbols: int, label: str = ''):
+    """Reject a message with more invisible characters than words.
+
+    Args:
+        words (int): The number of words of the cover text.
+        symbols (int): The invisible characters of the message.
+        label (str, optional): See check_fit. Defaults to ''.
+
+    Raises:
+        ValueError: If symbols is greater than words.
+    """
+    if symbols > words:
+        raise ValueError(f"Message needs {symbols} invisible characters but "
+                         f"the cover text has only {words} words"
+                         + (f" ({label})" if label else ""))
+
+
+def splice(cover_text: str, invisible: str,
+           trailing: Sequence[str] = ()) -> str:
+    """Put one invisible character after every word of the cover text.
+
+    The stego object consists of slices of the cover text with the
+    invisible characters spliced in, so the visible text (newlines, tabs
+    and repeated spaces included) comes through unchanged. Only the first
+    len(invisible) words are split off; leftover invisible characters and
+    the trailing parts follow the last word as one run.
+
+    Args:
+        cover_text (str): The cover text.
+        invisible (str): The invisible characters to embed, in order.
+        trailing (Sequence[str], optional): Extra parts added after the
+            message, e.g. the separator and the codebook.
+
+    Returns:
+        str: The stego object.
+    """
+    # Leading and trailing whitespace stay where they are; leftover
+    # invisible characters go after the last word, in front of the latter
+    tail = len(cover_text.rstrip())
+    lead = min(len(cover_text) - len(cover_text.lstrip()), tail)
+    if not invisible:
+        return ''.join((cover_text[:tail], *trailing, cover_text[tail:]))
+
+    # Split off as many words as there are invisible characters, keeping the
+    # whitespace between them; the remainder of the text stays one part
+    parts = WHITESPACE.split(cover_text[lead:tail], len(invisible))
+    words = parts[0::2]
+    count = min(len(words), len(invisible))
+
+    # Fill a buffer of known size: the lead, then word, invisible character
+    # and whitespace for every word, then the leftover run
+    pieces = [''] * (3 * len(words) + 1)
+    pieces[0] = cover_text[:lead]
+    pieces[1::3] = words
+    pieces[2:3 * count:3] = invisible[:count]
+    pieces[3:-1:3] = parts[1::2]
+    pieces[-1] = invisible[count:]
+    pieces.extend(trailing)
+    pieces.append(cover_text[tail:])
+
+    return ''.join(pieces)
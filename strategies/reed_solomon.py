@@ -0,0 +1,325 @@
+from functools import lru_cache
+from typing import List, Tuple
+
+
+# For burst error correction: a Reed-Solomon code over GF(256). Every
+# symbol is a byte, so a run of damaged invisible characters only costs
+# the few bytes it falls in, and a block with parity bytes corrects up to
+# parity // 2 damaged bytes. Codewords have at most 255 bytes; the last
+# block of a message is shortened.
+
+# Primitive polynomial x^8 + x^4 + x^3 + x^2 + 1 of the field; the
+# generator of the field is 2
+PRIMITIVE_POLYNOMIAL = 0x11D
+
+# Largest codeword in bytes
+MAX_BLOCK = 255
+
+# Default number of parity bytes per codeword
+DEFAULT_PARITY = 16
+
+# Bytes in front of the data holding its length in bits
+LENGTH_BYTES = 4
+
+
+def _field_tables() -> Tuple[List[int], List[int]]:
+    # Antilog table, doubled so the sum of two logs needs no modulo, and
+    # log table of the field
+    exp = [0] * 512
+    log = [0] * 256
+    value = 1
+    for power in range(255):
+        exp[power] = value
+        log[value] = power
+        value <<= 1
+        if value & 0x100:
+            value ^= PRIMITIVE_POLYNOMIAL
+    for power in range(255, 512):
+        exp[power] = exp[power - 255]
+    return exp, log
+
+
+GF_EXP, GF_LOG = _field_tables()
+
+
+def gf_mul(x: int, y: int) -> int:
+    """Multiply two elements of GF(256)."""
+    if x == 0 or y == 0:
+        return 0
+    return GF_EXP[GF_LOG[x] + GF_LOG[y]]
+
+
+def gf_div(x: int, y: int) -> int:
+    """Divide two elements of GF(256)."""
+    if y == 0:
+        raise ZeroDivisionError("Division by zero in GF(256)")
+    if x == 0:
+        return 0
+    return GF_EXP[(GF_LOG[x] + 255 - GF_LOG[y]) % 255]
+
+
+def gf_pow(x: int, power: int) -> int:
+    """Raise an element of GF(256) to a (possibly negative) power."""
+    return GF_EXP[(GF_LOG[x] * power) % 255]
+
+
+# Polynomials are lists of coefficients, highest degree first.
+def poly_scale(poly: List[int], factor: int) -> List[int]:
+    """Multiply every coefficient of a polynomial by a field element.
+
+    Args:
+        poly (List[int]): The polynomial.
+        factor (int): The element of GF(256).
+
+    Returns:
+        List[int]: The scaled polynomial.
+    """
+    return [gf_mul(coefficient, factor) for coefficient in poly]
+
+
+def poly_add(p: List[int], q: List[int]) -> List[int]:
+    """Add two polynomials over GF(256), which is XOR of the coefficients.
+
+    Args:
+        p (List[int]): The first polynomial.
+        q (List[int]): The second polynomial.
+
+    Returns:
+        List[int]: The sum, as long as the longer polynomial.
+    """
+    result = [0] * max(len(p), len(q))
+    result[len(result) - len(p):] = p
+    for i, coefficient in enumerate(q):
+        result[len(result) - len(q) + i] ^= coefficient
+    return result
+
+
+def poly_mul(p: List[int], q: List[int]) -> List[int]:
+    """Multiply two polynomials over GF(256).
+
+    Args:
+        p (List[int]): The first polynomial.
+        q (List[int]): The second polynomial.
+
+    Returns:
+        List[int]: The product, of degree deg(p) + deg(q).
+    """
+    result = [0] * (len(p) + len(q) - 1)
+    for j, b in enumerate(q):
+        if b:
+            for i, a in enumerate(p):
+                result[i + j] ^= gf_mul(a, b)
+    return result
+
+
+def poly_eval(poly: List[int], x: int) -> int:
+    """Evaluate a polynomial at a field element with Horner's rule.
+
+    Args:
+        poly (List[int]): The polynomial.
+        x (int): The element of GF(256).
+
+    Returns:
+        int: The value of the polynomial at x.
+    """
+    result = poly[0]
+    for coefficient in poly[1:]:
+        result = gf_mul(result, x) ^ coefficient
+    return result
+
+
+class ReedSolomonCode:
+    """Lookup tables of a Reed-Solomon code with a number of parity bytes.
+
+    The encoder is a linear feedback shift register kept in one int of
+    parity bytes: every data byte costs one table lookup, one shift and
+    one XOR. Decoding runs the full syndrome decoder only for blocks whose
+    parity does not match.
+    """
+
+    def __init__(self, parity: int):
+        if not 0 < parity < MAX_BLOCK:
+            raise ValueError(f"Invalid number of parity bytes: {parity}")
+        self.parity = parity
+        self.k = MAX_BLOCK - parity
+
+        # Generator polynomial (x - 1)(x - 2)...(x - 2^(parity-1))
+        generator = [1]
+        for i in range(parity):
+            generator = poly_mul(generator, [1, gf_pow(2, i)])
+        self.generator = generator
+
+        # Register contribution of every feedback byte
+        self.feedback = [int.from_bytes(bytes(gf_mul(feedback, coefficient)
+                                              for coefficient in
+                                              generator[1:]), 'big')
+                         for feedback in range(256)]
+        self.top_shift = 8 * (parity - 1)
+        self.register_mask = (1 << (8 * parity)) - 1
+
+    def parity_bytes(self, data: bytes) -> bytes:
+        """Compute the parity bytes of at most k data bytes."""
+        feedback = self.feedback
+        top_shift = self.top_shift
+        mask = self.register_mask
+        register = 0
+        for byte in data:
+            register = ((register << 8) & mask) ^ \
+                feedback[byte ^ (register >> top_shift)]
+        return register.to_bytes(self.parity, 'big')
+
+    def encode_block(self, data: bytes) -> bytes:
+        """Append the parity bytes to at most k data bytes."""
+        return data + self.parity_bytes(data)
+
+    def decode_block(self, codeword: bytes) -> Tuple[bytes, int]:
+        """Correct a codeword and return its data bytes.
+
+        Args:
+            codeword (bytes): The received codeword, parity bytes last.
+
+        Returns:
+            Tuple[bytes, int]: The data bytes and the number of corrected
+            bytes.
+
+        Raises:
+            ValueError: If the block holds more errors than it can correct.
+        """
+        data = codeword[:-self.parity]
+        if self.parity_bytes(data) == codeword[-self.parity:]:
+            return data, 0
+
+        received = list(codeword)
+        syndromes = [poly_eval(received, gf_pow(2, i))
+                     for i in range(self.parity)]
+        locator = self._error_locator(syndromes)
+        positions = self._error_positions(locator, len(received))
+        corrected = self._correct(received, syndromes, positions)
+
+        if any(poly_eval(corrected, gf_pow(2, i))
+               for i in range(self.parity)):
+            raise ValueError("Uncorrectable error in Reed-Solomon block")
+        return bytes(corrected[:-self.parity]), len(positions)
+
+    def _error_locator(self, syndromes: List[int]) -> List[int]:
+        # Berlekamp-Massey
+        locator = [1]
+        previous = [1]
+        for i in range(self.parity):
+            delta = syndromes[i]
+            for j in range(1, min(len(locator), i + 1)):
+                delta ^= gf_mul(locator[-(j + 1)], syndromes[i - j])
+            previous = previous + [0]
+            if delta:
+                if len(previous) > len(locator):
+                    new_locator = poly_scale(previous, delta)
+                    previous = poly_scale(locator, gf_div(1, delta))
+                    locator = new_locator
+                locator = poly_add(locator, poly_scale(previous, delta))
+
+        while locator and locator[0] == 0:
+            del locator[0]
+        if 2 * (len(locator) - 1) > self.parity:
+            raise ValueError("Uncorrectable error in Reed-Solomon block")
+        return locator
+
+    @staticmethod
+    def _error_positions(locator: List[int], length: int) -> List[int]:
+        # Chien search: the roots of the locator give the positions
+        reversed_locator = locator[::-1]
+        positions = [length - 1 - i for i in range(length)
+                     if poly_eval(reversed_locator, gf_pow(2, i)) == 0]
+        if len(positions) != len(locator) - 1:
+            raise ValueError("Uncorrectable error in Reed-Solomon block")
+        return positions
+
+    def _correct(self, received: List[int], syndromes: List[int],
+                 positions: List[int]) -> List[int]:
+        # Forney algorithm: the error magnitude at every position
+        powers = [len(received) - 1 - position for position in positions]
+        locator = [1]
+        for power in powers:
+            locator = poly_mul(locator, [gf_pow(2, power), 1])
+
+        # Error evaluator: syndromes times locator, modulo x^parity
+        evaluator = poly_mul(syndromes[::-1], locator)[-self.parity:]
+
+        roots = [gf_pow(2, power) for power in powers]
+        corrected = list(received)
+        for position, root in zip(positions, roots):
+            root_inverse = gf_div(1, root)
+            derivative = 1
+            for other in roots:
+                if other != root:
+                    derivative = gf_mul(derivative,
+                                        1 ^ gf_mul(root_inverse, other))
+            if derivative == 0:
+                raise ValueError("Uncorrectable error in Reed-Solomon block")
+            corrected[position] ^= gf_div(poly_eval(evaluator, root_inverse),
+                                          derivative)
+        return corrected
+
+
+@lru_cache(maxsize=None)
+def get_code(parity: int) -> ReedSolomonCode:
+    """Return the (cached) lookup tables of a code with parity bytes."""
+    return ReedSolomonCode(parity)
+
+
+def rs_encode(data: bytes, nbits: int,
+              parity: int = DEFAULT_PARITY) -> Tuple[bytes, int]:
+    """Encode a bit buffer as a series of Reed-Solomon codewords.
+
+    The payload length is stored in front of the data, which is cut into
+    blocks of 255 - parity bytes; the last block is shortened instead of
+    padded.
+
+    Args:
+        data (bytes): The packed bits to protect.
+        nbits (int): The number of valid bits in data.
+        parity (int, optional): Parity bytes per codeword. Every codeword
+            corrects up to parity // 2 bytes. Defaults to DEFAULT_PARITY.
+
+    Returns:
+        Tuple[bytes, int]: The packed codewords and their number of bits.
+    """
+    code = get_code(parity)
+    payload = nbits.to_bytes(LENGTH_BYTES, 'big') + \
+        bytes(data[:(nbits + 7) // 8])
+    encoded = b''.join(code.encode_block(payload[start:start + code.k])
+                       for start in range(0, len(payload), code.k))
+    return encoded, len(encoded) * 8
+
+
+def rs_decode(data: bytes,
+              parity: int = DEFAULT_PARITY) -> Tuple[bytes, int]:
+    """Decode a series of Reed-Solomon codewords, correcting up to
+    parity // 2 bytes per codeword.
+
+    Args:
+        data (bytes): The packed codewords.
+        parity (int, optional): Parity bytes per codeword, as used when
+            encoding. Defaults to DEFAULT_PARITY.
+
+    Returns:
+        Tuple[bytes, int]: The original packed bits and their number.
+
+    Raises:
+        ValueError: If a codeword holds an uncorrectable error.
+    """
+    code = get_code(parity)
+    payload = b''.join(code.decode_block(data[start:start + MAX_BLOCK])[0]
+                       for start in range(0, len(data), MAX_BLOCK))
+
+    nbits = int.from_bytes(payload[:LENGTH_BYTES], 'big')
+    if len(payload) < LENGTH_BYTES or \
+            nbits > (len(payload) - LENGTH_BYTES) * 8:
+        raise ValueError("Invalid Reed-Solomon payload length")
+    return payload[LENGTH_BYTES:LENGTH_BYTES + (nbits + 7) // 8], nbits
+
+
+def rs_size(nbits: int, parity: int = DEFAULT_PARITY) -> int:
+    """Return the number of bits rs_encode produces for nbits bits."""
+    size = LENGTH_BYTES + (nbits + 7) // 8
+    blocks = -(-size // (MAX_BLOCK - parity))
+    return (size + blocks * parity) * 8
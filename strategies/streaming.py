@@ -0,0 +1,267 @@
+import re
+from typing import Dict, Iterable, Iterator, Sequence, TextIO, Tuple
+
+from strategies.bit_buffer import (bits_to_bytes, bits_to_invisible,
+                                   invisible_to_bits, pad_symbols, symbol_size,
+                                   unpad_symbols, visible_pattern)
+
+
+# Number of characters read from a file object at a time
+CHUNK_SIZE = 1 << 16
+
+# Number of output pieces collected before they are yielded together
+BATCH_SIZE = 4096
+
+# A word or a run of whitespace of the cover text
+RUN = re.compile(r'\S+|\s+')
+
+
+# Chunked readers and writers shared by the encode_stream and decode_stream
+# functions of all strategies. Memory use depends on the chunk size only.
+def iter_chunks(file: TextIO, chunk_size: int = CHUNK_SIZE) -> Iterator[str]:
+    """Read a file object in chunks.
+
+    Args:
+        file (TextIO): The file object to read.
+        chunk_size (int, optional): The number of characters per chunk.
+
+    Yields:
+        str: The next chunk of the file.
+    """
+    while True:
+        chunk = file.read(chunk_size)
+        if not chunk:
+            return
+        yield chunk
+
+
+def iter_runs(chunks: Iterable[str]) -> Iterator[str]:
+    """Split chunks of text into alternating runs of words and whitespace.
+
+    Runs that are cut in two by a chunk boundary are joined again, so
+    joining the runs gives back the text.
+
+    Args:
+        chunks (Iterable[str]): The text in chunks.
+
+    Yields:
+        str: The next word or whitespace run.
+    """
+    partial = ''
+    for chunk in chunks:
+        runs = RUN.findall(partial + chunk)
+        partial = runs.pop() if runs else ''
+        yield from runs
+
+    if partial:
+        yield partial
+
+
+def splice_runs(runs: Iterable[str], invisible_chunks: Iterable[str],
+                trailing: Sequence[str] = ()) -> Iterator[str]:
+    """Put one invisible character after every word, streaming.
+
+    Produces the same text as placement.splice: every word is followed by
+    one invisible character while they last, and leftover invisible
+    characters and the trailing parts follow the last word as one run. The
+    whitespace of the cover text is kept as it is; only the whitespace
+    after the latest word is held back until the next word shows up.
+
+    Args:
+        runs (Iterable[str]): The cover text as runs, see iter_runs.
+        invisible_chunks (Iterable[str]): The invisible characters in chunks.
+        trailing (Sequence[str], optional): Extra parts added at the end,
+            e.g. the separator and the codebook.
+
+    Yields:
+        str: The next piece of the stego object.
+    """
+    chunks = iter(invisible_chunks)
+    pending = ''
+    index = 0
+    held = ''
+    batch = []
+    for run in runs:
+        if run[0].isspace():
+            held = run
+            continue
+        while pending is not None and index == len(pending):
+            pending = next(chunks, None)
+            index = 0
+        batch.append(held)
+        batch.append(run)
+        held = ''
+        if pending is not None:
+            batch.append(pending[index])
+            index += 1
+        if len(batch) >= BATCH_SIZE:
+            yield ''.join(batch)
+            batch.clear()
+    yield ''.join(batch)
+
+    # Leftover invisible characters follow the last word as one run
+    if pending is not None:
+        yield pending[index:]
+        yield from chunks
+    yield from trailing
+    yield held
+
+
+def iter_invisible(chunks: Iterable[str],
+                   chars: Tuple[str, ...]) -> Iterator[str]:
+    """Strip everything but the given invisible characters from text chunks.
+
+    Args:
+        chunks (Iterable[str]): The stego text in chunks.
+        chars (Tuple[str, ...]): The characters to keep.
+
+    Yields:
+        str: The invisible characters of the next chunk.
+    """
+    pattern = visible_pattern(tuple(chars))
+    for chunk in chunks:
+        invisible = pattern.sub('', chunk)
+        if invisible:
+            yield invisible
+
+
+def iter_before(chunks: Iterable[str], separator: str) -> Iterator[str]:
+    """Yield the text of the chunks up to the first separator.
+
+    Args:
+        chunks (Iterable[str]): The text in chunks.
+        separator (str): The separator character.
+
+    Yields:
+        str: The next chunk in front of the separator.
+    """
+    for chunk in chunks:
+        if separator in chunk:
+            yield chunk.split(separator, 1)[0]
+            return
+        yield chunk
+
+
+def iter_after(chunks: Iterable[str], separator: str) -> Iterator[str]:
+    """Yield the text of the chunks after the first separator.
+
+    Args:
+        chunks (Iterable[str]): The text in chunks.
+        separator (str): The separator character.
+
+    Yields:
+        str: The next chunk behind the separator.
+
+    Raises:
+        ValueError: If the separator does not occur in the text.
+    """
+    found = False
+    for chunk in chunks:
+        if found:
+            yield chunk
+        elif separator in chunk:
+            found = True
+            yield chunk.split(separator, 1)[1]
+
+    if not found:
+        raise ValueError("Separator not found in the stego object")
+
+
+def pack_bit_chunks(bit_chunks: Iterable[str]
+                    ) -> Iterator[Tuple[bytes, int]]:
+    """Pack chunks of a binary string into byte-aligned bit buffers.
+
+    Bits that do not fill a whole byte are carried over to the next chunk,
+    so only the last buffer can end in a partial byte.
+
+    Args:
+        bit_chunks (Iterable[str]): Strings of '0' and '1' characters.
+
+    Yields:
+        Tuple[bytes, int]: The packed bits and the number of bits.
+    """
+    carry = ''
+    for bits in bit_chunks:
+        bits = carry + bits
+        full = len(bits) - len(bits) % 8
+        carry = bits[full:]
+        if full:
+            yield bits_to_bytes(bits[:full])
+
+    if carry:
+        yield bits_to_bytes(carry)
+
+
+def iter_symbols(bit_chunks: Iterable[str],
+                 inv_chars: Dict[str, str]) -> Iterator[str]:
+    """Convert chunks of a binary string into invisible characters.
+
+    Bits that do not fill a whole symbol are carried over to the next
+    chunk. Mappings with several bits per character end with the padding
+    of pad_symbols, like bytes_to_invisible.
+
+    Args:
+        bit_chunks (Iterable[str]): Strings of '0' and '1' characters.
+        inv_chars (Dict[str, str]): A dictionary mapping bit groups to
+            invisible characters.
+
+    Yields:
+        str: The invisible characters of the next chunk.
+    """
+    size = symbol_size(inv_chars)
+    carry = ''
+    for bits in bit_chunks:
+        bits = carry + bits
+        full = len(bits) - len(bits) % size
+        carry = bits[full:]
+        if full:
+            yield bits_to_invisible(bits[:full], inv_chars)
+
+    if size > 1:
+        yield bits_to_invisible(pad_symbols(carry, size), inv_chars)
+
+
+def _unpad_chunks(bit_chunks: Iterable[str], size: int) -> Iterator[str]:
+    # The padding lies within the last symbol, so hold that one back
+    held = ''
+    for bits in bit_chunks:
+        bits = held + bits
+        held = bits[-size:]
+        if len(bits) > size:
+            yield bits[:-size]
+
+    yield unpad_symbols(held)
+
+
+def iter_bit_buffers(invisible_chunks: Iterable[str],
+                     inv_chars: Dict[str, str]
+                     ) -> Iterator[Tuple[bytes, int]]:
+    """Convert chunks of invisible characters into byte-aligned bit buffers.
+
+    Args:
+        invisible_chunks (Iterable[str]): The invisible characters in chunks.
+        inv_chars (Dict[str, str]): A dictionary mapping bit groups to
+            invisible characters.
+
+    Returns:
+        Iterator[Tuple[bytes, int]]: The packed bits and their number.
+    """
+    bit_chunks = (invisible_to_bits(chunk, inv_chars)
+                  for chunk in invisible_chunks)
+    size = symbol_size(inv_chars)
+    if size > 1:
+        bit_chunks = _unpad_chunks(bit_chunks, size)
+
+    return pack_bit_chunks(bit_chunks)
+
+
+def write_pieces(pieces: Iterable[str], output_file: TextIO):
+    """Write generated pieces of text to a file object.
+
+    Args:
+        pieces (Iterable[str]): The text in pieces.
+        output_file (TextIO): The file object to write to.
+    """
+    for piece in pieces:
+        if piece:
+            output_file.write(piece)